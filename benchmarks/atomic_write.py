@@ -0,0 +1,110 @@
+"""
+Atomic JSON Write Throughput Benchmark
+
+Writes state files of several sizes repeatedly with each atomic_write_json
+encoding (indented, single line, compact), with and without fsync, next to
+the old truncate-in-place writer, and reports writes/s, MB/s and bytes
+written per file.
+
+orjson is used automatically when installed; --no-orjson forces the
+standard library encoder for comparison.
+
+Run from the repository root:
+    python benchmarks/atomic_write.py --writes 200
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utilities import io as slipstream_io  # noqa: E402
+from utilities.io import atomic_write_json  # noqa: E402
+
+# Approximate shapes of real state files
+SIZES = {
+    "breaker-state": 1,      # circuit_breaker/{session}/state.json
+    "context-1k": 10,
+    "context-10k": 100,
+    "calls-100k": 1000,
+}
+
+
+def make_state(records: int) -> dict:
+    """A state document with `records` entries of mixed field types."""
+    return {
+        "session_id": "bench",
+        "state": "CLOSED",
+        "updated": "2026-01-01T00:00:00",
+        "entries": [
+            {
+                "id": i,
+                "endpoint": "deepsearch",
+                "timestamp": 1767225600.0 + i,
+                "agent": "researcher",
+                "ok": i % 7 != 0,
+                "note": "résumé of finding {}".format(i),
+                "tags": ["alpha", "beta"],
+            }
+            for i in range(records)
+        ],
+    }
+
+
+def legacy_write(path: Path, data) -> None:
+    """The previous writer: truncate in place, indented, fsync."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+MODES = {
+    "legacy (truncate)": lambda path, data: legacy_write(path, data),
+    "indent=2": lambda path, data: atomic_write_json(path, data),
+    "indent=None": lambda path, data: atomic_write_json(path, data, indent=None),
+    "compact": lambda path, data: atomic_write_json(path, data, compact=True),
+    "compact, no fsync": lambda path, data: atomic_write_json(path, data, compact=True, durable=False),
+}
+
+
+def bench(directory: Path, name: str, data, writes: int) -> None:
+    print(f"{name} ({len(data['entries'])} entries)")
+    for mode, write in MODES.items():
+        path = directory / f"{name}.json"
+        write(path, data)  # Warm up
+        start = time.perf_counter()
+        for _ in range(writes):
+            write(path, data)
+        elapsed = time.perf_counter() - start
+
+        size = path.stat().st_size
+        assert json.loads(path.read_text(encoding='utf-8')) == data
+        print(f"  {mode:<20} {writes / elapsed:>9,.0f} writes/s "
+              f"{size * writes / elapsed / 1e6:>8.1f} MB/s {size:>10,} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="atomic_write_json throughput benchmark")
+    parser.add_argument("--writes", type=int, default=200, help="Writes per size and mode")
+    parser.add_argument("--dir", type=Path, default=None,
+                        help="Directory to write in (defaults to a temp dir; use the real data disk)")
+    parser.add_argument("--no-orjson", action="store_true", help="Use the stdlib encoder only")
+    args = parser.parse_args()
+
+    if args.no_orjson:
+        slipstream_io.orjson = None
+    print(f"encoder: {'orjson' if slipstream_io.orjson is not None else 'json'}")
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        for name, records in SIZES.items():
+            bench(Path(directory), name, make_state(records), args.writes)
+
+
+if __name__ == "__main__":
+    main()
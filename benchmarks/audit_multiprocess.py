@@ -0,0 +1,95 @@
+"""
+Audit Trail Multi-Process Stress Benchmark
+
+Spawns N worker processes that each append M events to the same session
+log through AuditTrail(process_safe=True), then checks that every event
+arrived intact, the sidecar index agrees with the log, and the log
+verifies end to end.
+
+Run from the repository root:
+    python benchmarks/audit_multiprocess.py --processes 8 --events 500
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utilities.audit import AuditTrail  # noqa: E402
+
+SESSION_ID = "stress"
+SECRET = "benchmark-secret"
+
+
+def _worker(worker_id: int, events: int, buffered: bool, chain: bool) -> None:
+    """Append `events` events tagged with this worker's id."""
+    with AuditTrail(SECRET, buffered=buffered, chain=chain, process_safe=True) as audit:
+        for i in range(events):
+            audit.log_event(
+                session_id=SESSION_ID,
+                event_type="tool_call",
+                agent=f"worker-{worker_id}",
+                phase="research",
+                details={"worker": worker_id, "seq": i, "payload": "x" * 256},
+            )
+
+
+def run(processes: int, events: int, buffered: bool, chain: bool) -> bool:
+    """Run one stress round and report whether no event was lost."""
+    start = time.perf_counter()
+    workers = [
+        multiprocessing.Process(target=_worker, args=(w, events, buffered, chain))
+        for w in range(processes)
+    ]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join()
+    elapsed = time.perf_counter() - start
+
+    audit = AuditTrail(SECRET)
+    seen = set()
+    duplicates = 0
+    for event in audit.iter_session_events(SESSION_ID):
+        details = event["artifact"]["details"]
+        key = (details["worker"], details["seq"])
+        duplicates += key in seen
+        seen.add(key)
+
+    expected = processes * events
+    lost = expected - len(seen)
+    indexed = audit.count_events(SESSION_ID)
+    verified = audit.verify_session(SESSION_ID)
+
+    print(f"processes={processes} events/process={events} buffered={buffered} chain={chain}")
+    print(f"  wall time      {elapsed:.3f}s ({expected / elapsed:,.0f} events/s)")
+    print(f"  events found   {len(seen)}/{expected} (lost {lost}, duplicates {duplicates})")
+    print(f"  index entries  {indexed}")
+    print(f"  verify_session {verified}")
+
+    return lost == 0 and duplicates == 0 and indexed == expected and verified["ok"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AuditTrail multi-process stress benchmark")
+    parser.add_argument("--processes", type=int, default=8, help="Number of writer processes")
+    parser.add_argument("--events", type=int, default=500, help="Events per process")
+    parser.add_argument("--buffered", action="store_true", help="Use buffered group-commit writers")
+    parser.add_argument("--chain", action="store_true", help="Hash-chain entries")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.environ["SLIPSTREAM_DATA_DIR"] = data_dir
+        ok = run(args.processes, args.events, args.buffered, args.chain)
+
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,85 +14,144 @@ from typing import Dict, Any, List
 # Add parent directory to path so we can import modules
 sys.path.append(str(Path(__file__).parent.parent))
 
-from slipstream_framework.utilities.io import load_json_gracefully, atomic_write_json
 from slipstream_framework.utilities.audit import get_audit_trail
+from slipstream_framework.utilities.registry import get_registry
+from slipstream_framework.utilities.prompt import get_prompt_assembler
+from slipstream_framework.utilities.context_pruner import ContextPruner, PruneResult
+from slipstream_framework.utilities.summarizer import SummaryManager, get_session_summaries
+from slipstream_framework.utilities.session_context import SessionContext, get_session_context
+from slipstream_framework.utilities.artifact_store import get_artifact_store
 
 DEFAULT_SESSION_ID = "default_session"
-HISTORY_LIMIT = 5  # Pruning limit
+DEFAULT_MAX_CONTEXT_TOKENS = 100000  # Fallback for sessions.max_context_tokens
+RESPONSE_RESERVE_TOKENS = 8000       # Left free for the model's reply
+MAX_EVENTS_CONSIDERED = 1000         # Audit tail considered for history
+MAX_ARTIFACTS_LISTED = 50            # Newest artifacts_index entries linked in the prompt
 
 def get_session_path(session_id: str) -> Path:
     return Path(f"slipstream_framework/sessions/{session_id}")
 
+def get_context(session_id: str) -> SessionContext:
+    """The session's context.json plus its patch log, cached per process."""
+    return get_session_context(get_session_path(session_id))
+
 def initialize_session(session_id: str):
     """Creates a new session context if it doesn't exist."""
-    path = get_session_path(session_id)
-    path.mkdir(parents=True, exist_ok=True)
-    
-    context_file = path / "context.json"
-    if not context_file.exists():
-        initial_state = {
-            "session_id": session_id,
-            "phase": "intake",
-            "active_persona": "producer",
-            "goals": [],
-            "artifacts_index": []
-        }
-        atomic_write_json(context_file, initial_state)
+    initial_state = {
+        "session_id": session_id,
+        "phase": "intake",
+        "active_persona": "producer",
+        "goals": [],
+        "artifacts_index": []
+    }
+    if get_context(session_id).initialize(initial_state):
         print(f"Initialized new session: {session_id}")
 
-def prune_history_for_context(session_id: str, limit: int = HISTORY_LIMIT) -> List[Dict]:
+def add_artifact(session_id: str, data, name: str, media_type: str = "", **metadata) -> Dict[str, Any]:
+    """
+    Store an artifact body in the shared artifact store and index it.
+
+    Only the hash and metadata go into artifacts_index; identical bodies
+    are stored once across tracks and sessions.
+    """
+    ref = get_artifact_store().put(data)
+    entry = ref.index_entry(name=name, media_type=media_type, **metadata)
+    get_context(session_id).append("artifacts_index", entry)
+    return entry
+
+def load_artifact(sha256: str) -> bytes:
+    """Artifact body for an artifacts_index entry's sha256."""
+    return get_artifact_store().get(sha256)
+
+def get_max_context_tokens() -> int:
+    """sessions.max_context_tokens from slipstream.yaml."""
+    sessions = get_registry().config().get("sessions", {})
+    return int(sessions.get("max_context_tokens", DEFAULT_MAX_CONTEXT_TOKENS))
+
+def get_summary_manager(session_id: str) -> SummaryManager:
+    """Summary checkpoints stored next to the session's context.json, cached per process."""
+    return get_session_summaries(session_id, get_session_path(session_id))
+
+def prune_history_for_context(session_id: str, budget_tokens: int,
+                              events: List[Dict[str, Any]] = None) -> PruneResult:
     """
     PRUNING STRATEGY:
-    1. Load audit log.
-    2. Take only the last N entries.
-    3. Filter out massive 'details' blocks if needed (not implemented yet, but good for future).
+    1. Take the events after the latest summary checkpoint (or, without
+       one, the last MAX_EVENTS_CONSIDERED events of the audit log).
+    2. Pack events newest-first into the token budget, higher-weight event
+       types (decisions, gate resolutions) before tool_call noise.
+    3. Report what was dropped so the prompt can say so.
     """
-    auditor = get_audit_trail()
-    events = auditor.get_session_events(session_id, limit=limit * 10) # Get more to filter
-    
-    # Simple pruning: just take last N
-    pruned = events[-limit:]
+    if events is None:
+        auditor = get_audit_trail()
+        events = auditor.get_session_events(session_id, limit=MAX_EVENTS_CONSIDERED)
     
-    # Advanced pruning opportunity: Summarize older events 
-    # (In a real implementation, we would use an LLM to summarize events[:-limit])
-    
-    return pruned
+    return ContextPruner(budget_tokens=budget_tokens).prune(events)
 
 def generate_system_prompt(session_id: str) -> str:
     """
     Generates the pruned context for the Agent.
     """
-    path = get_session_path(session_id) / "context.json"
-    state = load_json_gracefully(path)
+    state = get_context(session_id).read()
     
     if not state:
         return "Error: Session not initialized."
         
-    # 1. Load Specific Persona
+    # 1. Load Specific Persona (parsed once, cached by the registry)
     persona_name = state.get("active_persona", "producer")
-    # In a real app, reading local file:
-    # persona_def = Path(f"slipstream_framework/personas/{persona_name}.yaml").read_text()
-    
-    # 2. Get Pruned History
-    history = prune_history_for_context(session_id)
+    try:
+        persona_def = get_registry().persona_bundle(persona_name).persona
+    except KeyError:
+        persona_def = {}
     
-    prompt = f"""
+    # 2. Static segments: precompiled constitution block + session header
+    assembler = get_prompt_assembler()
+    static = [assembler.constitution_block(persona_name)] if persona_def else []
+    static.append(assembler.segment(f"""
 === SLIPSTREAM CONTEXT ===
 Session: {session_id}
 Phase: {state['phase']}
 Persona: {persona_name}
+Role: {persona_def.get('role', 'unknown')}
 
 === GOALS ===
 {json.dumps(state['goals'], indent=2)}
-
-=== RECENT HISTORY (Last {len(history)} items) ===
-"""
-    for event in history:
-        # Minimal format to save tokens
-        e = event['artifact']
-        prompt += f"[{e['timestamp']}] {e['agent']} ({e['event_type']}): {str(e['details'])[:200]}...\n"
-        
-    return prompt
+"""))
+    
+    # Artifacts are referenced by hash, never inlined
+    artifacts = state.get("artifacts_index", [])
+    if artifacts:
+        listed = artifacts[-MAX_ARTIFACTS_LISTED:]
+        omitted = len(artifacts) - len(listed)
+        lines = [f"- {a.get('name') or '(unnamed)'} [{a.get('media_type') or 'unknown'}, "
+                 f"{a.get('size', 0)} bytes] artifact:{a.get('sha256', '')}" for a in listed]
+        if omitted:
+            lines.insert(0, f"({omitted} older artifacts not listed)")
+        static.append(assembler.segment("\n=== ARTIFACTS ===\n" + "\n".join(lines) + "\n"))
+    
+    # 3. Latest summary checkpoint stands in for everything it covers
+    summaries = get_summary_manager(session_id)
+    checkpoint, recent = summaries.context(max_events=MAX_EVENTS_CONSIDERED)
+    if checkpoint:
+        static.append(assembler.segment(f"""
+=== SESSION SUMMARY (first {checkpoint.seq} events) ===
+{checkpoint.summary}
+"""))
+    
+    # 4. Get Pruned History of newer events within whatever budget is left
+    used = sum(seg.tokens for seg in static)
+    budget = get_max_context_tokens() - RESPONSE_RESERVE_TOKENS - used
+    history = prune_history_for_context(session_id, budget_tokens=budget, events=recent)
+    summaries.maybe_checkpoint()
+    
+    # 5. Assemble, joining all segments once
+    segments = static + [f"""
+=== RECENT HISTORY ({len(history.events)} items) ===
+({history.explain()})
+"""]
+    segments.extend(history.lines)
+    
+    return assembler.build(segments).text
 
 def main():
     parser = argparse.ArgumentParser(description="Slipstream Runner")
@@ -105,9 +164,9 @@ def main():
         initialize_session(args.session)
     elif args.action == "status":
         print(f"Session: {args.session}")
-        path = get_session_path(args.session) / "context.json"
-        if path.exists():
-            print(path.read_text())
+        state = get_context(args.session).read()
+        if state is not None:
+            print(json.dumps(state, indent=2))
         else:
             print("Not initialized.")
     elif args.action == "context":
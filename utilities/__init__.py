@@ -4,24 +4,60 @@ Slipstream Framework Utilities
 Adapted from CLOCKWORK-CORE utilities for agent orchestration.
 """
 
-from .io import atomic_write_json, load_json_gracefully, get_data_dir
-from .circuit_breaker import CircuitBreaker, CircuitState, TurnResult
-from .audit import AuditTrail, get_audit_trail, sign_and_save
-from .hitl import HITLManager, RiskLevel, check_and_gate
+from .io import atomic_write_json, load_json_gracefully, get_data_dir, file_lock
+from .circuit_breaker import CircuitBreaker, CircuitState, TurnResult, BreakerConfig, compile_progress
+from .circuit_breaker_pool import CircuitBreakerPool
+from .audit import AuditTrail, Durability, get_audit_trail, sign_and_save
+from .hitl import HITLManager, RiskLevel, check_and_gate, pending_gates_all
+from .session_store import SessionStore, get_session_store
+from .session_context import SessionContext, get_session_context
+from .artifact_store import ArtifactStore, get_artifact_store
 from .rate_limiter import RateLimiter
+from .tool_cache import ToolCache, get_tool_cache
+from .rate_limit_store import MemoryCallStore, FileCallStore, SQLiteCallStore
+from .async_rate_limiter import AsyncRateLimiter
+from .registry import Registry, PersonaBundle, get_registry
+from .prompt import PromptAssembler, get_prompt_assembler
+from .tokens import count_tokens, estimate_tokens, set_tokenizer
 
 __all__ = [
     "atomic_write_json",
     "load_json_gracefully",
     "get_data_dir",
+    "file_lock",
     "CircuitBreaker",
+    "CircuitBreakerPool",
     "CircuitState",
     "TurnResult",
+    "BreakerConfig",
+    "compile_progress",
     "AuditTrail",
+    "Durability",
     "get_audit_trail",
     "sign_and_save",
     "HITLManager",
     "RiskLevel",
     "check_and_gate",
+    "pending_gates_all",
+    "SessionStore",
+    "get_session_store",
+    "SessionContext",
+    "get_session_context",
+    "ArtifactStore",
+    "get_artifact_store",
     "RateLimiter",
+    "ToolCache",
+    "get_tool_cache",
+    "MemoryCallStore",
+    "FileCallStore",
+    "SQLiteCallStore",
+    "AsyncRateLimiter",
+    "Registry",
+    "PersonaBundle",
+    "get_registry",
+    "PromptAssembler",
+    "get_prompt_assembler",
+    "count_tokens",
+    "estimate_tokens",
+    "set_tokenizer",
 ]
@@ -0,0 +1,39 @@
+"""
+Slipstream Utilities Command Line
+
+Run from the repository root:
+    python -m utilities migrate --to sqlite
+    python -m utilities sessions --breaker-state OPEN --gate-status PENDING_APPROVAL
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from .session_store import BACKENDS, migrate, open_session_store
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m utilities", description="Slipstream session store")
+    parser.add_argument("--data-dir", type=Path, default=None, help="Data root (default: SLIPSTREAM_DATA_DIR)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_cmd = commands.add_parser("migrate", help="Copy session state between storage backends")
+    migrate_cmd.add_argument("--to", choices=BACKENDS, required=True)
+
+    find_cmd = commands.add_parser("sessions", help="Find sessions by circuit state / gate status")
+    find_cmd.add_argument("--breaker-state", action="append", help="e.g. OPEN (repeatable)")
+    find_cmd.add_argument("--gate-status", help="e.g. PENDING_APPROVAL")
+
+    args = parser.parse_args()
+    if args.command == "migrate":
+        counts = migrate(args.to, args.data_dir)
+        print(f"Migrated to {args.to}: " + ", ".join(f"{k}={v}" for k, v in counts.items()))
+    else:
+        store = open_session_store(args.data_dir)
+        for row in store.find_sessions(args.breaker_state, args.gate_status):
+            print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+"""
+Slipstream Artifact Store
+
+Content-addressed storage for artifact bodies (research outputs, reports,
+generated files), shared by every session.
+
+Each body is stored once, under the SHA-256 of its uncompressed bytes, in
+{data dir}/artifacts/objects/ab/cdef... A session's artifacts_index only
+holds the hash and metadata, so identical outputs from parallel research
+tracks or different sessions take the space of one, and loading a session
+context never touches artifact bodies.
+
+Objects start with a small header (magic, codec, uncompressed size) and are
+compressed with zstd when the zstandard package is installed, zlib
+otherwise; bodies that do not shrink are stored raw. Reads memory-map the
+object, so a raw body is paged in only for the ranges actually read.
+
+Usage:
+    store = get_artifact_store()
+    ref = store.put(report_text)
+    context.append("artifacts_index", ref.index_entry(name="report.md", media_type="text/markdown"))
+
+    with store.open(ref.sha256) as blob:
+        head = blob.read(0, 4096)
+"""
+
+import hashlib
+import mmap
+import os
+import re
+import struct
+import threading
+import uuid
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, Optional, Union
+
+from .io import _fsync_directory, get_data_dir
+from .rules import get_rules_section
+
+try:
+    import zstandard
+except ImportError:  # Optional; zlib is used instead
+    zstandard = None
+
+# Raised for corrupt compressed bodies
+_DECOMPRESS_ERRORS = (zlib.error,) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODEC_NAMES = {"none": CODEC_NONE, "zlib": CODEC_ZLIB, "zstd": CODEC_ZSTD}
+
+# magic, codec, uncompressed size
+HEADER = struct.Struct("<4sB3xQ")
+MAGIC = b"SLA1"
+
+# Object names: lowercase hex SHA-256, never a path
+_SHA256 = re.compile(r"[0-9a-f]{64}")
+
+# Bodies smaller than this are stored raw (compression would not pay off)
+DEFAULT_MIN_COMPRESS_BYTES = 1024
+
+
+class ArtifactNotFound(KeyError):
+    """No object is stored under the requested hash."""
+
+
+@dataclass
+class ArtifactRef:
+    """Where an artifact body lives in the store."""
+    sha256: str
+    size: int                   # Uncompressed bytes
+    stored_size: int            # Bytes on disk, header included
+    codec: str = "none"
+    deduplicated: bool = False  # True if the body was already stored
+
+    def index_entry(self, name: str = "", media_type: str = "", **metadata: Any) -> Dict[str, Any]:
+        """An artifacts_index entry: hash and metadata, never the body."""
+        entry = {
+            "sha256": self.sha256,
+            "name": name,
+            "media_type": media_type,
+            "size": self.size,
+            "created": datetime.now().isoformat(),
+        }
+        entry.update(metadata)
+        return entry
+
+
+def _resolve_codec(name: str) -> int:
+    name = str(name or "auto").lower()
+    if name == "auto":
+        return CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+    if name not in CODEC_NAMES:
+        raise ValueError(f"Unknown artifact compression: {name} (expected auto, {', '.join(CODEC_NAMES)})")
+    if name == "zstd" and zstandard is None:
+        raise ValueError("zstd compression requires the zstandard package")
+    return CODEC_NAMES[name]
+
+
+def _decompress(codec: int, body, size: int) -> bytes:
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(body)
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Artifact is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(body, max_output_size=size)
+    return bytes(body)
+
+
+class ArtifactBlob:
+    """
+    Read-only view of one stored artifact.
+
+    The object file is memory-mapped on open; raw bodies are sliced straight
+    from the map, compressed ones are decompressed on the first read.
+    """
+
+    def __init__(self, path: Path, sha256: str):
+        self.sha256 = sha256
+        self._body: Optional[bytes] = None
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            self._file.close()
+            raise ValueError(f"Not an artifact object: {path}") from None
+        try:
+            magic, self.codec, self.size = HEADER.unpack_from(self._map)
+        except struct.error:
+            magic = None
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Not an artifact object: {path}")
+
+    def read(self, offset: int = 0, length: Optional[int] = None) -> bytes:
+        """Read `length` bytes of the body from `offset` (default: to the end)."""
+        end = self.size if length is None else min(self.size, offset + length)
+        if offset >= end:
+            return b""
+        if self.codec == CODEC_NONE:
+            return self._map[HEADER.size + offset:HEADER.size + end]
+        if self._body is None:
+            with memoryview(self._map) as view, view[HEADER.size:] as body:
+                self._body = _decompress(self.codec, body, self.size)
+        return self._body[offset:end]
+
+    def text(self, encoding: str = "utf-8") -> str:
+        return self.read().decode(encoding)
+
+    def close(self) -> None:
+        self._body = None
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "ArtifactBlob":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class ArtifactStore:
+    """Content-addressed, deduplicated artifact bodies."""
+
+    def __init__(self,
+                 root: Path = None,
+                 compression: Optional[str] = None,
+                 level: Optional[int] = None,
+                 min_compress_bytes: Optional[int] = None):
+        """
+        Initialize artifact store.
+
+        Args:
+            root: Store directory (defaults to the "artifacts" data directory)
+            compression: auto, zstd, zlib or none (defaults to rules.yaml
+                artifacts.compression, else auto)
+            level: Compression level (codec default if None)
+            min_compress_bytes: Smaller bodies are stored raw
+        """
+        config = get_rules_section("artifacts")
+        self.root = Path(root) if root else get_data_dir("artifacts")
+        self.objects_dir = self.root / "objects"
+        self.codec = _resolve_codec(compression or config.get("compression"))
+        self.level = level if level is not None else config.get("level")
+        if min_compress_bytes is None:
+            min_compress_bytes = config.get("min_compress_bytes", DEFAULT_MIN_COMPRESS_BYTES)
+        self.min_compress_bytes = int(min_compress_bytes)
+
+    def path_for(self, sha256: str) -> Path:
+        """
+        Object file for a hash.
+
+        Raises:
+            ArtifactNotFound: If sha256 is not a lowercase hex SHA-256 (hashes
+                come from context.json, so never let one become a path)
+        """
+        if not isinstance(sha256, str) or not _SHA256.fullmatch(sha256):
+            raise ArtifactNotFound(sha256)
+        return self.objects_dir / sha256[:2] / sha256[2:]
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def _compress(self, data: bytes):
+        if self.codec == CODEC_NONE or len(data) < self.min_compress_bytes:
+            return CODEC_NONE, data
+        if self.codec == CODEC_ZSTD:
+            compressed = zstandard.ZstdCompressor(level=self.level or 3).compress(data)
+        else:
+            compressed = zlib.compress(data, 6 if self.level is None else self.level)
+        if len(compressed) >= len(data):
+            return CODEC_NONE, data
+        return self.codec, compressed
+
+    def put(self, data: Union[bytes, str]) -> ArtifactRef:
+        """
+        Store an artifact body (str is stored as UTF-8).
+
+        Storing a body that is already present writes nothing.
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self.path_for(sha256)
+
+        try:
+            with ArtifactBlob(path, sha256) as blob:
+                if blob.size == len(data):
+                    return ArtifactRef(sha256, blob.size, path.stat().st_size,
+                                       _codec_name(blob.codec), deduplicated=True)
+        except (FileNotFoundError, ValueError):
+            pass
+        # Missing, or a truncated/foreign file: (re)write it
+
+        codec, body = self._compress(data)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:12]}.tmp")
+        try:
+            with open(tmp_path, "xb") as f:
+                f.write(HEADER.pack(MAGIC, codec, len(data)))
+                f.write(body)
+                f.flush()
+                os.fsync(f.fileno())
+            # Concurrent writers of the same hash write the same bytes
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        _fsync_directory(path.parent)
+        return ArtifactRef(sha256, len(data), HEADER.size + len(body), _codec_name(codec))
+
+    def put_file(self, path: Path) -> ArtifactRef:
+        """Store the contents of a file."""
+        return self.put(Path(path).read_bytes())
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def __contains__(self, sha256: str) -> bool:
+        try:
+            return self.path_for(sha256).exists()
+        except ArtifactNotFound:
+            return False
+
+    def open(self, sha256: str) -> ArtifactBlob:
+        """
+        Open an artifact for lazy reading (use as a context manager).
+
+        Raises:
+            ArtifactNotFound: If nothing is stored under the hash
+        """
+        try:
+            return ArtifactBlob(self.path_for(sha256), sha256)
+        except FileNotFoundError:
+            raise ArtifactNotFound(sha256) from None
+
+    def get(self, sha256: str) -> bytes:
+        """Read a whole artifact body."""
+        with self.open(sha256) as blob:
+            return blob.read()
+
+    def get_text(self, sha256: str, encoding: str = "utf-8") -> str:
+        return self.get(sha256).decode(encoding)
+
+    def stat(self, sha256: str) -> ArtifactRef:
+        """Size and codec of a stored artifact, without reading its body."""
+        with self.open(sha256) as blob:
+            return ArtifactRef(sha256, blob.size, self.path_for(sha256).stat().st_size,
+                               _codec_name(blob.codec), deduplicated=True)
+
+    def verify(self, sha256: str) -> bool:
+        """Check that a stored body still hashes to its name."""
+        try:
+            return hashlib.sha256(self.get(sha256)).hexdigest() == sha256
+        except (ArtifactNotFound, ValueError) + _DECOMPRESS_ERRORS:
+            return False
+
+    def __iter__(self) -> Iterator[str]:
+        """Hashes of every stored artifact."""
+        if not self.objects_dir.exists():
+            return
+        for prefix in sorted(self.objects_dir.iterdir()):
+            if prefix.is_dir():
+                for path in sorted(prefix.iterdir()):
+                    if _SHA256.fullmatch(prefix.name + path.name):
+                        yield prefix.name + path.name
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def delete(self, sha256: str) -> bool:
+        try:
+            self.path_for(sha256).unlink()
+            return True
+        except (ArtifactNotFound, FileNotFoundError):
+            return False
+
+    def gc(self, referenced: Iterable[str]) -> int:
+        """
+        Delete every artifact not in `referenced` (the hashes of all
+        sessions' artifacts_index entries).
+
+        Objects are shared between sessions, so run this with the full set
+        and while no session is storing artifacts.
+
+        Returns:
+            Number of artifacts deleted
+        """
+        keep = set(referenced)
+        return sum(1 for sha256 in list(self) if sha256 not in keep and self.delete(sha256))
+
+
+def _codec_name(codec: int) -> str:
+    return next(name for name, value in CODEC_NAMES.items() if value == codec)
+
+
+_stores: Dict[str, ArtifactStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_artifact_store(root: Path = None) -> ArtifactStore:
+    """Get or create the shared artifact store for a root (default data dir)."""
+    key = str(Path(root).resolve()) if root else str(get_data_dir("artifacts").resolve())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = ArtifactStore(root)
+            _stores[key] = store
+        return store
@@ -0,0 +1,294 @@
+"""
+Slipstream Async Rate Limiter
+
+asyncio-native front end for RateLimiter that honors the priority
+multipliers and backoff strategy declared in rules.yaml.
+
+Waiters queue per endpoint in priority order (critical > high > medium >
+low, FIFO within a priority). Instead of polling, the head waiter is
+woken by a loop timer set for the exact moment the blocking call leaves
+the sliding window. If another process takes the freed slot first, the
+next wake-up is delayed by exponential backoff with jitter so competing
+workers do not stampede the same instant.
+
+Store operations (a file lock for FileCallStore, a write transaction for
+SQLite) run in the loop's default executor, so a contended store never
+blocks the event loop.
+
+Usage:
+    limiter = AsyncRateLimiter(RateLimiter(session_id="my-session"))
+
+    async with limiter.slot("deepsearch", agent="researcher", priority="high"):
+        results = await deepsearch(query)
+"""
+
+import asyncio
+import heapq
+import itertools
+import random
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Any, AsyncIterator, List, Optional, Set
+
+from .rate_limiter import RateLimiter
+from .rules import get_rules_section
+
+DEFAULT_PRIORITY_MULTIPLIERS = {
+    "low": 0.5,
+    "medium": 1.0,
+    "high": 2.0,
+    "critical": 3.0,
+}
+
+DEFAULT_BACKOFF = {
+    "strategy": "exponential_with_jitter",
+    "base_delay_seconds": 1,
+    "max_delay_seconds": 60,
+    "jitter_factor": 0.2,
+}
+
+# Wake slightly after the computed expiry so the call has left the window
+WAKE_EPSILON = 0.001
+
+
+@dataclass(order=True)
+class _Waiter:
+    """A queued slot request, ordered by priority rank then arrival."""
+    rank: float
+    seq: int
+    future: asyncio.Future = field(compare=False)
+    agent: str = field(compare=False)
+    priority: str = field(compare=False)
+    cost: int = field(compare=False)
+
+
+class AsyncRateLimiter:
+    """
+    Priority-aware asyncio wrapper around a RateLimiter.
+
+    A priority's multiplier scales the endpoint limit it may consume, but
+    the endpoint limit is a hard ceiling shared with synchronous
+    RateLimiter callers: low-priority work stops at half the budget,
+    leaving headroom that medium, high and critical work can still use,
+    while multipliers above 1 only rank waiters in the queue.
+    """
+
+    def __init__(self,
+                 limiter: Optional[RateLimiter] = None,
+                 priority_multipliers: Optional[Dict[str, float]] = None,
+                 backoff: Optional[Dict[str, Any]] = None):
+        """
+        Initialize async limiter.
+
+        Args:
+            limiter: Underlying RateLimiter (defaults to session "default")
+            priority_multipliers: Overrides rules.yaml priority_multipliers
+            backoff: Overrides rules.yaml backoff settings
+        """
+        rules = get_rules_section("rate_limiter")
+
+        self.limiter = limiter if limiter is not None else RateLimiter()
+        self.priority_multipliers = dict(DEFAULT_PRIORITY_MULTIPLIERS)
+        self.priority_multipliers.update(priority_multipliers or rules.get("priority_multipliers") or {})
+        self.backoff = dict(DEFAULT_BACKOFF)
+        self.backoff.update(backoff or rules.get("backoff") or {})
+
+        self._queues: Dict[str, List[_Waiter]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._drains: Dict[str, asyncio.Task] = {}
+        self._recheck: Set[str] = set()
+        self._attempts: Dict[str, int] = {}
+        self._seq = itertools.count()
+
+    def effective_limit(self, endpoint: str, priority: str = "medium") -> int:
+        """Endpoint limit scaled by the priority multiplier, never above the limit itself."""
+        multiplier = self.priority_multipliers.get(priority)
+        if multiplier is None:
+            raise ValueError(f"Unknown priority: {priority}")
+        return max(1, int(self.limiter.get_limit(endpoint) * min(1.0, multiplier)))
+
+    def backoff_delay(self, attempt: int) -> float:
+        """
+        Delay before retry `attempt` (1-based) per the configured strategy.
+
+        exponential_with_jitter: min(max, base * 2^(attempt-1)), then
+        randomly scaled by +/- jitter_factor.
+        """
+        base = float(self.backoff["base_delay_seconds"])
+        cap = float(self.backoff["max_delay_seconds"])
+        delay = min(cap, base * (2 ** max(0, attempt - 1)))
+        if self.backoff.get("strategy") == "exponential_with_jitter":
+            jitter = float(self.backoff.get("jitter_factor", 0))
+            delay *= 1 + random.uniform(-jitter, jitter)
+        return max(0.0, delay)
+
+    async def acquire(self,
+                      endpoint: str,
+                      agent: str = "unknown",
+                      priority: str = "medium",
+                      cost: int = 1,
+                      timeout: Optional[float] = None) -> bool:
+        """
+        Wait for a slot and record the call.
+
+        Args:
+            endpoint: Endpoint being called
+            agent: Which persona/agent is calling
+            priority: low, medium, high or critical
+            cost: Number of call units this call consumes
+            timeout: Maximum seconds to wait (None waits indefinitely)
+
+        Returns:
+            True once the call is recorded, False on timeout or if cost can
+            never fit under the priority's limit
+        """
+        limit = self.effective_limit(endpoint, priority)
+        if cost > limit:
+            return False
+
+        queue = self._queues.setdefault(endpoint, [])
+        if not queue:
+            wait = await self._try(endpoint, agent, limit, cost)
+            if wait == 0:
+                return True
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(
+            rank=-self.priority_multipliers[priority],
+            seq=next(self._seq),
+            future=loop.create_future(),
+            agent=agent,
+            priority=priority,
+            cost=cost,
+        )
+        heapq.heappush(queue, waiter)
+        if queue[0] is waiter:
+            # A higher-priority waiter may fit where the old head did not
+            timer = self._timers.pop(endpoint, None)
+            if timer is not None:
+                timer.cancel()
+        self._dispatch(endpoint)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+            return True
+        except asyncio.TimeoutError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                return True  # Granted in the same tick the timeout fired
+            waiter.future.cancel()
+            self._dispatch(endpoint)
+            return False
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Slot was already recorded; nothing to give back in a sliding window
+                raise
+            waiter.future.cancel()
+            self._dispatch(endpoint)
+            raise
+
+    @asynccontextmanager
+    async def slot(self,
+                   endpoint: str,
+                   agent: str = "unknown",
+                   priority: str = "medium",
+                   cost: int = 1,
+                   timeout: Optional[float] = None) -> AsyncIterator[None]:
+        """
+        Context manager form of acquire().
+
+        Raises:
+            asyncio.TimeoutError: If no slot was granted within timeout
+        """
+        if not await self.acquire(endpoint, agent, priority, cost, timeout):
+            raise asyncio.TimeoutError(
+                f"No '{endpoint}' slot for {agent} (priority {priority}) within {timeout}s")
+        yield
+
+    def notify(self, endpoint: Optional[str] = None) -> None:
+        """
+        Re-check waiters immediately, e.g. after set_limit() or reset().
+
+        Args:
+            endpoint: Endpoint whose waiters to wake (None for all)
+        """
+        endpoints = [endpoint] if endpoint else list(self._queues)
+        for ep in endpoints:
+            timer = self._timers.pop(ep, None)
+            if timer is not None:
+                timer.cancel()
+            self._attempts.pop(ep, None)
+            self._dispatch(ep)
+
+    def pending(self, endpoint: str) -> int:
+        """Number of callers waiting for an endpoint."""
+        return sum(1 for w in self._queues.get(endpoint, []) if not w.future.done())
+
+    async def _try(self, endpoint: str, agent: str, limit: int, cost: int) -> float:
+        """Atomic check-and-record against the underlying store, off the loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.limiter.store.acquire, endpoint, agent,
+                                          limit, self.limiter.window_seconds, cost)
+
+    def _on_timer(self, endpoint: str) -> None:
+        self._timers.pop(endpoint, None)
+        self._dispatch(endpoint, woken=True)
+
+    def _dispatch(self, endpoint: str, woken: bool = False) -> None:
+        """Start granting slots to queued waiters unless a timer or drain is pending."""
+        if endpoint in self._timers:
+            return
+        if endpoint in self._drains:
+            self._recheck.add(endpoint)  # The running drain looks at the queue again
+            return
+        if not self._queues.get(endpoint):
+            return
+        self._drains[endpoint] = asyncio.get_running_loop().create_task(self._drain(endpoint, woken))
+
+    async def _drain(self, endpoint: str, woken: bool) -> None:
+        try:
+            await self._grant(endpoint, woken)
+        finally:
+            # Synchronously with the last step, so no _dispatch sees a finished drain
+            self._drains.pop(endpoint, None)
+            self._recheck.discard(endpoint)
+
+    async def _grant(self, endpoint: str, woken: bool) -> None:
+        """Grant slots to queued waiters in priority order, then re-arm the timer."""
+        queue = self._queues.get(endpoint, [])
+        while queue:
+            head = queue[0]
+            if head.future.done():
+                heapq.heappop(queue)
+                continue
+
+            self._recheck.discard(endpoint)
+            try:
+                wait = await self._try(endpoint, head.agent,
+                                       self.effective_limit(endpoint, head.priority), head.cost)
+            except Exception as e:
+                if not head.future.done():
+                    head.future.set_exception(e)
+                continue
+            if wait == 0:
+                # If the waiter gave up meanwhile, the slot stays recorded:
+                # nothing to give back in a sliding window
+                if not head.future.done():
+                    head.future.set_result(True)
+                self._attempts.pop(endpoint, None)
+                woken = False
+                continue
+            if endpoint in self._recheck:
+                continue  # A new head arrived (or limits changed) while we waited
+
+            delay = wait + WAKE_EPSILON
+            if woken:
+                # Our exact wake-up lost the slot (another process took it)
+                attempt = self._attempts.get(endpoint, 0) + 1
+                self._attempts[endpoint] = attempt
+                delay += self.backoff_delay(attempt)
+            if delay == float("inf"):
+                delay = self.backoff_delay(self._attempts.get(endpoint, 1))
+
+            loop = asyncio.get_running_loop()
+            self._timers[endpoint] = loop.call_later(delay, self._on_timer, endpoint)
+            return
@@ -5,25 +5,199 @@ Handles cryptographic signing of artifacts and decision logging.
 Adapted from CLOCKWORK-CORE.
 """
 
+import atexit
 import hashlib
+import hmac
 import json
 import os
+import threading
 import time
+import weakref
+from contextlib import nullcontext
+from enum import Enum
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
 
-from .io import atomic_write_json, get_data_dir
+from .io import atomic_write_json, file_lock, get_data_dir, read_tail_lines
+from .audit_index import AuditIndex
+from .session_store import SessionStore, get_session_store
+
+# Signature schemes, recorded in each entry's _audit.signer
+SIGNER_LEGACY = "SLIPSTREAM_v1"   # sha256(canonical:secret)
+SIGNER_HMAC = "SLIPSTREAM_v2"     # HMAC-SHA256(prev_signature + canonical)
+
+# Event log lines are written as EVENT_PREFIX + canonical artifact +
+# EVENT_AUDIT_SEP + _audit JSON + "}", so verification can MAC the raw
+# artifact bytes without re-serializing them.
+EVENT_PREFIX = b'{"artifact": '
+EVENT_AUDIT_SEP = b', "_audit": '
+
+
+class Durability(str, Enum):
+    """When appended audit events are fsynced to disk."""
+    NONE = "none"        # Leave it to the OS page cache
+    BATCH = "batch"      # One fsync per flushed batch (group commit)
+    EVENT = "event"      # fsync before log_event returns
+
+
+class _SessionWriter:
+    """Open append handle, pending batch and chain head for one event log."""
+
+    def __init__(self, log_file: Path, index: AuditIndex):
+        self.log_file = log_file
+        self.index = index
+        self.lock = threading.Lock()
+        self.pending: List[Tuple[bytes, Dict[str, Any]]] = []
+        self._handle = None
+        # Signature of the last line we wrote and the log size right after it
+        self._chain_head: Optional[str] = None
+        self._chain_end = -1
+
+    def write(self, trail: "AuditTrail", items: List[Tuple[bytes, Dict[str, Any]]], fsync: bool) -> None:
+        """
+        Sign, append and index canonical artifacts in a single write.
+        Caller holds lock.
+        """
+        if not items:
+            return
+        if self._handle is None:
+            self._handle = open(self.log_file, "ab")
+
+        with trail._log_lock(self.log_file):
+            self._append(trail, items, fsync)
+
+    def _append(self, trail: "AuditTrail", items: List[Tuple[bytes, Dict[str, Any]]], fsync: bool) -> None:
+        """Append under the (optional) cross-process log lock."""
+        offset = self._handle.seek(0, os.SEEK_END)
+        prev = self._chain_prev(offset) if trail.chain else None
+
+        lines = []
+        entries = []
+        position = offset
+        for canonical, artifact in items:
+            line, signature = trail._encode_event(canonical, prev)
+            if prev is not None:
+                prev = signature
+            lines.append(line)
+            entries.append((position, len(line), artifact))
+            position += len(line)
+
+        self._handle.write(b"".join(lines))
+        self._handle.flush()
+        if fsync and hasattr(os, "fsync"):
+            os.fsync(self._handle.fileno())
+
+        self._chain_head, self._chain_end = prev, position
+        self.index.append_many(entries, tail=lines[-1])
+
+    def _chain_prev(self, offset: int) -> str:
+        """Signature of the last entry in the log, or "" for an empty log."""
+        if offset == self._chain_end and self._chain_head is not None:
+            return self._chain_head
+        if offset == 0:
+            return ""
+        for line in read_tail_lines(self.log_file, block_size=4096):
+            try:
+                return json.loads(line)["_audit"]["signature"]
+            except (json.JSONDecodeError, UnicodeDecodeError, KeyError, TypeError):
+                continue
+        return ""
+
+    def close(self) -> None:
+        """Close the append handle. Caller holds lock."""
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+class _StoreWriter:
+    """Pending batch of one session's events for a SessionStore."""
+
+    def __init__(self, store: SessionStore, session_id: str):
+        self.store = store
+        self.session_id = session_id
+        self.lock = threading.Lock()
+        self.pending: List[Tuple[bytes, Dict[str, Any]]] = []
+
+    def write(self, trail: "AuditTrail", items: List[Tuple[bytes, Dict[str, Any]]], fsync: bool) -> None:
+        """
+        Sign and insert canonical artifacts in one transaction.
+        Caller holds lock. Durability follows the store's WAL commits.
+        """
+        if not items:
+            return
+        with self.store.transaction():
+            seq, prev = self.store.audit_head(self.session_id)
+            prev = prev if trail.chain else None
+            rows = []
+            for canonical, artifact in items:
+                line, signature = trail._encode_event(canonical, prev)
+                if prev is not None:
+                    prev = signature
+                rows.append((seq, artifact.get("timestamp"), artifact.get("event_type"),
+                             artifact.get("agent"), artifact.get("phase"), signature, line))
+                seq += 1
+            self.store.audit_append(self.session_id, rows)
+
+    def close(self) -> None:
+        pass
+
+
+def _flush_on_exit(trail_ref: "weakref.ref") -> None:
+    """atexit hook: flush a buffered trail if it is still alive."""
+    trail = trail_ref()
+    if trail is not None:
+        trail.close()
 
 
 class AuditTrail:
-    """Handles cryptographic signing of workflow artifacts."""
+    """
+    Handles cryptographic signing of workflow artifacts.
+
+    Artifacts are signed with HMAC-SHA256 keyed once per trail. With
+    chain=True each event log entry also commits to the previous entry's
+    signature, so deleted or reordered lines are detected by verify_session.
 
-    def __init__(self, secret: str = None):
+    By default every log_event call opens, appends to and closes the session
+    log. Pass buffered=True to keep one handle open per session and group
+    events into batches, flushed when max_batch_size events are pending,
+    every flush_interval seconds, on flush()/close(), and at interpreter exit:
+
+        with AuditTrail(buffered=True, durability=Durability.BATCH) as audit:
+            audit.log_event(...)
+
+    Pass process_safe=True when several worker processes append to the same
+    session log; appends, chain heads and index updates are then serialized
+    with an advisory file lock.
+
+    With the sqlite storage backend (see session_store) events go to the
+    shared SessionStore instead of events.jsonl, as the same signed lines;
+    positions used by iter_events_after() are then sequence numbers.
+    """
+
+    def __init__(self,
+                 secret: str = None,
+                 buffered: bool = False,
+                 flush_interval: float = 1.0,
+                 max_batch_size: int = 100,
+                 durability: Union[Durability, str] = Durability.NONE,
+                 chain: bool = False,
+                 process_safe: bool = False,
+                 store: Optional[SessionStore] = None):
         """
         Initialize audit trail with signing secret.
 
         Args:
             secret: Signing secret. Falls back to SLIPSTREAM_AUDIT_SECRET env var.
+            buffered: Batch events in memory and append them in group commits
+            flush_interval: Seconds between background flushes (buffered mode)
+            max_batch_size: Pending events per session that force a flush
+            durability: When to fsync appended events (none, batch or event)
+            chain: Hash-chain event log entries to their predecessor
+            process_safe: Serialize appends and index updates across
+                processes with an advisory lock on events.lock
+            store: Session store to log to (defaults to the configured
+                storage backend; None there means JSONL files)
         """
         self.secret = secret or os.environ.get("SLIPSTREAM_AUDIT_SECRET")
 
@@ -38,22 +212,61 @@ class AuditTrail:
                 self.secret = f"slipstream-{uuid.uuid4().hex}"
                 os.environ["SLIPSTREAM_AUDIT_SECRET"] = self.secret
 
+        self._mac = hmac.new(self.secret.encode(), digestmod=hashlib.sha256)
+        self.chain = chain
+        self.process_safe = process_safe
+        self.store = store if store is not None else get_session_store()
+        self._indexes: Dict[str, AuditIndex] = {}
+
+        self.buffered = buffered
+        self.flush_interval = flush_interval
+        self.max_batch_size = max(1, max_batch_size)
+        self.durability = Durability(durability)
+
+        self._writers: Dict[str, Union[_SessionWriter, _StoreWriter]] = {}
+        self._session_logs: Dict[str, Path] = {}
+        self._writers_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._closing = threading.Event()
+
+        if self.buffered:
+            atexit.register(_flush_on_exit, weakref.ref(self))
+
+    def __enter__(self) -> "AuditTrail":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
     def sign_artifact(self, artifact: Dict[str, Any]) -> str:
-        """Generate a SHA-256 signature for an artifact."""
+        """Generate a legacy (SLIPSTREAM_v1) SHA-256 signature for an artifact."""
         canonical = json.dumps(artifact, sort_keys=True)
         payload = f"{canonical}:{self.secret}"
         return hashlib.sha256(payload.encode()).hexdigest()
 
+    def sign_canonical(self, canonical: bytes, prev: str = "") -> str:
+        """
+        Generate an HMAC-SHA256 (SLIPSTREAM_v2) signature.
+
+        Args:
+            canonical: Artifact serialized with json.dumps(..., sort_keys=True)
+            prev: Signature of the preceding chained entry ("" if unchained)
+        """
+        mac = self._mac.copy()
+        mac.update(prev.encode())
+        mac.update(canonical)
+        return mac.hexdigest()
+
     def attach_signature(self, state: Dict[str, Any], metadata: Optional[Dict] = None) -> Dict[str, Any]:
         """Sign the artifact and attach the signature to the state."""
         if "artifact" not in state:
             return state
 
-        signature = self.sign_artifact(state["artifact"])
+        canonical = json.dumps(state["artifact"], sort_keys=True).encode()
         state["_audit"] = {
-            "signature": signature,
+            "signature": self.sign_canonical(canonical),
             "timestamp": time.time(),
-            "signer": "SLIPSTREAM_v1",
+            "signer": SIGNER_HMAC,
             "metadata": metadata
         }
         return state
@@ -63,8 +276,111 @@ class AuditTrail:
         if "artifact" not in state or "_audit" not in state:
             return False
 
-        expected = self.sign_artifact(state["artifact"])
-        return state["_audit"]["signature"] == expected
+        audit = state["_audit"]
+        if audit.get("signer") == SIGNER_HMAC:
+            canonical = json.dumps(state["artifact"], sort_keys=True).encode()
+            expected = self.sign_canonical(canonical, audit.get("prev", ""))
+        else:
+            expected = self.sign_artifact(state["artifact"])
+        return hmac.compare_digest(str(audit.get("signature", "")), expected)
+
+    def _encode_event(self, canonical: bytes, prev: Optional[str]) -> Tuple[bytes, str]:
+        """Build a signed event log line from a canonical artifact."""
+        signature = self.sign_canonical(canonical, prev or "")
+        audit = {
+            "signature": signature,
+            "timestamp": time.time(),
+            "signer": SIGNER_HMAC,
+            "metadata": None
+        }
+        if prev is not None:
+            audit["prev"] = prev
+        line = EVENT_PREFIX + canonical + EVENT_AUDIT_SEP + json.dumps(audit).encode() + b"}\n"
+        return line, signature
+
+    def verify_session(self, session_id: str) -> Dict[str, Any]:
+        """
+        Verify every entry of a session's event log in one streaming pass.
+
+        Checks each signature and, for chained entries, that the entry
+        commits to the signature of the line before it. Memory use is
+        independent of log size.
+
+        Returns:
+            {"ok": True, "events": n} if the log is intact, otherwise
+            {"ok": False, "events": n, "offset": byte offset, "line": line
+            number, "reason": ...} describing the first tampered entry
+        """
+        if self.buffered:
+            self.flush(session_id)
+
+        result: Dict[str, Any] = {"ok": True, "events": 0}
+        prev_signature = ""
+        for line_number, line_offset, raw in self._raw_lines(session_id):
+            if not raw.strip():
+                continue
+
+            signature, reason = self._verify_line(raw.rstrip(b"\r\n"), prev_signature)
+            if reason:
+                result.update(ok=False, offset=line_offset, line=line_number, reason=reason)
+                return result
+
+            prev_signature = signature
+            result["events"] += 1
+
+        return result
+
+    def _raw_lines(self, session_id: str) -> Iterator[Tuple[int, int, bytes]]:
+        """(line number, position, raw line) of every entry in a session's log."""
+        if self.store is not None:
+            for seq, raw in self.store.audit_lines(session_id):
+                yield seq + 1, seq, raw
+            return
+
+        log_file = self._event_log_path(session_id)
+        if not log_file.exists():
+            return
+        offset = 0
+        with open(log_file, "rb") as f:
+            for line_number, raw in enumerate(f, start=1):
+                yield line_number, offset, raw
+                offset += len(raw)
+
+    def _verify_line(self, raw: bytes, prev_signature: str) -> Tuple[str, Optional[str]]:
+        """
+        Verify one event log line.
+
+        Returns:
+            (signature, None) if valid, otherwise (signature, reason)
+        """
+        split = raw.rfind(EVENT_AUDIT_SEP)
+        if raw.startswith(EVENT_PREFIX) and split != -1:
+            # Fast path: MAC the artifact bytes exactly as written
+            try:
+                audit = json.loads(raw[split + len(EVENT_AUDIT_SEP):-1])
+                canonical = raw[len(EVENT_PREFIX):split]
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                audit = None
+            if isinstance(audit, dict) and audit.get("signer") == SIGNER_HMAC:
+                signature = str(audit.get("signature", ""))
+                if "prev" in audit and audit["prev"] != prev_signature:
+                    return signature, "broken hash chain"
+                expected = self.sign_canonical(canonical, audit.get("prev", ""))
+                if not hmac.compare_digest(signature, expected):
+                    return signature, "signature mismatch"
+                return signature, None
+
+        try:
+            state = json.loads(raw)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return "", "unparseable line"
+        if not isinstance(state, dict):
+            return "", "unparseable line"
+
+        signature = str(state.get("_audit", {}).get("signature", ""))
+        if not self.verify_signature(state):
+            return signature, "signature mismatch"
+        return signature, None
 
     def log_event(self,
                   session_id: str,
@@ -86,41 +402,351 @@ class AuditTrail:
             tools_used: List of tools invoked
             skills_applied: List of skills that were applied
         """
-        log_dir = get_data_dir("audit") / session_id
-        log_dir.mkdir(parents=True, exist_ok=True)
-        log_file = log_dir / "events.jsonl"
-
-        entry = {
-            "artifact": {
-                "event_type": event_type,
-                "agent": agent,
-                "phase": phase,
-                "details": details,
-                "tools_used": tools_used or [],
-                "skills_applied": skills_applied or [],
-                "timestamp": time.time()
-            }
+        artifact = {
+            "event_type": event_type,
+            "agent": agent,
+            "phase": phase,
+            "details": details,
+            "tools_used": tools_used or [],
+            "skills_applied": skills_applied or [],
+            "timestamp": time.time()
         }
-        signed = self.attach_signature(entry)
+        item = (json.dumps(artifact, sort_keys=True).encode(), artifact)
+        fsync = self.durability != Durability.NONE
+
+        if not self.buffered:
+            if self.store is not None:
+                _StoreWriter(self.store, session_id).write(self, [item], fsync=fsync)
+                return
+            log_file = self._event_log_path(session_id)
+            log_file.parent.mkdir(parents=True, exist_ok=True)
+            writer = self._writer_for(log_file)
+            with writer.lock:
+                writer.write(self, [item], fsync=fsync)
+                writer.close()
+            return
+
+        writer = self._get_writer(session_id)
+        with writer.lock:
+            writer.pending.append(item)
+            if self.durability == Durability.EVENT or len(writer.pending) >= self.max_batch_size:
+                self._flush_writer(writer)
+
+        self._ensure_flusher()
+
+    def flush(self, session_id: Optional[str] = None) -> None:
+        """
+        Write out buffered events.
 
-        with open(log_file, "a", encoding="utf-8") as f:
-            f.write(json.dumps(signed) + "\n")
+        Args:
+            session_id: Only flush this session (None for all sessions)
+        """
+        with self._writers_lock:
+            if session_id is None:
+                writers = list(self._writers.values())
+            else:
+                key = session_id if self.store is not None else self._session_logs.get(session_id)
+                writer = self._writers.get(str(key)) if key else None
+                writers = [writer] if writer else []
+
+        for writer in writers:
+            with writer.lock:
+                self._flush_writer(writer)
+
+    def close(self) -> None:
+        """Flush all buffered events and release open log handles."""
+        self._closing.set()
+        flusher = self._flusher
+        if flusher is not None and flusher is not threading.current_thread():
+            flusher.join()
+        self._flusher = None
+
+        with self._writers_lock:
+            writers = list(self._writers.values())
+            self._writers.clear()
+            self._session_logs.clear()
+
+        for writer in writers:
+            with writer.lock:
+                self._flush_writer(writer)
+                writer.close()
+
+        self._closing.clear()
+
+    def _flush_writer(self, writer: Union[_SessionWriter, _StoreWriter]) -> None:
+        """Group-commit a writer's pending batch. Caller holds writer.lock."""
+        batch, writer.pending = writer.pending, []
+        writer.write(self, batch, fsync=self.durability != Durability.NONE)
+
+    def _writer_for(self, log_file: Path) -> _SessionWriter:
+        """Get or create the writer for an event log."""
+        key = str(log_file)
+        with self._writers_lock:
+            writer = self._writers.get(key)
+            if writer is None:
+                writer = _SessionWriter(log_file, self._get_index(log_file))
+                self._writers[key] = writer
+            return writer
+
+    def _get_writer(self, session_id: str) -> Union[_SessionWriter, _StoreWriter]:
+        """Get the buffered writer for a session, creating its log directory once."""
+        if self.store is not None:
+            with self._writers_lock:
+                writer = self._writers.get(session_id)
+                if writer is None:
+                    writer = _StoreWriter(self.store, session_id)
+                    self._writers[session_id] = writer
+                return writer
+
+        log_file = self._session_logs.get(session_id)
+        if log_file is None:
+            log_file = self._event_log_path(session_id)
+            log_file.parent.mkdir(parents=True, exist_ok=True)
+            self._session_logs[session_id] = log_file
+        return self._writer_for(log_file)
+
+    def _ensure_flusher(self) -> None:
+        """Start the background flush thread on first buffered write."""
+        if self._flusher is not None:
+            return
+        with self._writers_lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._flush_loop, name="slipstream-audit-flush", daemon=True)
+                self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        """Periodically flush buffered events until close() is called."""
+        while not self._closing.wait(self.flush_interval):
+            self.flush()
 
     def get_session_events(self, session_id: str, limit: int = 100) -> list:
-        """Retrieve events for a session."""
-        log_file = get_data_dir("audit") / session_id / "events.jsonl"
+        """
+        Retrieve the most recent events for a session.
+
+        Reads backward from the end of the log and decodes only the last
+        `limit` lines, so cost does not grow with session length.
+
+        Args:
+            session_id: Session identifier
+            limit: Maximum number of events to return (<= 0 returns all)
+
+        Returns:
+            Events in chronological order (oldest first)
+        """
+        if self.buffered:
+            self.flush(session_id)
+
+        if self.store is not None:
+            if limit <= 0:
+                return list(self.iter_session_events(session_id))
+            return [json.loads(line) for line in self.store.audit_tail(session_id, limit)]
+
+        log_file = self._event_log_path(session_id)
         if not log_file.exists():
             return []
 
+        if limit <= 0:
+            return list(self.iter_session_events(session_id))
+
         events = []
+        for line in read_tail_lines(log_file):
+            try:
+                events.append(json.loads(line))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            if len(events) >= limit:
+                break
+
+        events.reverse()
+        return events
+
+    def iter_session_events(self,
+                            session_id: str,
+                            start: int = 0,
+                            stop: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a range of events for a session, oldest first.
+
+        Lines are decoded lazily, so arbitrarily long logs can be consumed
+        without holding them in memory. Malformed lines are skipped and do
+        not count towards the range.
+
+        Args:
+            session_id: Session identifier
+            start: Index of the first event to yield
+            stop: Index to stop before (None for end of log)
+        """
+        if self.buffered:
+            self.flush(session_id)
+
+        if self.store is not None:
+            for _, line in self.store.audit_lines(session_id, start, stop):
+                yield json.loads(line)
+            return
+
+        log_file = self._event_log_path(session_id)
+        if not log_file.exists():
+            return
+
+        index = 0
         with open(log_file, "r", encoding="utf-8") as f:
             for line in f:
+                if stop is not None and index >= stop:
+                    return
                 try:
-                    events.append(json.loads(line))
+                    event = json.loads(line)
                 except json.JSONDecodeError:
                     continue
+                if index >= start:
+                    yield event
+                index += 1
+
+    def iter_events_after(self, session_id: str, offset: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Stream events that start at or after a byte offset in the log.
+
+        Lets incremental consumers (e.g. summary checkpoints) resume exactly
+        where they stopped without re-reading older events. A trailing line
+        that is still being written is not yielded.
+
+        Args:
+            session_id: Session identifier
+            offset: Byte offset to resume from (a previous end offset); a
+                sequence number with a session store
+
+        Yields:
+            (end_offset, event) where end_offset is the offset just past the
+            event's line
+        """
+        if self.buffered:
+            self.flush(session_id)
+
+        if self.store is not None:
+            for seq, line in self.store.audit_lines(session_id, offset):
+                yield seq + 1, json.loads(line)
+            return
+
+        log_file = self._event_log_path(session_id)
+        if not log_file.exists():
+            return
+
+        position = offset
+        with open(log_file, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    return
+                position += len(raw)
+                try:
+                    event = json.loads(raw)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                yield position, event
+
+    def query_events(self,
+                     session_id: str,
+                     event_type: Optional[str] = None,
+                     agent: Optional[str] = None,
+                     phase: Optional[str] = None,
+                     since: Optional[float] = None,
+                     until: Optional[float] = None,
+                     limit: Optional[int] = None) -> list:
+        """
+        Retrieve events matching the given filters via the sidecar index.
 
-        return events[-limit:]
+        Only the matching lines are read from the log.
+
+        Args:
+            session_id: Session identifier
+            event_type: Only events of this type
+            agent: Only events from this persona/agent
+            phase: Only events from this workflow phase
+            since: Only events with timestamp >= since
+            until: Only events with timestamp <= until
+            limit: Return at most this many of the most recent matches
+
+        Returns:
+            Matching events in chronological order
+        """
+        if self.store is not None:
+            if self.buffered:
+                self.flush(session_id)
+            lines = self.store.audit_query(session_id, event_type=event_type, agent=agent,
+                                           phase=phase, since=since, until=until, limit=limit)
+            return [json.loads(line) for line in lines]
+
+        index = self._synced_index(session_id)
+        if index is None:
+            return []
+
+        records = index.query(event_type=event_type, agent=agent, phase=phase,
+                              since=since, until=until)
+        if limit is not None:
+            records = records[-limit:] if limit > 0 else []
+        return index.read_events(records)
+
+    def get_event(self, session_id: str, seq: int) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a single event by sequence number (0 = first event).
+
+        Args:
+            session_id: Session identifier
+            seq: Position of the event in the log, skipping malformed lines
+        """
+        if self.store is not None:
+            if self.buffered:
+                self.flush(session_id)
+            lines = [line for _, line in self.store.audit_lines(session_id, seq, seq + 1)] if seq >= 0 else []
+            return json.loads(lines[0]) if lines else None
+
+        index = self._synced_index(session_id)
+        if index is None or seq < 0:
+            return None
+
+        events = index.read_events(list(index.records(seq, seq + 1)))
+        return events[0] if events else None
+
+    def count_events(self, session_id: str) -> int:
+        """Number of events logged for a session."""
+        if self.store is not None:
+            if self.buffered:
+                self.flush(session_id)
+            return self.store.audit_count(session_id)
+        index = self._synced_index(session_id)
+        return len(index) if index is not None else 0
+
+    def _event_log_path(self, session_id: str) -> Path:
+        """Path of the JSONL event log for a session."""
+        return get_data_dir("audit") / session_id / "events.jsonl"
+
+    def _log_lock(self, log_file: Path):
+        """Cross-process lock guarding an event log and its index, if enabled."""
+        if not self.process_safe:
+            return nullcontext()
+        return file_lock(log_file.with_suffix(".lock"))
+
+    def _get_index(self, log_file: Path) -> AuditIndex:
+        """Get the cached sidecar index for an event log."""
+        key = str(log_file)
+        index = self._indexes.get(key)
+        if index is None:
+            index = AuditIndex(log_file)
+            self._indexes[key] = index
+        return index
+
+    def _synced_index(self, session_id: str) -> Optional[AuditIndex]:
+        """Get the session index brought up to date with the log, if any."""
+        if self.buffered:
+            self.flush(session_id)
+
+        log_file = self._event_log_path(session_id)
+        if not log_file.exists():
+            return None
+        index = self._get_index(log_file)
+        with self._log_lock(log_file):
+            index.sync()
+        return index
 
 
 # Module-level singleton
@@ -0,0 +1,353 @@
+"""
+Slipstream Audit Index
+
+Compact binary sidecar index for audit event logs.
+
+Each session's events.jsonl gets an events.idx file next to it, holding one
+fixed-size record per event:
+
+    (byte offset, line length, timestamp, event_type id, agent id, phase id)
+
+String fields are interned in an append-only symbol table (events.idx.names,
+one JSON string per line) so records stay fixed-width. Queries mmap the index,
+filter records without touching the log, then seek straight to the matching
+lines.
+
+The index header stores the log offset it covers, plus the length and CRC-32
+of the last line before that offset. If the log has grown past it the index
+catches up incrementally; if the log shrank or that line no longer matches
+(the log was replaced) the index is rebuilt from scratch. A missing index is
+rebuilt on first use.
+"""
+
+import json
+import mmap
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, NamedTuple, Optional, Tuple
+
+INDEX_MAGIC = b"SLIX"
+INDEX_VERSION = 2
+
+# magic, version, bytes of the log covered by the index,
+# length and CRC-32 of the last covered line
+HEADER = struct.Struct("<4sIQII")
+# offset, length, timestamp, event_type id, agent id, phase id
+RECORD = struct.Struct("<QIdIII")
+
+
+class IndexRecord(NamedTuple):
+    """A single decoded index record."""
+    seq: int
+    offset: int
+    length: int
+    timestamp: float
+    event_type: int
+    agent: int
+    phase: int
+
+
+class AuditIndex:
+    """
+    Sidecar offset index for a single session event log.
+
+    Usage:
+        index = AuditIndex(log_dir / "events.jsonl")
+        for record in index.query(agent="producer", since=time.time() - 3600):
+            ...
+        events = index.read_events(records)
+    """
+
+    def __init__(self, log_file: Path):
+        self.log_file = Path(log_file)
+        self.index_file = self.log_file.with_suffix(".idx")
+        self.names_file = self.log_file.with_suffix(".idx.names")
+
+        self._names: Dict[str, int] = {}
+        self._name_list: List[str] = []
+        self._names_size = 0
+
+    # ------------------------------------------------------------------
+    # Symbol table
+    # ------------------------------------------------------------------
+
+    def _load_names(self) -> None:
+        """Load any symbol table entries appended since the last load."""
+        if not self.names_file.exists():
+            self._names = {}
+            self._name_list = []
+            self._names_size = 0
+            return
+
+        size = self.names_file.stat().st_size
+        if size == self._names_size:
+            return
+        if size < self._names_size:
+            self._names = {}
+            self._name_list = []
+            self._names_size = 0
+
+        with open(self.names_file, "rb") as f:
+            f.seek(self._names_size)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                name = json.loads(raw)
+                self._names[name] = len(self._name_list)
+                self._name_list.append(name)
+                self._names_size += len(raw)
+
+    def _intern(self, name: str, pending: List[str]) -> int:
+        """Return the id for name, queueing it for persistence if new."""
+        name_id = self._names.get(name)
+        if name_id is None:
+            name_id = len(self._name_list)
+            self._names[name] = name_id
+            self._name_list.append(name)
+            pending.append(name)
+        return name_id
+
+    def _flush_names(self, pending: List[str]) -> None:
+        """Persist newly interned names."""
+        if not pending:
+            return
+        data = "".join(json.dumps(name) + "\n" for name in pending).encode("utf-8")
+        with open(self.names_file, "ab") as f:
+            f.write(data)
+        self._names_size += len(data)
+
+    def name_of(self, name_id: int) -> Optional[str]:
+        """Resolve a symbol id back to its string."""
+        if 0 <= name_id < len(self._name_list):
+            return self._name_list[name_id]
+        return None
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+
+    def _read_header(self) -> Optional[Tuple[int, int, int]]:
+        """
+        Return (log offset covered, last line length, last line CRC-32), or
+        None if the index is missing or unreadable.
+
+        The index is only opened for writing to recover from a crash, when
+        records past the committed header have to be trimmed.
+        """
+        try:
+            with open(self.index_file, "rb") as f:
+                raw = f.read(HEADER.size)
+                if len(raw) < HEADER.size:
+                    return None
+                magic, version, indexed_end, tail_length, tail_crc = HEADER.unpack(raw)
+                if magic != INDEX_MAGIC or version != INDEX_VERSION:
+                    return None
+                size = os.fstat(f.fileno()).st_size
+                count = (size - HEADER.size) // RECORD.size
+                if count > 0:
+                    f.seek(HEADER.size + (count - 1) * RECORD.size)
+                    offset, length = RECORD.unpack(f.read(RECORD.size))[:2]
+                    torn = offset + length > indexed_end
+                else:
+                    torn = False
+        except FileNotFoundError:
+            return None
+
+        if torn or size != HEADER.size + count * RECORD.size:
+            self._trim(indexed_end)
+        return indexed_end, tail_length, tail_crc
+
+    def _trim(self, indexed_end: int) -> None:
+        """Drop torn or uncommitted records (written before a crash but
+        before the header was advanced past them)."""
+        with open(self.index_file, "r+b") as f:
+            f.seek(0, os.SEEK_END)
+            count = (f.tell() - HEADER.size) // RECORD.size
+            while count > 0:
+                f.seek(HEADER.size + (count - 1) * RECORD.size)
+                offset, length = RECORD.unpack(f.read(RECORD.size))[:2]
+                if offset + length <= indexed_end:
+                    break
+                count -= 1
+            f.truncate(HEADER.size + count * RECORD.size)
+
+    def _is_consistent(self, header: Tuple[int, int, int], log_size: int) -> bool:
+        """Check the index still describes a prefix of the log."""
+        indexed_end, tail_length, tail_crc = header
+        if indexed_end > log_size or tail_length > indexed_end:
+            return False
+        if indexed_end == 0:
+            return True
+        with open(self.log_file, "rb") as f:
+            f.seek(indexed_end - tail_length)
+            return zlib.crc32(f.read(tail_length)) == tail_crc
+
+    def _write_records(self, records: List[bytes], indexed_end: int, tail: bytes) -> None:
+        """Append records, then advance the header to commit them."""
+        with open(self.index_file, "r+b") as f:
+            if records:
+                f.seek(0, os.SEEK_END)
+                f.write(b"".join(records))
+            f.seek(0)
+            f.write(HEADER.pack(INDEX_MAGIC, INDEX_VERSION, indexed_end, len(tail), zlib.crc32(tail)))
+
+    def _pack(self, offset: int, length: int, artifact: Dict[str, Any], pending: List[str]) -> bytes:
+        """Build the binary record for one event."""
+        return RECORD.pack(
+            offset,
+            length,
+            float(artifact.get("timestamp") or 0.0),
+            self._intern(str(artifact.get("event_type", "")), pending),
+            self._intern(str(artifact.get("agent", "")), pending),
+            self._intern(str(artifact.get("phase", "")), pending),
+        )
+
+    def _index_from(self, start: int) -> None:
+        """Index every complete log line from byte offset `start` onward."""
+        self._load_names()
+        pending: List[str] = []
+        records: List[bytes] = []
+        position = start
+        tail = b""
+
+        with open(self.log_file, "rb") as f:
+            f.seek(start)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # Partially written line; pick it up next sync
+                offset = position
+                position += len(raw)
+                tail = raw
+                try:
+                    artifact = json.loads(raw).get("artifact", {})
+                except (json.JSONDecodeError, UnicodeDecodeError, AttributeError):
+                    continue
+                records.append(self._pack(offset, len(raw), artifact, pending))
+
+        if position == start:
+            return
+        self._flush_names(pending)
+        self._write_records(records, position, tail)
+
+    def rebuild(self) -> None:
+        """Discard the index and regenerate it from the log."""
+        self._names = {}
+        self._name_list = []
+        self._names_size = 0
+        self.names_file.write_bytes(b"")
+        self.index_file.write_bytes(HEADER.pack(INDEX_MAGIC, INDEX_VERSION, 0, 0, zlib.crc32(b"")))
+        if self.log_file.exists():
+            self._index_from(0)
+
+    def sync(self) -> None:
+        """Bring the index up to date with the log, rebuilding if stale."""
+        log_size = self.log_file.stat().st_size if self.log_file.exists() else 0
+        header = self._read_header()
+
+        if header is None or not self._is_consistent(header, log_size):
+            self.rebuild()
+        elif header[0] < log_size:
+            self._index_from(header[0])
+        else:
+            self._load_names()
+
+    def append(self, offset: int, length: int, artifact: Dict[str, Any]) -> None:
+        """Index a line that was just appended to the log."""
+        self.append_many([(offset, length, artifact)])
+
+    def append_many(self, entries: List[Tuple[int, int, Dict[str, Any]]],
+                    tail: Optional[bytes] = None) -> None:
+        """
+        Index a contiguous run of lines that were just appended to the log.
+
+        Args:
+            entries: (offset, length, artifact) per line, in log order
+            tail: Bytes of the last line (read back from the log if None)
+
+        Falls back to an incremental sync if the index does not end exactly
+        where the first new line starts (e.g. another writer got there first).
+        """
+        if not entries:
+            return
+
+        header = self._read_header()
+        if header is None or header[0] != entries[0][0]:
+            self.sync()
+            return
+
+        self._load_names()
+        pending: List[str] = []
+        records = [self._pack(offset, length, artifact, pending)
+                   for offset, length, artifact in entries]
+        self._flush_names(pending)
+        last_offset, last_length = entries[-1][:2]
+        if tail is None:
+            with open(self.log_file, "rb") as f:
+                f.seek(last_offset)
+                tail = f.read(last_length)
+        self._write_records(records, last_offset + last_length, tail)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        if not self.index_file.exists():
+            return 0
+        return (self.index_file.stat().st_size - HEADER.size) // RECORD.size
+
+    def records(self, start: int = 0, stop: Optional[int] = None) -> Iterator[IndexRecord]:
+        """Iterate index records by sequence number via mmap."""
+        with open(self.index_file, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            count = (size - HEADER.size) // RECORD.size
+            stop = count if stop is None else min(stop, count)
+            if start >= stop:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for seq in range(start, stop):
+                    yield IndexRecord(seq, *RECORD.unpack_from(mm, HEADER.size + seq * RECORD.size))
+
+    def query(self,
+              event_type: Optional[str] = None,
+              agent: Optional[str] = None,
+              phase: Optional[str] = None,
+              since: Optional[float] = None,
+              until: Optional[float] = None) -> List[IndexRecord]:
+        """
+        Find records matching all given filters.
+
+        Filters compare against interned ids, so no log lines are decoded.
+        """
+        filters = []
+        for field, value in (("event_type", event_type), ("agent", agent), ("phase", phase)):
+            if value is None:
+                continue
+            name_id = self._names.get(value)
+            if name_id is None:
+                return []
+            filters.append((field, name_id))
+
+        matches = []
+        for record in self.records():
+            if since is not None and record.timestamp < since:
+                continue
+            if until is not None and record.timestamp > until:
+                continue
+            if all(getattr(record, field) == name_id for field, name_id in filters):
+                matches.append(record)
+        return matches
+
+    def read_events(self, records: List[IndexRecord]) -> List[Dict[str, Any]]:
+        """Load the log lines referenced by the given records."""
+        events = []
+        with open(self.log_file, "rb") as f:
+            for record in records:
+                f.seek(record.offset)
+                try:
+                    events.append(json.loads(f.read(record.length)))
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+        return events
@@ -15,18 +15,43 @@ Transitions:
     HALF_OPEN -> OPEN: 3+ turns without progress
     OPEN -> CLOSED: Manual reset only
 
+Configuration:
+    rules.yaml circuit_breaker.thresholds sets the turn counts above and
+    circuit_breaker.progress_indicators lists what counts as progress, as
+    simple comparisons on TurnResult fields or metrics:
+
+        artifacts_produced > 0
+        plan_updated == true
+
+    Indicators are compiled once into predicates (no eval); a turn made
+    progress if any of them holds.
+
+Persistence:
+    state.json     - Current state, rewritten only when it changed
+    history.jsonl  - Append-only transition journal, read from the tail
+    (or rows of the shared SessionStore with the sqlite storage backend)
+
 Adapted from CLOCKWORK-CORE.
 """
 
+import atexit
 import json
 import hashlib
+import operator
+import os
+import re
+import time
+import weakref
 from datetime import datetime
 from enum import Enum
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any
-from dataclasses import dataclass, asdict
+from typing import Optional, Dict, Any, Callable, Iterable, Tuple
+from dataclasses import dataclass, asdict, field
 
-from .io import get_data_dir
+from .io import atomic_write_json, get_data_dir, read_tail_lines
+from .rules import get_rules_section
+from .session_store import SessionStore, get_session_store
 
 
 class CircuitState(str, Enum):
@@ -57,6 +82,17 @@ class CircuitBreakerState:
         return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__})
 
 
+# Live breakers with coalesced writes, flushed by one atexit hook
+_coalescing: "weakref.WeakSet[CircuitBreaker]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_on_exit() -> None:
+    """atexit hook: persist the coalesced state of every breaker still alive."""
+    for breaker in list(_coalescing):
+        breaker.flush()
+
+
 @dataclass
 class TurnResult:
     """Result of a single agent turn"""
@@ -65,6 +101,218 @@ class TurnResult:
     has_errors: bool = False
     error_signature: Optional[str] = None
     new_information: bool = False
+    metrics: Dict[str, Any] = field(default_factory=dict)   # e.g. research_citations_added
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """A named field, or else a metric."""
+        if name in _TURN_FIELDS:
+            return getattr(self, name)
+        return self.metrics.get(name, default)
+
+
+_TURN_FIELDS = frozenset(TurnResult.__dataclass_fields__) - {"metrics"}
+
+ProgressPredicate = Callable[[TurnResult], bool]
+
+DEFAULT_PROGRESS_INDICATORS = ("artifacts_produced > 0", "new_information == true")
+
+_INDICATOR = re.compile(r"^\s*([A-Za-z_]\w*)\s*(==|!=|>=|<=|>|<)\s*(.+?)\s*$")
+_COMPARISONS = {
+    "==": operator.eq, "!=": operator.ne,
+    ">=": operator.ge, "<=": operator.le,
+    ">": operator.gt, "<": operator.lt,
+}
+_LITERALS = {"true": True, "false": False, "null": None, "none": None}
+
+
+def _parse_literal(text: str) -> Any:
+    if text.lower() in _LITERALS:
+        return _LITERALS[text.lower()]
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "'\"":
+        return text[1:-1]
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"Unsupported value in progress indicator: {text!r}") from None
+
+
+def compile_indicator(expression: str) -> ProgressPredicate:
+    """
+    Compile one progress indicator ("name <op> literal") into a predicate.
+
+    `name` is a TurnResult field or a key of TurnResult.metrics (a missing
+    metric never matches); literals are numbers, quoted strings, true,
+    false and null.
+
+    Raises:
+        ValueError: If the expression is not a supported comparison
+    """
+    match = _INDICATOR.match(expression)
+    if not match:
+        raise ValueError(f"Invalid progress indicator: {expression!r}")
+    name, op, literal = match.groups()
+    compare = _COMPARISONS[op]
+    expected = _parse_literal(literal)
+
+    if name in _TURN_FIELDS:
+        read = operator.attrgetter(name)
+    else:
+        def read(result: TurnResult) -> Any:
+            return result.metrics.get(name)
+
+    def predicate(result: TurnResult) -> bool:
+        value = read(result)
+        if value is None and expected is not None:
+            return False
+        try:
+            return bool(compare(value, expected))
+        except TypeError:
+            return False   # e.g. a string metric compared with a number
+
+    predicate.__name__ = predicate.__qualname__ = f"indicator[{expression.strip()}]"
+    return predicate
+
+
+@lru_cache(maxsize=64)
+def _compile_indicators(indicators: Tuple[str, ...]) -> ProgressPredicate:
+    predicates = tuple(compile_indicator(expression) for expression in indicators)
+    if len(predicates) == 1:
+        return predicates[0]
+
+    def has_progress(result: TurnResult) -> bool:
+        for predicate in predicates:
+            if predicate(result):
+                return True
+        return False
+    return has_progress
+
+
+def compile_progress(indicators: Iterable[str]) -> ProgressPredicate:
+    """
+    Compile progress indicators into one predicate (true if any holds).
+
+    Compiled predicates are cached by indicator list, so breakers sharing
+    a configuration share the compiled form.
+    """
+    indicators = tuple(indicators)
+    if not indicators:
+        raise ValueError("At least one progress indicator is required")
+    return _compile_indicators(indicators)
+
+
+@dataclass(frozen=True)
+class BreakerConfig:
+    """Thresholds and progress test shared by CircuitBreaker and CircuitBreakerPool."""
+    no_progress_threshold: int = 3      # Open circuit after N turns with no progress
+    same_error_threshold: int = 5       # Open circuit after N turns with same error
+    half_open_threshold: int = 2        # Enter monitoring after N turns without progress
+    progress_indicators: Tuple[str, ...] = DEFAULT_PROGRESS_INDICATORS
+
+    @property
+    def is_progress(self) -> ProgressPredicate:
+        return compile_progress(self.progress_indicators)
+
+    @classmethod
+    def from_rules(cls,
+                   thresholds: Optional[Dict[str, int]] = None,
+                   progress_indicators: Optional[Iterable[str]] = None) -> "BreakerConfig":
+        """
+        Build from rules.yaml circuit_breaker, with optional overrides.
+
+        Args:
+            thresholds: Overrides rules.yaml thresholds (no_progress_turns,
+                same_error_turns, half_open_threshold)
+            progress_indicators: Overrides rules.yaml progress_indicators
+        """
+        rules = get_rules_section("circuit_breaker")
+        merged = dict(rules.get("thresholds") or {})
+        merged.update({k: v for k, v in (thresholds or {}).items() if v is not None})
+        indicators = progress_indicators or rules.get("progress_indicators") or DEFAULT_PROGRESS_INDICATORS
+
+        config = cls(
+            no_progress_threshold=int(merged.get("no_progress_turns", cls.no_progress_threshold)),
+            same_error_threshold=int(merged.get("same_error_turns", cls.same_error_threshold)),
+            half_open_threshold=int(merged.get("half_open_threshold", cls.half_open_threshold)),
+            progress_indicators=tuple(str(i) for i in indicators),
+        )
+        config.is_progress  # Validate the indicators now, not on the first turn
+        return config
+
+
+def advance_state(state: Any,
+                  result: TurnResult,
+                  no_progress_threshold: int,
+                  same_error_threshold: int,
+                  half_open_threshold: int,
+                  is_progress: Optional[ProgressPredicate] = None) -> Tuple[CircuitState, CircuitState, str]:
+    """
+    Apply one turn result to a breaker state in place.
+
+    Shared by CircuitBreaker and CircuitBreakerPool. `state` is any object
+    with the CircuitBreakerState fields; `is_progress` is a compiled
+    progress predicate (defaults to DEFAULT_PROGRESS_INDICATORS).
+
+    Returns:
+        (previous state, new state, transition reason)
+    """
+    current_state = CircuitState(state.state)
+    new_state = current_state
+    reason = ""
+
+    # Detect progress
+    if is_progress is None:
+        is_progress = compile_progress(DEFAULT_PROGRESS_INDICATORS)
+    has_progress = is_progress(result)
+
+    if has_progress:
+        state.consecutive_no_progress = 0
+        state.last_progress_turn = result.turn_number
+    else:
+        state.consecutive_no_progress += 1
+
+    # Detect error repetition
+    if result.has_errors:
+        state.consecutive_same_error += 1
+    else:
+        state.consecutive_same_error = 0
+
+    state.current_turn = result.turn_number
+
+    # State transitions
+    if current_state == CircuitState.CLOSED:
+        if state.consecutive_no_progress >= no_progress_threshold:
+            new_state = CircuitState.OPEN
+            reason = f"No progress in {state.consecutive_no_progress} consecutive turns"
+        elif state.consecutive_same_error >= same_error_threshold:
+            new_state = CircuitState.OPEN
+            reason = f"Same error repeated {state.consecutive_same_error} times"
+        elif state.consecutive_no_progress >= half_open_threshold:
+            new_state = CircuitState.HALF_OPEN
+            reason = f"Monitoring: {state.consecutive_no_progress} turns without progress"
+
+    elif current_state == CircuitState.HALF_OPEN:
+        if has_progress:
+            new_state = CircuitState.CLOSED
+            reason = "Progress detected, circuit recovered"
+        elif state.consecutive_no_progress >= no_progress_threshold:
+            new_state = CircuitState.OPEN
+            reason = f"No recovery after {state.consecutive_no_progress} turns"
+
+    # Track opens
+    if new_state == CircuitState.OPEN and current_state != CircuitState.OPEN:
+        state.total_opens += 1
+
+    # Update state
+    if new_state != current_state:
+        state.state = new_state.value
+        state.last_change = datetime.now().isoformat()
+        state.reason = reason
+
+    return current_state, new_state, reason
 
 
 class CircuitBreaker:
@@ -87,31 +335,80 @@ class CircuitBreaker:
             print("Circuit breaker tripped!")
     """
 
-    # Configuration thresholds
-    NO_PROGRESS_THRESHOLD = 3    # Open circuit after N turns with no progress
-    SAME_ERROR_THRESHOLD = 5     # Open circuit after N turns with same error
-    HALF_OPEN_THRESHOLD = 2      # Enter monitoring after N turns without progress
-
-    def __init__(self, session_id: str = "default", data_dir: Path = None):
-        """Initialize circuit breaker with persistent storage."""
+    # Default thresholds (rules.yaml circuit_breaker.thresholds overrides them)
+    NO_PROGRESS_THRESHOLD = BreakerConfig.no_progress_threshold
+    SAME_ERROR_THRESHOLD = BreakerConfig.same_error_threshold
+    HALF_OPEN_THRESHOLD = BreakerConfig.half_open_threshold
+
+    def __init__(self,
+                 session_id: str = "default",
+                 data_dir: Path = None,
+                 coalesce_seconds: float = 0.0,
+                 thresholds: Optional[Dict[str, int]] = None,
+                 progress_indicators: Optional[Iterable[str]] = None,
+                 store: Optional[SessionStore] = None):
+        """
+        Initialize circuit breaker with persistent storage.
+
+        Args:
+            session_id: Session identifier for isolation
+            data_dir: Directory for persistent storage
+            coalesce_seconds: Batch state writes for turns that do not
+                change the circuit state, writing at most once per interval
+                (0 writes every change). State transitions, resets and
+                flush() always write immediately.
+            thresholds: Overrides rules.yaml thresholds (no_progress_turns,
+                same_error_turns, half_open_threshold)
+            progress_indicators: Overrides rules.yaml progress_indicators
+            store: Session store to persist to instead of JSON files
+                (defaults to the configured storage backend unless data_dir
+                is given)
+        """
+        config = BreakerConfig.from_rules(thresholds, progress_indicators)
+        self.NO_PROGRESS_THRESHOLD = config.no_progress_threshold
+        self.SAME_ERROR_THRESHOLD = config.same_error_threshold
+        self.HALF_OPEN_THRESHOLD = config.half_open_threshold
+        self.is_progress = config.is_progress
+
+        self.session_id = session_id
+        self.store = store if store is not None else get_session_store(data_dir)
         if data_dir is None:
             data_dir = get_data_dir("circuit_breaker")
 
         self.data_dir = Path(data_dir) / session_id
-        self.data_dir.mkdir(parents=True, exist_ok=True)
+        if self.store is None:
+            self.data_dir.mkdir(parents=True, exist_ok=True)
 
         self.state_file = self.data_dir / "state.json"
-        self.history_file = self.data_dir / "history.json"
+        self.history_file = self.data_dir / "history.jsonl"
+        self.coalesce_seconds = coalesce_seconds
+
+        self._saved: Optional[Dict[str, Any]] = None
+        self._last_save = 0.0
 
         self._init_state()
+        if self.store is None:
+            self._migrate_history()
+
+        if coalesce_seconds > 0:
+            _coalescing.add(self)
 
     def _init_state(self):
         """Initialize or load state from disk."""
-        if self.state_file.exists():
+        if self.store is not None:
+            data = self.store.load_breaker(self.session_id)
+            if data is None:
+                self._state = CircuitBreakerState(last_change=self._timestamp())
+                self._save_state()
+            else:
+                self._state = CircuitBreakerState.from_dict(data)
+                self._saved = self._state.to_dict()
+        elif self.state_file.exists():
             try:
                 with open(self.state_file, 'r') as f:
                     data = json.load(f)
                     self._state = CircuitBreakerState.from_dict(data)
+                    self._saved = self._state.to_dict()
             except (json.JSONDecodeError, KeyError):
                 self._state = CircuitBreakerState(last_change=self._timestamp())
                 self._save_state()
@@ -119,37 +416,84 @@ class CircuitBreaker:
             self._state = CircuitBreakerState(last_change=self._timestamp())
             self._save_state()
 
-        if not self.history_file.exists():
-            with open(self.history_file, 'w') as f:
-                json.dump([], f)
+    def _migrate_history(self):
+        """
+        Convert a legacy history.json array into the JSONL journal once.
+
+        Legacy entries predate anything in history.jsonl, so they go first;
+        a journal that already starts with them (a migration interrupted
+        before the unlink) is left as is.
+        """
+        legacy = self.data_dir / "history.json"
+        if not legacy.exists():
+            return
+        try:
+            with open(legacy, 'r') as f:
+                history = json.load(f)
+        except json.JSONDecodeError:
+            history = []
+        migrated = "".join(json.dumps(entry) + "\n" for entry in history or [])
+        try:
+            journal = self.history_file.read_text(encoding='utf-8')
+        except FileNotFoundError:
+            journal = ""
+        if migrated and not journal.startswith(migrated):
+            tmp_path = self.history_file.with_name(f".{self.history_file.name}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(migrated + journal)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.history_file)
+        legacy.unlink()
+
+    @property
+    def dirty(self) -> bool:
+        """True if the in-memory state differs from state.json."""
+        return self._state.to_dict() != self._saved
+
+    def _save_state(self, force: bool = True):
+        """
+        Persist state to disk if it changed.
+
+        Args:
+            force: Write now; otherwise writes are coalesced to at most one
+                per coalesce_seconds
+        """
+        data = self._state.to_dict()
+        if data == self._saved:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_save < self.coalesce_seconds:
+            return
+        if self.store is not None:
+            self.store.save_breaker(self.session_id, data)
+        else:
+            atomic_write_json(self.state_file, data, compact=True)
+        self._saved = data
+        self._last_save = now
 
-    def _save_state(self):
-        """Persist state to disk."""
-        with open(self.state_file, 'w') as f:
-            json.dump(self._state.to_dict(), f, indent=2)
+    def flush(self) -> None:
+        """Write any coalesced state changes now."""
+        self._save_state()
 
     def _timestamp(self) -> str:
         """ISO format timestamp."""
         return datetime.now().isoformat()
 
     def _log_transition(self, from_state: str, to_state: str, reason: str, turn_number: int):
-        """Log state transition to history file."""
-        try:
-            with open(self.history_file, 'r') as f:
-                history = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            history = []
-
-        history.append({
+        """Append a state transition to the history journal."""
+        entry = {
             "timestamp": self._timestamp(),
             "turn": turn_number,
             "from_state": from_state,
             "to_state": to_state,
             "reason": reason
-        })
-
-        with open(self.history_file, 'w') as f:
-            json.dump(history, f, indent=2)
+        }
+        if self.store is not None:
+            self.store.append_breaker_history(self.session_id, [entry])
+            return
+        with open(self.history_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
 
     @property
     def state(self) -> CircuitState:
@@ -181,59 +525,18 @@ class CircuitBreaker:
         if context:
             self._state.context_hash = hashlib.sha256(context.encode()).hexdigest()
 
-        current_state = self.state
-        new_state = current_state
-        reason = ""
-
-        # Detect progress
-        has_progress = result.artifacts_produced > 0 or result.new_information
-
-        if has_progress:
-            self._state.consecutive_no_progress = 0
-            self._state.last_progress_turn = result.turn_number
-        else:
-            self._state.consecutive_no_progress += 1
-
-        # Detect error repetition
-        if result.has_errors:
-            self._state.consecutive_same_error += 1
-        else:
-            self._state.consecutive_same_error = 0
-
-        self._state.current_turn = result.turn_number
-
-        # State transitions
-        if current_state == CircuitState.CLOSED:
-            if self._state.consecutive_no_progress >= self.NO_PROGRESS_THRESHOLD:
-                new_state = CircuitState.OPEN
-                reason = f"No progress in {self._state.consecutive_no_progress} consecutive turns"
-            elif self._state.consecutive_same_error >= self.SAME_ERROR_THRESHOLD:
-                new_state = CircuitState.OPEN
-                reason = f"Same error repeated {self._state.consecutive_same_error} times"
-            elif self._state.consecutive_no_progress >= self.HALF_OPEN_THRESHOLD:
-                new_state = CircuitState.HALF_OPEN
-                reason = f"Monitoring: {self._state.consecutive_no_progress} turns without progress"
-
-        elif current_state == CircuitState.HALF_OPEN:
-            if has_progress:
-                new_state = CircuitState.CLOSED
-                reason = "Progress detected, circuit recovered"
-            elif self._state.consecutive_no_progress >= self.NO_PROGRESS_THRESHOLD:
-                new_state = CircuitState.OPEN
-                reason = f"No recovery after {self._state.consecutive_no_progress} turns"
-
-        # Track opens
-        if new_state == CircuitState.OPEN and current_state != CircuitState.OPEN:
-            self._state.total_opens += 1
-
-        # Update state
+        current_state, new_state, reason = advance_state(
+            self._state, result,
+            no_progress_threshold=self.NO_PROGRESS_THRESHOLD,
+            same_error_threshold=self.SAME_ERROR_THRESHOLD,
+            half_open_threshold=self.HALF_OPEN_THRESHOLD,
+            is_progress=self.is_progress,
+        )
         if new_state != current_state:
-            self._state.state = new_state.value
-            self._state.last_change = self._timestamp()
-            self._state.reason = reason
             self._log_transition(current_state.value, new_state.value, reason, result.turn_number)
 
-        self._save_state()
+        # Transitions are written at once; counter-only updates may be coalesced
+        self._save_state(force=new_state != current_state)
 
         return new_state != CircuitState.OPEN
 
@@ -266,10 +569,21 @@ class CircuitBreaker:
         }
 
     def get_history(self, limit: int = 10) -> list:
-        """Get recent state transitions."""
-        try:
-            with open(self.history_file, 'r') as f:
-                history = json.load(f)
-            return history[-limit:]
-        except (json.JSONDecodeError, FileNotFoundError):
+        """Get recent state transitions, oldest first (read from the journal tail)."""
+        if limit <= 0:
+            return []
+        if self.store is not None:
+            return self.store.breaker_history(self.session_id, limit)
+        if not self.history_file.exists():
             return []
+
+        history = []
+        for line in read_tail_lines(self.history_file):
+            try:
+                history.append(json.loads(line))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue  # Torn final line
+            if len(history) >= limit:
+                break
+        history.reverse()
+        return history
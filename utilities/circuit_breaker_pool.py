@@ -0,0 +1,356 @@
+"""
+Slipstream Circuit Breaker Pool
+
+One in-memory manager for the circuit breakers of many sessions.
+
+Building a CircuitBreaker per call costs a mkdir, a state.json read and
+possibly a write for every turn. An orchestrator supervising hundreds of
+sessions instead keeps one pool: states live in compact slotted records,
+turns are applied in memory with the same state machine as CircuitBreaker,
+and dirty records are snapshotted to disk in batches. The on-disk layout
+(state.json, history.jsonl per session) is the one CircuitBreaker uses, so
+either can pick up a session the other wrote; with the sqlite storage
+backend each batch is one SessionStore transaction instead. A session's
+record is loaded once and then owned by the pool, so do not drive the same
+session through a CircuitBreaker while a pool holds it.
+
+Sessions are indexed by state, so "which sessions are OPEN / HALF_OPEN"
+is answered from a set instead of a scan over every session.
+
+Usage:
+    pool = CircuitBreakerPool()
+
+    if pool.can_execute("session-17"):
+        ...
+        pool.record_turn_result("session-17", TurnResult(turn_number=4, new_information=True))
+
+    pool.sessions_in(CircuitState.OPEN, CircuitState.HALF_OPEN)
+    pool.flush()    # Also runs every flush_interval seconds (background thread) and at exit
+"""
+
+import atexit
+import hashlib
+import json
+import threading
+import weakref
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+from .circuit_breaker import (BreakerConfig, CircuitBreakerState, CircuitState,
+                              TurnResult, advance_state)
+from .io import atomic_write_json, get_data_dir
+from .session_store import SessionStore, get_session_store
+
+
+class _BreakerRecord:
+    """Compact in-memory breaker state (CircuitBreakerState fields)."""
+    __slots__ = ("state", "last_change", "consecutive_no_progress", "consecutive_same_error",
+                 "last_progress_turn", "total_opens", "reason", "current_turn", "context_hash")
+
+    def __init__(self, data: Dict[str, Any]):
+        defaults = CircuitBreakerState().to_dict()
+        for name in self.__slots__:
+            setattr(self, name, data.get(name, defaults[name]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _flush_on_exit(pool_ref: "weakref.ref") -> None:
+    """atexit hook: write dirty records if the pool is still alive."""
+    pool = pool_ref()
+    if pool is not None:
+        pool.flush()
+
+
+class CircuitBreakerPool:
+    """Circuit breakers for many sessions, persisted in batches."""
+
+    def __init__(self,
+                 data_dir: Path = None,
+                 flush_interval: float = 1.0,
+                 max_dirty: int = 1000,
+                 thresholds: Optional[Dict[str, int]] = None,
+                 progress_indicators: Optional[Iterable[str]] = None,
+                 store: Optional[SessionStore] = None):
+        """
+        Initialize pool.
+
+        Args:
+            data_dir: Directory for persistent storage (same as CircuitBreaker)
+            flush_interval: Seconds between automatic batch snapshots
+                (0 snapshots on every call)
+            max_dirty: Snapshot as soon as this many sessions are dirty
+            thresholds: Overrides rules.yaml thresholds (no_progress_turns,
+                same_error_turns, half_open_threshold)
+            progress_indicators: Overrides rules.yaml progress_indicators
+            store: Session store to persist to instead of JSON files
+                (defaults to the configured storage backend unless data_dir
+                is given)
+        """
+        self.store = store if store is not None else get_session_store(data_dir)
+        self.data_dir = Path(data_dir) if data_dir else get_data_dir("circuit_breaker")
+        self.flush_interval = flush_interval
+        self.max_dirty = max_dirty
+        self.config = BreakerConfig.from_rules(thresholds, progress_indicators)
+        self._is_progress = self.config.is_progress
+
+        self._lock = threading.RLock()
+        self._records: Dict[str, _BreakerRecord] = {}
+        self._by_state: Dict[str, Set[str]] = {s.value: set() for s in CircuitState}
+        self._dirty: Set[str] = set()
+        self._transitions: Dict[str, List[Dict[str, Any]]] = {}
+
+        self._flush_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._closing = threading.Event()
+        atexit.register(_flush_on_exit, weakref.ref(self))
+
+    # ------------------------------------------------------------------
+    # Records
+    # ------------------------------------------------------------------
+
+    def _record(self, session_id: str) -> _BreakerRecord:
+        """Get a session's record, loading state.json on first use."""
+        record = self._records.get(session_id)
+        if record is None:
+            data: Optional[Dict[str, Any]] = None
+            if self.store is not None:
+                data = self.store.load_breaker(session_id)
+            else:
+                try:
+                    with open(self.data_dir / session_id / "state.json", 'r') as f:
+                        data = json.load(f)
+                except (FileNotFoundError, json.JSONDecodeError):
+                    pass
+            record = _BreakerRecord(data or {"last_change": datetime.now().isoformat()})
+            self._records[session_id] = record
+            self._by_state[record.state].add(session_id)
+        return record
+
+    def _set_state(self, session_id: str, record: _BreakerRecord, old: str) -> None:
+        if record.state != old:
+            self._by_state[old].discard(session_id)
+            self._by_state[record.state].add(session_id)
+
+    def _transition(self, session_id: str, from_state: str, to_state: str, reason: str, turn: int) -> None:
+        self._transitions.setdefault(session_id, []).append({
+            "timestamp": datetime.now().isoformat(),
+            "turn": turn,
+            "from_state": from_state,
+            "to_state": to_state,
+            "reason": reason
+        })
+
+    def _touched(self, session_id: str) -> None:
+        self._dirty.add(session_id)
+        if self.flush_interval <= 0 or len(self._dirty) >= self.max_dirty:
+            # Called under self._lock: a flush already running is waiting on
+            # that lock and will pick this session up, so never block on it
+            if self._flush_lock.acquire(blocking=False):
+                try:
+                    self._write_dirty()
+                finally:
+                    self._flush_lock.release()
+        elif self._flusher is None:
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name="slipstream-breaker-flush", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        """Periodically snapshot dirty sessions until close() is called."""
+        while not self._closing.wait(self.flush_interval):
+            self.flush()
+
+    # ------------------------------------------------------------------
+    # Breaker operations
+    # ------------------------------------------------------------------
+
+    def state(self, session_id: str) -> CircuitState:
+        with self._lock:
+            return CircuitState(self._record(session_id).state)
+
+    def can_execute(self, session_id: str, context: Optional[str] = None) -> bool:
+        """
+        Check if a session's circuit allows execution.
+        If context is provided, automatically resets an OPEN circuit if context has changed.
+        """
+        with self._lock:
+            record = self._record(session_id)
+            if context and record.state == CircuitState.OPEN.value:
+                new_hash = hashlib.sha256(context.encode()).hexdigest()
+                if new_hash != record.context_hash:
+                    self.reset(session_id, "Context change detected")
+                    self._records[session_id].context_hash = new_hash
+                    # reset() may already have written the record
+                    self._touched(session_id)
+                    return True
+            return record.state != CircuitState.OPEN.value
+
+    def record_turn_result(self, session_id: str, result: TurnResult, context: Optional[str] = None) -> bool:
+        """
+        Record an agent turn result for a session.
+
+        Returns:
+            True if execution should continue, False if circuit opened
+        """
+        with self._lock:
+            record = self._record(session_id)
+            if context:
+                record.context_hash = hashlib.sha256(context.encode()).hexdigest()
+
+            old = record.state
+            current_state, new_state, reason = advance_state(
+                record, result,
+                no_progress_threshold=self.config.no_progress_threshold,
+                same_error_threshold=self.config.same_error_threshold,
+                half_open_threshold=self.config.half_open_threshold,
+                is_progress=self._is_progress,
+            )
+            if new_state != current_state:
+                self._set_state(session_id, record, old)
+                self._transition(session_id, current_state.value, new_state.value,
+                                 reason, result.turn_number)
+            self._touched(session_id)
+            return new_state != CircuitState.OPEN
+
+    def record_many(self, results: Iterable[Tuple[str, TurnResult]]) -> Dict[str, bool]:
+        """
+        Record a batch of (session_id, result) turns under one lock.
+
+        Returns:
+            session_id -> whether execution should continue (last result wins)
+        """
+        outcome = {}
+        with self._lock:
+            for session_id, result in results:
+                outcome[session_id] = self.record_turn_result(session_id, result)
+        return outcome
+
+    def reset(self, session_id: str, reason: str = "Manual reset") -> None:
+        """Reset a session's circuit to CLOSED."""
+        with self._lock:
+            record = self._record(session_id)
+            old = record.state
+            fresh = _BreakerRecord({"state": CircuitState.CLOSED.value,
+                                    "last_change": datetime.now().isoformat(),
+                                    "reason": reason})
+            self._records[session_id] = fresh
+            self._set_state(session_id, fresh, old)
+            if old != CircuitState.CLOSED.value:
+                self._transition(session_id, old, CircuitState.CLOSED.value, reason, 0)
+            self._touched(session_id)
+
+    def get_status(self, session_id: str) -> Dict[str, Any]:
+        """Current status of one session, as CircuitBreaker.get_status."""
+        with self._lock:
+            record = self._record(session_id)
+            return {
+                "state": record.state,
+                "can_execute": record.state != CircuitState.OPEN.value,
+                "consecutive_no_progress": record.consecutive_no_progress,
+                "consecutive_same_error": record.consecutive_same_error,
+                "last_progress_turn": record.last_progress_turn,
+                "current_turn": record.current_turn,
+                "total_opens": record.total_opens,
+                "reason": record.reason,
+                "last_change": record.last_change
+            }
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._records
+
+    def sessions_in(self, *states: CircuitState) -> List[str]:
+        """
+        Loaded sessions whose circuit is in any of the given states.
+
+        Answered from the per-state index, so the cost is proportional to
+        the number of matches, not the number of sessions.
+        """
+        with self._lock:
+            found: Set[str] = set()
+            for state in states:
+                found |= self._by_state[CircuitState(state).value]
+            return sorted(found)
+
+    def open_sessions(self) -> List[str]:
+        return self.sessions_in(CircuitState.OPEN)
+
+    def tripped_sessions(self) -> List[str]:
+        """Sessions that are OPEN or being monitored (HALF_OPEN)."""
+        return self.sessions_in(CircuitState.OPEN, CircuitState.HALF_OPEN)
+
+    def counts(self) -> Dict[str, int]:
+        """Number of loaded sessions per state."""
+        with self._lock:
+            return {state: len(sessions) for state, sessions in self._by_state.items()}
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def flush(self) -> int:
+        """
+        Snapshot every dirty session to disk.
+
+        Records are copied under the lock and written outside it, so turns
+        keep being recorded while a batch is written.
+
+        Returns:
+            Number of sessions written
+        """
+        with self._flush_lock:
+            return self._write_dirty()
+
+    def _write_dirty(self) -> int:
+        """Snapshot dirty sessions and write them; caller holds _flush_lock."""
+        with self._lock:
+            snapshot = [(session_id, self._records[session_id].to_dict(),
+                         self._transitions.pop(session_id, None))
+                        for session_id in sorted(self._dirty)]
+            self._dirty = set()
+
+        written = 0
+        try:
+            if self.store is not None:
+                self.store.save_breakers(snapshot)
+                written = len(snapshot)
+                return written
+
+            for session_id, state, entries in snapshot:
+                session_dir = self.data_dir / session_id
+                session_dir.mkdir(parents=True, exist_ok=True)
+                atomic_write_json(session_dir / "state.json", state, compact=True)
+                if entries:
+                    with open(session_dir / "history.jsonl", 'a', encoding='utf-8') as f:
+                        f.writelines(json.dumps(entry) + "\n" for entry in entries)
+                written += 1
+            return written
+        except BaseException:
+            self._restore_unwritten(snapshot[written:])
+            raise
+
+    def _restore_unwritten(self, snapshot: List[Tuple[str, Dict[str, Any], Optional[List]]]) -> None:
+        """Mark sessions from a failed batch dirty again, transitions first in line."""
+        with self._lock:
+            for session_id, _, entries in snapshot:
+                self._dirty.add(session_id)
+                if entries:
+                    entries.extend(self._transitions.pop(session_id, []))
+                    self._transitions[session_id] = entries
+
+    def close(self) -> None:
+        """Stop the background flusher and write everything still dirty."""
+        self._closing.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
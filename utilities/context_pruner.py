@@ -0,0 +1,190 @@
+"""
+Slipstream Context Pruner
+
+Packs audit events into a token budget for prompt context.
+
+Events are ranked by type weight (decisions and gate resolutions before
+tool_call noise) and, within a weight, by recency. The pruner fills the
+budget tier by tier, newest first, then restores chronological order.
+Bucketing by weight keeps the cost linear in the number of events
+considered. Every event left out is reported with the reason, so the
+prompt can say what it is not showing.
+
+Usage:
+    pruner = ContextPruner(budget_tokens=8000)
+    result = pruner.prune(auditor.get_session_events(session_id, limit=1000))
+    result.lines      # formatted history, oldest first
+    result.explain()  # "Omitted 37 of 120 events (31 tool_call, 6 agent_turn) ..."
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+from .tokens import CHARS_PER_TOKEN, count_tokens
+
+# Higher weight is packed first. Event types follow rules.yaml audit.log_events.
+DEFAULT_EVENT_WEIGHTS: Dict[str, int] = {
+    "decision_made": 5,
+    "decision": 5,
+    "gate_resolved": 5,
+    "phase_transition": 4,
+    "gate_created": 4,
+    "research_finding": 3,
+    "circuit_breaker_transition": 3,
+    "agent_turn": 2,
+    "skill_applied": 1,
+    "tool_call": 0,
+    "tool_cache": 0,
+}
+DEFAULT_WEIGHT = 2
+
+# Longest single event line, so one huge payload cannot crowd out the rest
+DEFAULT_MAX_EVENT_TOKENS = 1000
+
+
+@dataclass
+class DroppedEvent:
+    """An event that did not make it into the context."""
+    index: int
+    event_type: str
+    agent: str
+    tokens: int
+    reason: str
+
+
+@dataclass
+class PruneResult:
+    """Events selected for context and an account of what was left out."""
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    lines: List[str] = field(default_factory=list)
+    tokens: int = 0
+    budget: int = 0
+    considered: int = 0
+    truncated: int = 0
+    dropped: List[DroppedEvent] = field(default_factory=list)
+
+    def explain(self) -> str:
+        """One-line human-readable summary of what was pruned."""
+        if not self.dropped and not self.truncated:
+            return f"All {self.considered} events included ({self.tokens}/{self.budget} tokens)."
+
+        parts = []
+        if self.dropped:
+            by_type = Counter(d.event_type for d in self.dropped)
+            breakdown = ", ".join(f"{n} {t}" for t, n in by_type.most_common())
+            parts.append(f"Omitted {len(self.dropped)} of {self.considered} events ({breakdown})")
+        if self.truncated:
+            parts.append(f"truncated {self.truncated} oversized events")
+        return f"{'; '.join(parts)} to fit {self.tokens}/{self.budget} tokens."
+
+
+class ContextPruner:
+    """Token-budgeted, type-weighted selection of audit events."""
+
+    def __init__(self,
+                 budget_tokens: int,
+                 weights: Optional[Dict[str, int]] = None,
+                 max_event_tokens: int = DEFAULT_MAX_EVENT_TOKENS,
+                 tokenizer: Callable[[str], int] = count_tokens):
+        """
+        Initialize pruner.
+
+        Args:
+            budget_tokens: Total tokens available for history lines
+            weights: Per event_type weights (merged over the defaults)
+            max_event_tokens: Cap for a single event line; longer details
+                are truncated
+            tokenizer: Token counter for formatted lines
+        """
+        self.budget_tokens = max(0, budget_tokens)
+        self.weights = dict(DEFAULT_EVENT_WEIGHTS)
+        self.weights.update(weights or {})
+        self.max_event_tokens = max_event_tokens
+        self.tokenizer = tokenizer
+
+    def weight(self, event_type: str) -> int:
+        return self.weights.get(event_type, DEFAULT_WEIGHT)
+
+    def format_event(self, artifact: Dict[str, Any]) -> str:
+        """Render one event as a compact history line."""
+        return (f"[{artifact.get('timestamp')}] {artifact.get('agent')} "
+                f"({artifact.get('event_type')}): {artifact.get('details')}\n")
+
+    def _render(self, artifact: Dict[str, Any]) -> Tuple[str, int, bool]:
+        """Format an event, truncating it to max_event_tokens if needed."""
+        line = self.format_event(artifact)
+        tokens = self.tokenizer(line)
+        if tokens <= self.max_event_tokens:
+            return line, tokens, False
+
+        def cut(keep: int) -> Tuple[str, int]:
+            text = line[:keep].rstrip("\n") + " ...\n"
+            return text, self.tokenizer(text)
+
+        # The estimate's chars-per-token is a first guess; a plugged-in
+        # tokenizer may count more, so shrink until the line fits
+        keep = min(len(line), max(0, self.max_event_tokens * CHARS_PER_TOKEN - 4))
+        truncated, tokens = cut(keep)
+        if tokens > self.max_event_tokens:
+            low, high = 0, keep - 1
+            truncated, tokens = cut(0)
+            while low <= high:
+                mid = (low + high) // 2
+                candidate, candidate_tokens = cut(mid)
+                if candidate_tokens <= self.max_event_tokens:
+                    truncated, tokens = candidate, candidate_tokens
+                    low = mid + 1
+                else:
+                    high = mid - 1
+        return truncated, tokens, True
+
+    def prune(self, events: List[Dict[str, Any]]) -> PruneResult:
+        """
+        Select events to fit the budget.
+
+        Args:
+            events: Candidate events, oldest first (as returned by
+                AuditTrail.get_session_events)
+
+        Returns:
+            PruneResult with selected events in chronological order
+        """
+        result = PruneResult(budget=self.budget_tokens, considered=len(events))
+
+        rendered = []
+        tiers: Dict[int, List[int]] = {}
+        for index, event in enumerate(events):
+            artifact = event.get("artifact", {})
+            line, tokens, truncated = self._render(artifact)
+            rendered.append((artifact, line, tokens, truncated))
+            tiers.setdefault(self.weight(artifact.get("event_type", "")), []).append(index)
+
+        selected = [False] * len(events)
+        remaining = self.budget_tokens
+        for weight in sorted(tiers, reverse=True):
+            for index in reversed(tiers[weight]):  # Newest first
+                artifact, _, tokens, _ = rendered[index]
+                if tokens <= remaining:
+                    selected[index] = True
+                    remaining -= tokens
+                else:
+                    result.dropped.append(DroppedEvent(
+                        index=index,
+                        event_type=artifact.get("event_type", ""),
+                        agent=artifact.get("agent", ""),
+                        tokens=tokens,
+                        reason=("larger than budget" if tokens > self.budget_tokens
+                                else "budget exhausted"),
+                    ))
+
+        for index, keep in enumerate(selected):
+            if keep:
+                artifact, line, tokens, truncated = rendered[index]
+                result.events.append(events[index])
+                result.lines.append(line)
+                result.tokens += tokens
+                result.truncated += truncated
+
+        result.dropped.sort(key=lambda d: d.index)
+        return result
@@ -0,0 +1,214 @@
+"""
+Slipstream Gate Index
+
+SQLite index of HITL gates across every session.
+
+Gate files (gates/{gate_id}.gate.json) stay the signed source of truth;
+the index mirrors each gate's artifact with its status so pending,
+approved and rejected gates are found with an index lookup instead of
+globbing and parsing every gate file ever created. One database under the
+hitl data directory serves all sessions, which lets reviewer dashboards
+list pending gates everywhere without walking the directory tree.
+
+HITLManager writes a gate file and its index row inside one BEGIN
+IMMEDIATE transaction: concurrent writers serialize, and a failed file
+write leaves the index untouched. Sessions created before the index
+existed are indexed from their gate files on first use.
+"""
+
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+INDEX_FILE = "gates.db"
+
+
+class GateIndex:
+    """Status index of gates, shared by every process using the same file."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30,
+                                     isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS gates ("
+            " session_id TEXT NOT NULL,"
+            " gate_id TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " phase TEXT,"
+            " risk_level TEXT,"
+            " created_at REAL,"
+            " resolved_at REAL,"
+            " expires_at REAL,"
+            " artifact TEXT NOT NULL,"
+            " PRIMARY KEY (session_id, gate_id))"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(gates)")}
+        if "expires_at" not in columns:  # Index created before gate expiry
+            try:
+                self._conn.execute("ALTER TABLE gates ADD COLUMN expires_at REAL")
+            except sqlite3.OperationalError:
+                pass  # Another process added it first
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS gates_status ON gates (status, created_at)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS gates_expiry ON gates (status, expires_at)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY)"
+        )
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Serialize a gate file update with its index row.
+
+        Everything in the block commits together; an exception rolls the
+        index back. Nested use joins the outer transaction.
+        """
+        with self._lock:
+            if self._conn.in_transaction:
+                yield
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def upsert(self, session_id: str, artifact: Dict[str, Any]) -> None:
+        """Record a gate's current state."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO gates"
+                " (session_id, gate_id, status, phase, risk_level, created_at, resolved_at,"
+                "  expires_at, artifact)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (session_id, artifact["gate_id"], artifact.get("status", ""),
+                 artifact.get("phase"), artifact.get("risk_level"),
+                 artifact.get("created_at"), artifact.get("resolved_at"),
+                 artifact.get("expires_at"), json.dumps(artifact, ensure_ascii=False)))
+
+    def status(self, session_id: str, gate_id: str) -> Optional[str]:
+        """Indexed status of one gate (None if unknown)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status FROM gates WHERE session_id = ? AND gate_id = ?",
+                (session_id, gate_id)).fetchone()
+        return row[0] if row else None
+
+    def query(self, session_id: Optional[str] = None, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Gate artifacts, oldest first.
+
+        Args:
+            session_id: Restrict to one session (None for all sessions)
+            status: Restrict to one status (e.g. PENDING_APPROVAL)
+        """
+        clauses, params = [], []
+        if session_id is not None:
+            clauses.append("session_id = ?")
+            params.append(session_id)
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT artifact FROM gates{where} ORDER BY created_at, session_id, gate_id",
+                params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def deadlines(self, status: str, created_after: Optional[float] = None) -> List[Tuple]:
+        """
+        (created_at, expires_at, session_id, gate_id, risk_level) of gates
+        with a status, optionally only those created after a time.
+        """
+        sql = ("SELECT created_at, expires_at, session_id, gate_id, risk_level FROM gates"
+               " WHERE status = ?")
+        params: List[Any] = [status]
+        if created_after is not None:
+            sql += " AND created_at > ?"
+            params.append(created_after)
+        with self._lock:
+            return self._conn.execute(sql + " ORDER BY created_at", params).fetchall()
+
+    def counts(self, session_id: Optional[str] = None) -> Dict[str, int]:
+        """Number of gates per status."""
+        where, params = ("WHERE session_id = ?", (session_id,)) if session_id is not None else ("", ())
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT status, COUNT(*) FROM gates {where} GROUP BY status", params).fetchall()
+        return dict(rows)
+
+    def delete(self, session_id: str, gate_id: Optional[str] = None) -> None:
+        """Drop one gate, or every gate of a session."""
+        with self._lock:
+            if gate_id is None:
+                self._conn.execute("DELETE FROM gates WHERE session_id = ?", (session_id,))
+            else:
+                self._conn.execute("DELETE FROM gates WHERE session_id = ? AND gate_id = ?",
+                                   (session_id, gate_id))
+
+    def ensure_session(self, session_id: str, gates_dir: Path) -> None:
+        """Index a session's existing gate files the first time it is seen."""
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM sessions WHERE session_id = ?",
+                                  (session_id,)).fetchone():
+                return
+            with self.transaction():
+                self.rebuild(session_id, gates_dir)
+                self._conn.execute("INSERT OR IGNORE INTO sessions (session_id) VALUES (?)",
+                                   (session_id,))
+
+    def rebuild(self, session_id: str, gates_dir: Path) -> int:
+        """
+        Re-index a session from its gate files.
+
+        Returns:
+            Number of gates indexed
+        """
+        indexed = 0
+        with self.transaction():
+            self.delete(session_id)
+            for gate_file in sorted(Path(gates_dir).glob("*.gate.json")):
+                try:
+                    artifact = json.loads(gate_file.read_text()).get("artifact")
+                except (json.JSONDecodeError, OSError):
+                    continue
+                if artifact and artifact.get("gate_id"):
+                    self.upsert(session_id, artifact)
+                    indexed += 1
+        return indexed
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+_indexes: Dict[str, GateIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_gate_index(data_dir: Path) -> GateIndex:
+    """Shared index for a hitl data directory (one connection per process)."""
+    key = str(Path(data_dir).resolve())
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = GateIndex(Path(key) / INDEX_FILE)
+            _indexes[key] = index
+        return index
@@ -0,0 +1,181 @@
+"""
+Slipstream Gate Sweeper
+
+Expires HITL gates that stay pending past their risk level's TTL.
+
+Deadlines are kept in a min-heap, so the sweeper sleeps until exactly the
+next expiry instead of scanning gates on a schedule. New gates are picked
+up incrementally from the gate index (only rows created since the last
+refresh), never by rescanning gate files. Each expiry is re-checked
+against the gate file under the index transaction, so a gate approved or
+re-created in the meantime is left alone, and every expiry is logged to
+the AuditTrail as a gate_resolved event.
+
+Usage:
+    sweeper = GateSweeper()
+    sweeper.start()        # Background thread
+    ...
+    sweeper.stop()
+
+    # Or from a scheduler / cron job
+    expired = GateSweeper().sweep()
+"""
+
+import heapq
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .audit import AuditTrail
+from .hitl import GateStatus, HITLManager, gate_index_for, gate_ttl
+from .io import get_data_dir
+
+DEFAULT_REFRESH_INTERVAL = 30.0
+
+# Re-read index rows this far behind the newest seen, so gates whose
+# creation committed late (clock skew between processes) are not missed
+REFRESH_OVERLAP = 60.0
+
+
+class GateSweeper:
+    """Min-heap of pending gate deadlines across every session."""
+
+    def __init__(self,
+                 data_dir: Path = None,
+                 auditor: Optional[AuditTrail] = None,
+                 refresh_interval: float = DEFAULT_REFRESH_INTERVAL):
+        """
+        Initialize sweeper.
+
+        Args:
+            data_dir: hitl data directory (defaults to the standard one)
+            auditor: Audit trail expiries are logged to
+            refresh_interval: Max seconds between checks for new gates
+        """
+        self.index = gate_index_for(data_dir)
+        self._manager_dir = Path(data_dir) if data_dir else None
+        self.data_dir = self._manager_dir or get_data_dir("hitl")
+        self.auditor = auditor
+        self.refresh_interval = refresh_interval
+
+        self._heap: List[Tuple[float, str, str]] = []
+        self._scheduled: Dict[Tuple[str, str], float] = {}
+        self._seen_until: Optional[float] = None
+        self._managers: Dict[str, HITLManager] = {}
+
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def __len__(self) -> int:
+        return len(self._scheduled)
+
+    def schedule(self, session_id: str, gate_id: str, expires_at: float) -> None:
+        """Add or move a gate's deadline."""
+        with self._cond:
+            key = (session_id, gate_id)
+            if self._scheduled.get(key) == expires_at:
+                return
+            self._scheduled[key] = expires_at
+            heapq.heappush(self._heap, (expires_at, session_id, gate_id))
+            self._cond.notify()
+
+    def refresh(self) -> int:
+        """
+        Schedule pending gates created since the last refresh.
+
+        Returns:
+            Number of index rows read
+        """
+        since = None if self._seen_until is None else self._seen_until - REFRESH_OVERLAP
+        rows = self.index.deadlines(GateStatus.PENDING.value, created_after=since)
+        for created_at, expires_at, session_id, gate_id, risk_level in rows:
+            if expires_at is None and created_at is not None:
+                ttl = gate_ttl(risk_level or "")
+                expires_at = created_at + ttl if ttl is not None else None
+            if expires_at is not None:
+                self.schedule(session_id, gate_id, expires_at)
+            if created_at is not None:
+                self._seen_until = max(self._seen_until or created_at, created_at)
+        return len(rows)
+
+    def next_deadline(self) -> Optional[float]:
+        """Earliest scheduled expiry, if any."""
+        with self._cond:
+            while self._heap:
+                expires_at, session_id, gate_id = self._heap[0]
+                if self._scheduled.get((session_id, gate_id)) == expires_at:
+                    return expires_at
+                heapq.heappop(self._heap)  # Superseded entry
+            return None
+
+    def _manager(self, session_id: str) -> HITLManager:
+        manager = self._managers.get(session_id)
+        if manager is None:
+            manager = HITLManager(session_id=session_id, data_dir=self._manager_dir)
+            self._managers[session_id] = manager
+        return manager
+
+    def sweep(self, now: Optional[float] = None) -> List[Tuple[str, str]]:
+        """
+        Expire every gate whose deadline has passed.
+
+        Args:
+            now: Current time (defaults to time.time())
+
+        Returns:
+            (session_id, gate_id) of the gates expired
+        """
+        self.refresh()
+        now = time.time() if now is None else now
+
+        due = []
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                expires_at, session_id, gate_id = heapq.heappop(self._heap)
+                key = (session_id, gate_id)
+                if self._scheduled.get(key) == expires_at:
+                    del self._scheduled[key]
+                    due.append(key)
+
+        expired = []
+        for session_id, gate_id in due:
+            if self.index.status(session_id, gate_id) != GateStatus.PENDING.value:
+                continue
+            if self._manager(session_id).expire_gate(gate_id, now=now, auditor=self.auditor):
+                expired.append((session_id, gate_id))
+        return expired
+
+    def start(self) -> None:
+        """Sweep in a background thread until stop()."""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="slipstream-gate-sweeper",
+                                            daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the background thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            self.sweep()
+            deadline = self.next_deadline()
+            wait = self.refresh_interval
+            if deadline is not None:
+                wait = min(wait, max(0.0, deadline - time.time()))
+            with self._cond:
+                if self._stopping:
+                    return
+                self._cond.wait(wait)
+                if self._stopping:
+                    return
@@ -5,6 +5,7 @@ Provides gates for human approval at critical workflow points.
 Adapted from CLOCKWORK-CORE.
 """
 
+import asyncio
 import json
 import time
 from enum import Enum
@@ -13,6 +14,10 @@ from typing import Dict, Any, Optional, List
 
 from .io import get_data_dir
 from .audit import sign_and_save, get_audit_trail
+from .gate_index import GateIndex, get_gate_index
+from .rules import get_rules_section
+from .session_store import SessionStore, get_session_store
+from .watch import DirectoryWatcher, file_stamp
 
 
 class RiskLevel(str, Enum):
@@ -31,6 +36,46 @@ class GateStatus(str, Enum):
     EXPIRED = "EXPIRED"
 
 
+# How long a pending gate waits for a human before it expires, by risk level.
+# Overridden by rules.yaml hitl.gate_ttl_seconds; None never expires.
+DEFAULT_GATE_TTL_SECONDS: Dict[str, Optional[float]] = {
+    RiskLevel.LOW.value: 4 * 3600,
+    RiskLevel.MEDIUM.value: 24 * 3600,
+    RiskLevel.HIGH.value: 72 * 3600,
+    RiskLevel.CRITICAL.value: 72 * 3600,
+}
+
+
+def gate_ttl(risk: str) -> Optional[float]:
+    """Seconds a pending gate of this risk level lives (None for no expiry)."""
+    ttls = dict(DEFAULT_GATE_TTL_SECONDS)
+    ttls.update(get_rules_section("hitl").get("gate_ttl_seconds") or {})
+    return ttls.get(risk.value if isinstance(risk, RiskLevel) else risk)
+
+
+def gate_deadline(artifact: Dict[str, Any]) -> Optional[float]:
+    """When a pending gate expires (gates created before TTLs use their risk's TTL)."""
+    if artifact.get("expires_at") is not None:
+        return artifact["expires_at"]
+    ttl = gate_ttl(artifact.get("risk_level", ""))
+    created_at = artifact.get("created_at")
+    return created_at + ttl if ttl is not None and created_at is not None else None
+
+
+def gate_index_for(data_dir: Path = None, store: Optional[SessionStore] = None) -> GateIndex:
+    """
+    Gate index for a hitl data directory.
+
+    The session store's index with the sqlite storage backend (unless
+    data_dir pins the JSON layout), else hitl/gates.db under data_dir.
+    """
+    if store is None:
+        store = get_session_store(data_dir)
+    if store is not None:
+        return store.gate_index()
+    return get_gate_index(data_dir if data_dir is not None else get_data_dir("hitl"))
+
+
 class HITLManager:
     """
     Human-in-the-Loop gate manager for workflow checkpoints.
@@ -55,12 +100,23 @@ class HITLManager:
             # Wait for human input
             pass
 
+        # Or block until a human resolves it
+        gate = hitl.wait_for_gate("plan-review", timeout=3600)
+
         # Human approves (typically via UI or CLI)
         hitl.approve_gate("plan-review", feedback={"notes": "Looks good"})
     """
 
-    def __init__(self, session_id: str = "default", data_dir: Path = None):
-        """Initialize HITL manager with persistent storage."""
+    def __init__(self, session_id: str = "default", data_dir: Path = None, store: Optional[SessionStore] = None):
+        """
+        Initialize HITL manager with persistent storage.
+
+        Gate files always live under data_dir; their index is kept in the
+        session store when one is in use (see gate_index_for).
+        """
+        # Status index shared by all sessions under data_dir
+        self.index = gate_index_for(data_dir, store)
+
         if data_dir is None:
             data_dir = get_data_dir("hitl")
 
@@ -69,6 +125,8 @@ class HITLManager:
         self.gates_dir.mkdir(parents=True, exist_ok=True)
         self.session_id = session_id
 
+        self.index.ensure_session(session_id, self.gates_dir)
+
     def assess_risk(self, action_type: str, details: Dict[str, Any]) -> RiskLevel:
         """
         Heuristic-based risk assessment for actions.
@@ -107,14 +165,21 @@ class HITLManager:
                     risk: RiskLevel,
                     details: Dict[str, Any],
                     agents_involved: List[str] = None,
-                    artifacts: List[str] = None) -> Dict[str, Any]:
+                    artifacts: List[str] = None,
+                    ttl_seconds: Optional[float] = None) -> Dict[str, Any]:
         """
         Create a gate that requires human approval.
 
+        Args:
+            ttl_seconds: Expire the gate if still pending after this long
+                (defaults to the risk level's TTL, see gate_ttl)
+
         Returns:
             Gate state dict
         """
         gate_path = self.gates_dir / f"{gate_id}.gate.json"
+        created_at = time.time()
+        ttl = ttl_seconds if ttl_seconds is not None else gate_ttl(risk)
 
         state = {
             "artifact": {
@@ -127,13 +192,16 @@ class HITLManager:
                 "agents_involved": agents_involved or [],
                 "artifacts": artifacts or [],
                 "status": GateStatus.PENDING.value,
-                "created_at": time.time(),
+                "created_at": created_at,
+                "expires_at": created_at + ttl if ttl is not None else None,
                 "resolved_at": None,
                 "feedback": None
             }
         }
 
-        sign_and_save(gate_path, state)
+        with self.index.transaction():
+            sign_and_save(gate_path, state)
+            self.index.upsert(self.session_id, state["artifact"])
 
         return state["artifact"]
 
@@ -163,6 +231,57 @@ class HITLManager:
             return False
         return gate.get("status") == GateStatus.PENDING.value
 
+    def _watch(self, gate_id: str):
+        """Watcher for the gates directory plus the gate file name."""
+        return DirectoryWatcher(self.gates_dir), f"{gate_id}.gate.json"
+
+    def wait_for_gate(self, gate_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Block until a gate is resolved (approved, rejected or expired).
+
+        Wakes as soon as the gate file changes (inotify where available,
+        otherwise stat polling with exponential backoff) instead of
+        polling get_gate on a fixed interval.
+
+        Args:
+            gate_id: The gate to wait for
+            timeout: Maximum seconds to wait (None waits indefinitely)
+
+        Returns:
+            The gate state; its status is still PENDING_APPROVAL on
+            timeout, and None if the gate never existed
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        watcher, name = self._watch(gate_id)
+        with watcher:
+            while True:
+                stamp = file_stamp(self.gates_dir / name)
+                gate = self.get_gate(gate_id)
+                if gate and gate.get("status") != GateStatus.PENDING.value:
+                    return gate
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return gate
+                watcher.wait(name, remaining, stamp)
+
+    async def wait_for_gate_async(self, gate_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """asyncio form of wait_for_gate(); see there for the return value."""
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        watcher, name = self._watch(gate_id)
+        with watcher:
+            while True:
+                stamp = file_stamp(self.gates_dir / name)
+                gate = self.get_gate(gate_id)
+                if gate and gate.get("status") != GateStatus.PENDING.value:
+                    return gate
+
+                remaining = None if deadline is None else deadline - loop.time()
+                if remaining is not None and remaining <= 0:
+                    return gate
+                await watcher.wait_async(name, remaining, stamp)
+
     def approve_gate(self, gate_id: str, feedback: Optional[Dict] = None) -> bool:
         """
         Approve a gate, allowing workflow to proceed.
@@ -179,15 +298,17 @@ class HITLManager:
             return False
 
         try:
-            raw_data = json.loads(gate_path.read_text())
-            artifact = raw_data.get("artifact", {})
+            with self.index.transaction():
+                raw_data = json.loads(gate_path.read_text())
+                artifact = raw_data.get("artifact", {})
 
-            artifact["status"] = GateStatus.APPROVED.value
-            artifact["resolved_at"] = time.time()
-            artifact["feedback"] = feedback
+                artifact["status"] = GateStatus.APPROVED.value
+                artifact["resolved_at"] = time.time()
+                artifact["feedback"] = feedback
 
-            new_state = {"artifact": artifact}
-            sign_and_save(gate_path, new_state, metadata={"action": "approved"})
+                new_state = {"artifact": artifact}
+                sign_and_save(gate_path, new_state, metadata={"action": "approved"})
+                self.index.upsert(self.session_id, artifact)
             return True
         except Exception:
             return False
@@ -209,37 +330,105 @@ class HITLManager:
             return False
 
         try:
-            raw_data = json.loads(gate_path.read_text())
-            artifact = raw_data.get("artifact", {})
+            with self.index.transaction():
+                raw_data = json.loads(gate_path.read_text())
+                artifact = raw_data.get("artifact", {})
+
+                artifact["status"] = GateStatus.REJECTED.value
+                artifact["resolved_at"] = time.time()
+                artifact["rejection_reason"] = reason
+                artifact["feedback"] = feedback
+
+                new_state = {"artifact": artifact}
+                sign_and_save(gate_path, new_state, metadata={"action": "rejected"})
+                self.index.upsert(self.session_id, artifact)
+            return True
+        except Exception:
+            return False
 
-            artifact["status"] = GateStatus.REJECTED.value
-            artifact["resolved_at"] = time.time()
-            artifact["rejection_reason"] = reason
-            artifact["feedback"] = feedback
+    def expire_gate(self, gate_id: str, now: Optional[float] = None, auditor=None) -> bool:
+        """
+        Mark a still-pending gate EXPIRED and log it to the audit trail.
 
-            new_state = {"artifact": artifact}
-            sign_and_save(gate_path, new_state, metadata={"action": "rejected"})
-            return True
+        Waiters (wait_for_gate) return, and check_and_gate will ask for a
+        fresh approval the next time the action comes up.
+
+        Args:
+            gate_id: The gate to expire
+            now: Only expire if the gate's deadline has passed by this time
+                (None expires unconditionally)
+            auditor: Audit trail to log to (defaults to the global one)
+
+        Returns:
+            True if the gate was pending and is now expired
+        """
+        gate_path = self.gates_dir / f"{gate_id}.gate.json"
+        if not gate_path.exists():
+            return False
+
+        try:
+            with self.index.transaction():
+                raw_data = json.loads(gate_path.read_text())
+                artifact = raw_data.get("artifact", {})
+                if artifact.get("status") != GateStatus.PENDING.value:
+                    self.index.upsert(self.session_id, artifact)  # Heal a stale index row
+                    return False
+                if now is not None:
+                    deadline = gate_deadline(artifact)
+                    if deadline is None or deadline > now:
+                        return False
+
+                artifact["status"] = GateStatus.EXPIRED.value
+                artifact["resolved_at"] = time.time()
+
+                new_state = {"artifact": artifact}
+                sign_and_save(gate_path, new_state, metadata={"action": "expired"})
+                self.index.upsert(self.session_id, artifact)
         except Exception:
             return False
 
+        (auditor or get_audit_trail()).log_event(
+            self.session_id, "gate_resolved", "hitl", artifact.get("phase", ""),
+            {"gate_id": gate_id, "status": GateStatus.EXPIRED.value,
+             "risk_level": artifact.get("risk_level"),
+             "created_at": artifact.get("created_at"),
+             "expires_at": artifact.get("expires_at")})
+        return True
+
     def get_pending_gates(self) -> List[Dict[str, Any]]:
         """Get all pending gates for this session."""
-        pending = []
-        for gate_file in self.gates_dir.glob("*.gate.json"):
-            try:
-                data = json.loads(gate_file.read_text())
-                artifact = data.get("artifact", {})
-                if artifact.get("status") == GateStatus.PENDING.value:
-                    pending.append(artifact)
-            except json.JSONDecodeError:
-                continue
-        return pending
+        return self.get_gates(GateStatus.PENDING)
+
+    def get_gates(self, status: Optional[GateStatus] = None) -> List[Dict[str, Any]]:
+        """
+        Get this session's gates from the index, oldest first.
+
+        Args:
+            status: Only gates with this status (None for all)
+        """
+        return self.index.query(self.session_id, status.value if status else None)
+
+    def rebuild_index(self) -> int:
+        """Re-index this session from its gate files; returns the gate count."""
+        return self.index.rebuild(self.session_id, self.gates_dir)
 
     def clear_gates(self) -> None:
         """Clear all gates for this session."""
-        for gate_file in self.gates_dir.glob("*.gate.json"):
-            gate_file.unlink()
+        with self.index.transaction():
+            for gate_file in self.gates_dir.glob("*.gate.json"):
+                gate_file.unlink()
+            self.index.delete(self.session_id)
+
+
+def pending_gates_all(data_dir: Path = None) -> List[Dict[str, Any]]:
+    """
+    Pending gates across every session, oldest first.
+
+    Served from the shared gate index, for reviewer dashboards; sessions
+    that have never been opened by a HITLManager since the index was
+    introduced are not included until they are.
+    """
+    return gate_index_for(data_dir).query(status=GateStatus.PENDING.value)
 
 
 def check_and_gate(session_id: str,
@@ -260,8 +449,10 @@ def check_and_gate(session_id: str,
 
     # Only gate HIGH and CRITICAL risk actions
     if risk in [RiskLevel.HIGH, RiskLevel.CRITICAL]:
-        if not mgr.is_gate_approved(gate_id):
-            if not mgr.is_gate_pending(gate_id):
+        gate = mgr.get_gate(gate_id)
+        status = gate.get("status") if gate else None
+        if status != GateStatus.APPROVED.value:
+            if status != GateStatus.PENDING.value:
                 gate = mgr.create_gate(
                     gate_id=gate_id,
                     phase=phase,
@@ -269,8 +460,6 @@ def check_and_gate(session_id: str,
                     risk=risk,
                     details=details
                 )
-            else:
-                gate = mgr.get_gate(gate_id)
 
             return {
                 "ok": False,
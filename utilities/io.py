@@ -7,31 +7,168 @@ Adapted from CLOCKWORK-CORE.
 
 import sys
 import json
+import math
 import os
+import uuid
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+try:
+    import orjson
+except ImportError:  # Optional fast encoder
+    orjson = None
+
+# Block size used when scanning files backward from EOF
+TAIL_BLOCK_SIZE = 64 * 1024
 
 # Force Unicode on Windows stdout
 if hasattr(sys.stdout, 'reconfigure'):
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
 
 
-def atomic_write_json(path: Path, data: Any) -> None:
+def encode_json(data: Any, indent: Optional[int] = 2, compact: bool = False) -> bytes:
+    """
+    Encode data as UTF-8 JSON.
+
+    Args:
+        data: JSON-serializable data
+        indent: Indentation (None for a single line)
+        compact: Single line without spaces after separators (implies indent=None)
+
+    Uses orjson when installed and it can produce the same layout
+    (single line or indent=2), the standard library otherwise.
+
+    Raises:
+        ValueError: If data holds NaN or an infinity, which are not JSON
+            (orjson would write null, the standard library NaN)
+    """
+    if compact:
+        indent = None
+    if orjson is not None and indent in (None, 2):
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent == 2 else 0)
+        try:
+            encoded = orjson.dumps(data, option=option)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits; the stdlib handles them
+        else:
+            # orjson writes non-finite floats as null, so only then look closer
+            if b"null" in encoded and _has_non_finite(data):
+                raise ValueError("Out of range float values are not JSON compliant")
+            return encoded
+    separators = (',', ':') if compact else None
+    return json.dumps(data, indent=indent, separators=separators, ensure_ascii=False,
+                      allow_nan=False).encode('utf-8')
+
+
+def _has_non_finite(data: Any) -> bool:
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, dict):
+        return any(_has_non_finite(v) for v in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(_has_non_finite(v) for v in data)
+    return False
+
+
+def _fsync_directory(directory: Path) -> None:
+    """Persist a rename by syncing its directory (a no-op where unsupported)."""
+    if os.name != 'posix':
+        return
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_json(path: Path,
+                      data: Any,
+                      indent: Optional[int] = 2,
+                      compact: bool = False,
+                      durable: bool = True) -> None:
     """
     Atomically write JSON to a file.
 
+    The data goes to a temporary file in the same directory which then
+    replaces the destination with os.replace(), so readers and crashes
+    only ever see the old or the new contents, never a truncated file.
+
     Args:
         path: Destination path
         data: JSON-serializable data
+        indent: Indentation (None for a single line)
+        compact: Smallest encoding: single line, no separator spaces
+        durable: fsync the file before the rename and the directory after
+            it, so the write survives power loss (False only guarantees
+            atomicity against process crashes)
     """
     path = Path(path)
     path.parent.mkdir(parents=True, exist_ok=True)
+    payload = encode_json(data, indent=indent, compact=compact)
+
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:12]}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+    try:
+        with open(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            if durable and hasattr(os, 'fsync'):
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    if durable:
+        _fsync_directory(path.parent)
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """
+    Hold an exclusive advisory lock on a lock file for the duration of the block.
 
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-        f.flush()
-        if hasattr(os, 'fsync'):
-            os.fsync(f.fileno())
+    Serializes access across processes (and across threads that each take
+    the lock). The lock file is created if missing and never deleted.
+
+    Args:
+        path: Lock file path
+    """
+    path = Path(path)
+    with open(path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue  # LK_LOCK gives up after ~10s; keep waiting
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
 
 
 def load_json_gracefully(path: Path) -> Optional[Dict]:
@@ -65,20 +202,61 @@ def load_json_gracefully(path: Path) -> Optional[Dict]:
         return {"_corrupt": True, "error": str(e)}
 
 
-def get_data_dir(component_name: str) -> Path:
+def read_tail_lines(path: Path, block_size: int = TAIL_BLOCK_SIZE) -> Iterator[bytes]:
     """
-    Get the data directory for a specific component.
+    Yield non-empty lines from the end of a file, newest first.
+
+    Seeks backward from EOF in fixed-size blocks, so only as much of the
+    file is read as the caller consumes, regardless of its total size.
+
+    Args:
+        path: File to scan
+        block_size: Bytes to read per backward seek
+    """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b""
+
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            chunk = f.read(read_size) + remainder
+
+            lines = chunk.split(b"\n")
+            # The first piece may be a partial line continuing in the previous block
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line.strip():
+                    yield line
+
+        if remainder.strip():
+            yield remainder
+
+
+def get_data_root() -> Path:
+    """
+    Get the directory holding every component's data directory.
 
     Priority:
     1. SLIPSTREAM_DATA_DIR environment variable
-    2. Default: ./slipstream_data/{component_name}
+    2. Default: ./slipstream_data
     """
     env_path = os.environ.get("SLIPSTREAM_DATA_DIR")
     if env_path:
-        base = Path(env_path)
-    else:
-        base = Path.cwd() / "slipstream_data"
+        return Path(env_path)
+    return Path.cwd() / "slipstream_data"
 
-    target = base / component_name
+
+def get_data_dir(component_name: str) -> Path:
+    """
+    Get the data directory for a specific component.
+
+    Priority:
+    1. SLIPSTREAM_DATA_DIR environment variable
+    2. Default: ./slipstream_data/{component_name}
+    """
+    target = get_data_root() / component_name
     target.mkdir(parents=True, exist_ok=True)
     return target
@@ -0,0 +1,135 @@
+"""
+Slipstream Prompt Assembly
+
+Builds persona prompts from precompiled segments.
+
+The constitution block (slipstream.yaml constitution_prompt_template filled
+with the primary and role constitutions) is rendered once per persona and
+cached with its token count. It is only recompiled when the registry
+reports that one of its files changed. Each build then renders only the
+dynamic segments and joins everything in a single pass, so per-turn cost
+depends on the dynamic parts alone.
+
+Usage:
+    assembler = get_prompt_assembler()
+    prompt = assembler.assemble("producer", [header, goals, history])
+    prompt.text, prompt.tokens
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .registry import PersonaBundle, Registry, get_registry
+from .tokens import count_tokens
+
+DEFAULT_CONSTITUTION_TEMPLATE = """BEFORE PROCEEDING, YOU MUST READ AND INTERNALIZE:
+
+=== PRIMARY CONSTITUTION (SUPREME AUTHORITY) ===
+{primary_constitution}
+
+=== ROLE CONSTITUTION ({role_name}) ===
+{role_constitution}
+
+You are bound by these constitutions. Proceed only after internalizing them.
+Research mandate triggers from your role constitution are ACTIVE.
+"""
+
+
+@dataclass(frozen=True)
+class PromptSegment:
+    """A rendered piece of prompt text with its token count."""
+    text: str
+    tokens: int
+
+
+@dataclass(frozen=True)
+class AssembledPrompt:
+    """Final prompt text and its total token count."""
+    text: str
+    tokens: int
+
+
+class PromptAssembler:
+    """Caches static prompt blocks per persona and joins segments once."""
+
+    def __init__(self,
+                 registry: Optional[Registry] = None,
+                 template: Optional[str] = None,
+                 tokenizer: Callable[[str], int] = count_tokens):
+        """
+        Initialize assembler.
+
+        Args:
+            registry: Definition registry (defaults to the global registry)
+            template: Constitution template (defaults to slipstream.yaml's
+                persona_loading.constitution_prompt_template)
+            tokenizer: Token counter applied to every segment
+        """
+        self.registry = registry or get_registry()
+        self._template = template
+        self.tokenizer = tokenizer
+
+        self._lock = threading.Lock()
+        self._blocks: Dict[str, Tuple[PersonaBundle, str, PromptSegment]] = {}
+
+    @property
+    def template(self) -> str:
+        if self._template is not None:
+            return self._template
+        loading = self.registry.config().get("persona_loading", {})
+        return loading.get("constitution_prompt_template") or DEFAULT_CONSTITUTION_TEMPLATE
+
+    def segment(self, text: str) -> PromptSegment:
+        """Wrap dynamic text as a segment, counting its tokens."""
+        return PromptSegment(text=text, tokens=self.tokenizer(text))
+
+    def constitution_block(self, persona_name: str) -> PromptSegment:
+        """Rendered constitution block for a persona, compiled once."""
+        bundle = self.registry.persona_bundle(persona_name)
+        template = self.template
+
+        with self._lock:
+            cached = self._blocks.get(persona_name)
+            if cached is not None and cached[0] is bundle and cached[1] is template:
+                return cached[2]
+
+        role_name = bundle.persona.get("name", persona_name) if isinstance(bundle.persona, dict) else persona_name
+        text = (template
+                .replace("{primary_constitution}", bundle.primary_constitution.strip())
+                .replace("{role_name}", str(role_name))
+                .replace("{role_constitution}", bundle.role_constitution.strip()))
+        block = self.segment(text)
+
+        with self._lock:
+            self._blocks[persona_name] = (bundle, template, block)
+        return block
+
+    def build(self, segments: Sequence[Union[str, PromptSegment]]) -> AssembledPrompt:
+        """Join segments into one prompt in a single pass."""
+        parts: List[str] = []
+        tokens = 0
+        for seg in segments:
+            if isinstance(seg, str):
+                seg = self.segment(seg)
+            parts.append(seg.text)
+            tokens += seg.tokens
+        return AssembledPrompt(text="".join(parts), tokens=tokens)
+
+    def assemble(self,
+                 persona_name: str,
+                 dynamic: Sequence[Union[str, PromptSegment]]) -> AssembledPrompt:
+        """Constitution block for persona_name followed by the dynamic segments."""
+        return self.build([self.constitution_block(persona_name), *dynamic])
+
+
+# Module-level singleton
+_assembler: Optional[PromptAssembler] = None
+
+
+def get_prompt_assembler() -> PromptAssembler:
+    """Get or create the global prompt assembler."""
+    global _assembler
+    if _assembler is None:
+        _assembler = PromptAssembler()
+    return _assembler
@@ -0,0 +1,471 @@
+"""
+Slipstream Rate Limit Stores
+
+Pluggable backends holding the calls inside each endpoint's sliding window.
+
+    MemoryCallStore  - Per-process, thread-safe, nothing persisted
+    FileCallStore    - JSON snapshot + append-only journal guarded by an
+                       advisory file lock (default; shared across processes)
+    SQLiteCallStore  - One SQLite database in WAL mode (shared across
+                       processes, lowest contention under many writers)
+
+Every store implements acquire() as a single atomic check-and-record, so
+concurrent threads or worker processes sharing a store enforce one budget.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .io import atomic_write_json, file_lock
+
+
+@dataclass
+class CallRecord:
+    """Record of a single API call"""
+    timestamp: float
+    endpoint: str = "default"
+    agent: str = "unknown"
+    cost: int = 1
+
+
+def _wait_for_capacity(window, used: int, limit: int, cost: int,
+                       window_seconds: float, now: float) -> float:
+    """
+    Seconds until `cost` more units fit under `limit`.
+
+    Args:
+        window: Live (timestamp, cost) pairs, oldest first
+        used: Sum of costs in window
+    """
+    if cost > limit:
+        return float("inf")
+    excess = used + cost - limit
+    if excess <= 0:
+        return 0.0
+    freed = 0
+    for timestamp, call_cost in window:
+        freed += call_cost
+        if freed >= excess:
+            return max(0.0, timestamp + window_seconds - now)
+    return float("inf")
+
+
+class CallStore(ABC):
+    """Interface for sliding-window call storage."""
+
+    @abstractmethod
+    def count(self, endpoint: str, window_seconds: float) -> int:
+        """Total cost recorded for endpoint inside the window."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def wait_time(self, endpoint: str, limit: int, window_seconds: float, cost: int = 1) -> float:
+        """Seconds until `cost` more units fit under `limit` (0 if they fit now)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def acquire(self, endpoint: str, agent: str, limit: int,
+                window_seconds: float, cost: int = 1) -> float:
+        """
+        Atomically record a call if it fits under the limit.
+
+        Returns:
+            0.0 if the call was recorded, otherwise seconds until it would fit
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def record(self, endpoint: str, agent: str, cost: int = 1) -> None:
+        """Record a call unconditionally."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def calls(self, window_seconds: float) -> List[CallRecord]:
+        """All calls inside the window, oldest first."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def endpoints(self, window_seconds: float) -> List[str]:
+        """Endpoints with at least one call inside the window."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def reset(self, endpoint: Optional[str] = None) -> None:
+        """Forget calls for one endpoint, or for all endpoints."""
+        raise NotImplementedError
+
+
+class MemoryCallStore(CallStore):
+    """
+    In-process store: one time-ordered deque and running cost total per
+    endpoint, so checks only touch the expired head and the new tail.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._windows: Dict[str, Deque[CallRecord]] = {}
+        self._used: Dict[str, int] = {}
+
+    def _prune(self, endpoint: str, window_seconds: float, now: float) -> Deque[CallRecord]:
+        """Drop expired calls from the head of an endpoint's window."""
+        window = self._windows.get(endpoint)
+        if window is None:
+            window = self._windows[endpoint] = deque()
+            self._used[endpoint] = 0
+        cutoff = now - window_seconds
+        while window and window[0].timestamp <= cutoff:
+            self._used[endpoint] -= window.popleft().cost
+        return window
+
+    def _append(self, record: CallRecord) -> None:
+        """Add a call to its endpoint's window."""
+        window = self._windows.get(record.endpoint)
+        if window is None:
+            window = self._windows[record.endpoint] = deque()
+            self._used[record.endpoint] = 0
+        window.append(record)
+        self._used[record.endpoint] += record.cost
+
+    def _wait(self, endpoint: str, limit: int, window_seconds: float, cost: int, now: float) -> float:
+        window = self._prune(endpoint, window_seconds, now)
+        return _wait_for_capacity(((c.timestamp, c.cost) for c in window),
+                                  self._used[endpoint], limit, cost, window_seconds, now)
+
+    def count(self, endpoint: str, window_seconds: float) -> int:
+        with self._lock:
+            self._prune(endpoint, window_seconds, time.time())
+            return self._used[endpoint]
+
+    def wait_time(self, endpoint: str, limit: int, window_seconds: float, cost: int = 1) -> float:
+        with self._lock:
+            return self._wait(endpoint, limit, window_seconds, cost, time.time())
+
+    def acquire(self, endpoint: str, agent: str, limit: int,
+                window_seconds: float, cost: int = 1) -> float:
+        with self._lock:
+            now = time.time()
+            wait = self._wait(endpoint, limit, window_seconds, cost, now)
+            if wait == 0:
+                self._append(CallRecord(timestamp=now, endpoint=endpoint, agent=agent, cost=cost))
+            return wait
+
+    def record(self, endpoint: str, agent: str, cost: int = 1) -> None:
+        with self._lock:
+            self._append(CallRecord(timestamp=time.time(), endpoint=endpoint, agent=agent, cost=cost))
+
+    def calls(self, window_seconds: float) -> List[CallRecord]:
+        with self._lock:
+            now = time.time()
+            for endpoint in list(self._windows):
+                self._prune(endpoint, window_seconds, now)
+            return sorted((c for window in self._windows.values() for c in window),
+                          key=lambda c: c.timestamp)
+
+    def endpoints(self, window_seconds: float) -> List[str]:
+        return sorted({c.endpoint for c in self.calls(window_seconds)})
+
+    def reset(self, endpoint: Optional[str] = None) -> None:
+        with self._lock:
+            if endpoint:
+                self._windows.pop(endpoint, None)
+                self._used.pop(endpoint, None)
+            else:
+                self._windows = {}
+                self._used = {}
+
+
+class FileCallStore(MemoryCallStore):
+    """
+    JSON-backed store shared by every process using the same directory.
+
+    Calls are appended to calls.jsonl and periodically compacted into the
+    calls.json snapshot. Each operation takes an advisory lock on
+    calls.lock and replays only the journal lines other processes
+    appended since this process last looked.
+
+    Journal lines carry a sequence number and the snapshot records in
+    "seq" the last one it contains, so a crash between writing the
+    snapshot and truncating the journal never counts a call twice.
+    """
+
+    COMPACT_MIN_JOURNAL = 256    # Never compact journals shorter than this
+    COMPACT_RATIO = 2            # Compact once journal > ratio * live calls
+
+    def __init__(self, data_dir: Path, window_seconds: float = 3600):
+        super().__init__()
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+
+        self.calls_file = self.data_dir / "calls.json"
+        self.journal_file = self.data_dir / "calls.jsonl"
+        self.lock_file = self.data_dir / "calls.lock"
+        self.window_seconds = window_seconds
+
+        self._snapshot_stamp: Optional[Tuple[int, int]] = None
+        self._journal_offset = 0
+        self._journal_lines = 0
+        self._seq = 0
+
+    def _stamp(self) -> Optional[Tuple[int, int]]:
+        """Identify the current snapshot so compaction by others is noticed."""
+        try:
+            st = self.calls_file.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _refresh(self) -> None:
+        """Catch up with calls written by other processes. Caller holds locks."""
+        stamp = self._stamp()
+        journal_size = self.journal_file.stat().st_size if self.journal_file.exists() else 0
+
+        if stamp != self._snapshot_stamp or journal_size < self._journal_offset:
+            # Another process compacted (or this is the first load): reload fully
+            self._windows = {}
+            self._used = {}
+            records: List[CallRecord] = []
+            self._seq = 0
+            if self.calls_file.exists():
+                try:
+                    with open(self.calls_file, 'r') as f:
+                        data = json.load(f)
+                    records = [CallRecord(**c) for c in data.get("calls", [])]
+                    self._seq = int(data.get("seq", 0))
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                    records = []
+            records.sort(key=lambda c: c.timestamp)
+            for record in records:
+                self._append(record)
+            self._snapshot_stamp = stamp
+            self._journal_offset = 0
+            self._journal_lines = 0
+
+        if journal_size > self._journal_offset:
+            with open(self.journal_file, 'rb') as f:
+                f.seek(self._journal_offset)
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break
+                    self._journal_offset += len(raw)
+                    self._journal_lines += 1
+                    try:
+                        entry = json.loads(raw)
+                        seq = entry.pop("seq", None)
+                        if seq is not None:
+                            if seq <= self._seq:
+                                continue  # Already in the snapshot
+                            self._seq = seq
+                        self._append(CallRecord(**entry))
+                    except (json.JSONDecodeError, UnicodeDecodeError, TypeError, AttributeError):
+                        continue
+
+    def _persist(self, record: CallRecord) -> None:
+        """Journal one call, compacting when the journal is mostly expired."""
+        self._seq += 1
+        line = (json.dumps({**asdict(record), "seq": self._seq}) + "\n").encode()
+        with open(self.journal_file, 'ab') as f:
+            f.write(line)
+        self._journal_offset += len(line)
+        self._journal_lines += 1
+
+        if self._journal_lines >= self.COMPACT_MIN_JOURNAL:
+            live = sum(len(window) for window in self._windows.values())
+            if self._journal_lines > self.COMPACT_RATIO * live:
+                self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite live calls into the snapshot and truncate the journal."""
+        now = time.time()
+        for endpoint in list(self._windows):
+            self._prune(endpoint, self.window_seconds, now)
+        atomic_write_json(self.calls_file, {
+            "calls": [asdict(c) for c in MemoryCallStore.calls(self, self.window_seconds)],
+            "window_seconds": self.window_seconds,
+            "seq": self._seq
+        }, compact=True)
+        with open(self.journal_file, 'w'):
+            pass
+        self._snapshot_stamp = self._stamp()
+        self._journal_offset = 0
+        self._journal_lines = 0
+
+    def count(self, endpoint: str, window_seconds: float) -> int:
+        with self._lock, file_lock(self.lock_file):
+            self._refresh()
+            return super().count(endpoint, window_seconds)
+
+    def wait_time(self, endpoint: str, limit: int, window_seconds: float, cost: int = 1) -> float:
+        with self._lock, file_lock(self.lock_file):
+            self._refresh()
+            return super().wait_time(endpoint, limit, window_seconds, cost)
+
+    def acquire(self, endpoint: str, agent: str, limit: int,
+                window_seconds: float, cost: int = 1) -> float:
+        with self._lock, file_lock(self.lock_file):
+            self._refresh()
+            now = time.time()
+            wait = self._wait(endpoint, limit, window_seconds, cost, now)
+            if wait == 0:
+                record = CallRecord(timestamp=now, endpoint=endpoint, agent=agent, cost=cost)
+                self._append(record)
+                self._persist(record)
+            return wait
+
+    def record(self, endpoint: str, agent: str, cost: int = 1) -> None:
+        with self._lock, file_lock(self.lock_file):
+            self._refresh()
+            record = CallRecord(timestamp=time.time(), endpoint=endpoint, agent=agent, cost=cost)
+            self._append(record)
+            self._persist(record)
+
+    def calls(self, window_seconds: float) -> List[CallRecord]:
+        with self._lock, file_lock(self.lock_file):
+            self._refresh()
+            return super().calls(window_seconds)
+
+    def reset(self, endpoint: Optional[str] = None) -> None:
+        with self._lock, file_lock(self.lock_file):
+            self._refresh()
+            super().reset(endpoint)
+            self._compact()
+
+
+class SQLiteCallStore(CallStore):
+    """
+    SQLite store in WAL mode shared by every process using the same file.
+
+    Check-and-record runs in a single BEGIN IMMEDIATE transaction, so
+    readers never block and writers serialize only for the insert.
+
+    Several sessions can share one database (the unified session store
+    does): each store only sees the calls of its session_id.
+    """
+
+    def __init__(self, db_path: Path, session_id: str = ""):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.session_id = session_id
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30,
+                                     isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS calls ("
+            " id INTEGER PRIMARY KEY,"
+            " endpoint TEXT NOT NULL,"
+            " agent TEXT NOT NULL,"
+            " timestamp REAL NOT NULL,"
+            " cost INTEGER NOT NULL DEFAULT 1,"
+            " session_id TEXT NOT NULL DEFAULT '')"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(calls)")}
+        if "session_id" not in columns:  # Database created before sessions were shared
+            try:
+                self._conn.execute("ALTER TABLE calls ADD COLUMN session_id TEXT NOT NULL DEFAULT ''")
+            except sqlite3.OperationalError:
+                pass  # Another process added it first
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS calls_session_endpoint_ts ON calls (session_id, endpoint, timestamp)"
+        )
+
+    def _expire(self, endpoint: str, window_seconds: float, now: float) -> None:
+        self._conn.execute("DELETE FROM calls WHERE session_id = ? AND endpoint = ? AND timestamp <= ?",
+                           (self.session_id, endpoint, now - window_seconds))
+
+    def _used(self, endpoint: str, window_seconds: float, now: float) -> int:
+        row = self._conn.execute(
+            "SELECT COALESCE(SUM(cost), 0) FROM calls"
+            " WHERE session_id = ? AND endpoint = ? AND timestamp > ?",
+            (self.session_id, endpoint, now - window_seconds)).fetchone()
+        return row[0]
+
+    def _wait(self, endpoint: str, limit: int, window_seconds: float, cost: int, now: float) -> float:
+        used = self._used(endpoint, window_seconds, now)
+        if used + cost <= limit:
+            return 0.0
+        window = self._conn.execute(
+            "SELECT timestamp, cost FROM calls WHERE session_id = ? AND endpoint = ? AND timestamp > ?"
+            " ORDER BY timestamp", (self.session_id, endpoint, now - window_seconds))
+        return _wait_for_capacity(window, used, limit, cost, window_seconds, now)
+
+    def count(self, endpoint: str, window_seconds: float) -> int:
+        with self._lock:
+            return self._used(endpoint, window_seconds, time.time())
+
+    def wait_time(self, endpoint: str, limit: int, window_seconds: float, cost: int = 1) -> float:
+        with self._lock:
+            return self._wait(endpoint, limit, window_seconds, cost, time.time())
+
+    def acquire(self, endpoint: str, agent: str, limit: int,
+                window_seconds: float, cost: int = 1) -> float:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                self._expire(endpoint, window_seconds, now)
+                wait = self._wait(endpoint, limit, window_seconds, cost, now)
+                if wait == 0:
+                    self._conn.execute(
+                        "INSERT INTO calls (session_id, endpoint, agent, timestamp, cost)"
+                        " VALUES (?, ?, ?, ?, ?)", (self.session_id, endpoint, agent, now, cost))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return wait
+
+    def record(self, endpoint: str, agent: str, cost: int = 1) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO calls (session_id, endpoint, agent, timestamp, cost) VALUES (?, ?, ?, ?, ?)",
+                (self.session_id, endpoint, agent, time.time(), cost))
+
+    def calls(self, window_seconds: float) -> List[CallRecord]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT timestamp, endpoint, agent, cost FROM calls WHERE session_id = ? AND timestamp > ?"
+                " ORDER BY timestamp", (self.session_id, time.time() - window_seconds)).fetchall()
+        return [CallRecord(*row) for row in rows]
+
+    def endpoints(self, window_seconds: float) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT endpoint FROM calls WHERE session_id = ? AND timestamp > ? ORDER BY endpoint",
+                (self.session_id, time.time() - window_seconds)).fetchall()
+        return [row[0] for row in rows]
+
+    def reset(self, endpoint: Optional[str] = None) -> None:
+        with self._lock:
+            if endpoint:
+                self._conn.execute("DELETE FROM calls WHERE session_id = ? AND endpoint = ?",
+                                   (self.session_id, endpoint))
+            else:
+                self._conn.execute("DELETE FROM calls WHERE session_id = ?", (self.session_id,))
+
+    def replace_calls(self, records: List[CallRecord]) -> None:
+        """Replace this session's calls with `records` (e.g. when migrating stores)."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM calls WHERE session_id = ?", (self.session_id,))
+                self._conn.executemany(
+                    "INSERT INTO calls (session_id, endpoint, agent, timestamp, cost) VALUES (?, ?, ?, ?, ?)",
+                    [(self.session_id, c.endpoint, c.agent, c.timestamp, c.cost) for c in records])
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -9,24 +9,24 @@ import json
 import os
 import time
 from pathlib import Path
-from typing import Dict, Any, List
-from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional
 
-from .io import get_data_dir
-
-
-@dataclass
-class CallRecord:
-    """Record of a single API call"""
-    timestamp: float
-    endpoint: str = "default"
-    agent: str = "unknown"
+from .io import atomic_write_json, get_data_dir
+from .rate_limit_store import CallRecord, CallStore, FileCallStore
+from .session_store import SessionStore, get_session_store
 
 
 class RateLimiter:
     """
     Rate limiter with configurable limits per endpoint.
 
+    Calls are kept by a pluggable CallStore (see rate_limit_store). The
+    default FileCallStore journals calls under the session directory and
+    is shared by every process using the same session, so one budget is
+    enforced across worker processes. limits.json is only rewritten when
+    a limit changes. With the sqlite storage backend, calls and limits are
+    kept in the shared SessionStore instead.
+
     Usage:
         limiter = RateLimiter(session_id="my-session")
 
@@ -35,86 +35,96 @@ class RateLimiter:
         limiter.set_limit("web_fetch", calls_per_hour=20)
         limiter.set_limit("llm", calls_per_hour=100)
 
-        # Before making a call
-        if limiter.can_call("deepsearch"):
-            limiter.record_call("deepsearch", agent="researcher")
+        # Check and record in one atomic step
+        if limiter.try_acquire("deepsearch", agent="researcher"):
             # Make API call
+            pass
         else:
             wait_time = limiter.seconds_until_available("deepsearch")
-            print(f"Rate limited. Wait {wait_time}s")
+            if wait_time is None:
+                print("deepsearch is disabled")
+            else:
+                print(f"Rate limited. Wait {wait_time}s")
+
+        # Or block until a slot frees up
+        if limiter.acquire("web_fetch", agent="researcher", timeout=30):
+            # Make API call
+            pass
     """
 
     DEFAULT_CALLS_PER_HOUR = 100
 
-    def __init__(self, session_id: str = "default", data_dir: Path = None):
+    def __init__(self,
+                 session_id: str = "default",
+                 data_dir: Path = None,
+                 store: CallStore = None,
+                 session_store: Optional[SessionStore] = None):
         """
         Initialize rate limiter with persistent storage.
 
         Args:
             session_id: Session identifier for isolation
             data_dir: Directory for persistent storage
+            store: Call store backend (defaults to a FileCallStore in the
+                session directory, or the session store's)
+            session_store: Session store holding calls and limits (defaults
+                to the configured storage backend unless data_dir is given)
         """
+        self.session_id = session_id
+        self.session_store = session_store if session_store is not None else get_session_store(data_dir)
         if data_dir is None:
             data_dir = get_data_dir("rate_limiter")
 
         self.data_dir = Path(data_dir) / session_id
-        self.data_dir.mkdir(parents=True, exist_ok=True)
+        if self.session_store is None:
+            self.data_dir.mkdir(parents=True, exist_ok=True)
 
-        self.calls_file = self.data_dir / "calls.json"
         self.limits_file = self.data_dir / "limits.json"
 
         self.window_seconds = 3600  # 1 hour
-        self.calls: List[CallRecord] = []
+        if store is None:
+            if self.session_store is not None:
+                store = self.session_store.call_store(session_id)
+            else:
+                store = FileCallStore(self.data_dir, self.window_seconds)
+        self.store = store
         self.limits: Dict[str, int] = {}
 
         self._load_state()
 
+    @property
+    def calls(self) -> List[CallRecord]:
+        """All calls in the current window, oldest first."""
+        return self.store.calls(self.window_seconds)
+
     def _load_state(self):
-        """Load call history and limits from disk."""
-        # Load calls
-        if self.calls_file.exists():
-            try:
-                with open(self.calls_file, 'r') as f:
-                    data = json.load(f)
-                    self.calls = [CallRecord(**c) for c in data.get("calls", [])]
-            except (json.JSONDecodeError, KeyError):
-                self.calls = []
-
-        # Load limits
-        if self.limits_file.exists():
+        """Load limits from disk."""
+        if self.session_store is not None:
+            self.limits = self.session_store.load_limits(self.session_id)
+        elif self.limits_file.exists():
             try:
                 with open(self.limits_file, 'r') as f:
                     self.limits = json.load(f)
             except json.JSONDecodeError:
                 self.limits = {}
 
-    def _save_state(self):
-        """Persist state to disk."""
-        self._prune_old_calls()
-
-        with open(self.calls_file, 'w') as f:
-            json.dump({
-                "calls": [asdict(c) for c in self.calls],
-                "window_seconds": self.window_seconds
-            }, f, indent=2)
-
-        with open(self.limits_file, 'w') as f:
-            json.dump(self.limits, f, indent=2)
-
-    def _prune_old_calls(self):
-        """Remove calls older than the window."""
-        cutoff = time.time() - self.window_seconds
-        self.calls = [c for c in self.calls if c.timestamp > cutoff]
+    def _save_limits(self):
+        """Persist configured limits."""
+        if self.session_store is not None:
+            self.session_store.save_limits(self.session_id, self.limits)
+        else:
+            atomic_write_json(self.limits_file, self.limits)
 
     def _calls_in_window(self, endpoint: str) -> int:
         """Count calls for an endpoint in the current window."""
-        self._prune_old_calls()
-        return sum(1 for c in self.calls if c.endpoint == endpoint)
+        return self.store.count(endpoint, self.window_seconds)
 
     def set_limit(self, endpoint: str, calls_per_hour: int) -> None:
         """Set the rate limit for an endpoint."""
+        if self.limits.get(endpoint) == calls_per_hour:
+            return
         self.limits[endpoint] = calls_per_hour
-        self._save_state()
+        self._save_limits()
 
     def get_limit(self, endpoint: str) -> int:
         """Get the rate limit for an endpoint."""
@@ -127,32 +137,70 @@ class RateLimiter:
 
     def record_call(self, endpoint: str, agent: str = "unknown") -> None:
         """Record a new API call."""
-        self.calls.append(CallRecord(
-            timestamp=time.time(),
-            endpoint=endpoint,
-            agent=agent
-        ))
-        self._save_state()
-
-    def seconds_until_available(self, endpoint: str) -> int:
+        self.store.record(endpoint, agent)
+
+    def try_acquire(self, endpoint: str, agent: str = "unknown", cost: int = 1) -> bool:
         """
-        Calculate seconds until a call slot becomes available.
+        Atomically check the limit and record a call if it fits.
+
+        Args:
+            endpoint: Endpoint being called
+            agent: Which persona/agent is calling
+            cost: Number of call units this call consumes
 
         Returns:
-            0 if calls are available, otherwise seconds to wait
+            True if the call was recorded and may proceed
+        """
+        return self.store.acquire(endpoint, agent, self.get_limit(endpoint),
+                                  self.window_seconds, cost) == 0
+
+    def acquire(self,
+                endpoint: str,
+                agent: str = "unknown",
+                cost: int = 1,
+                timeout: Optional[float] = None) -> bool:
         """
-        if self.can_call(endpoint):
-            return 0
+        Block until a call fits under the limit, then record it.
 
-        # Find oldest call for this endpoint in window
-        self._prune_old_calls()
-        endpoint_calls = [c for c in self.calls if c.endpoint == endpoint]
-        if not endpoint_calls:
-            return 0
+        Sleeps until the exact moment the blocking call leaves the window
+        rather than polling.
 
-        oldest = min(c.timestamp for c in endpoint_calls)
-        reset_time = oldest + self.window_seconds
-        wait = reset_time - time.time()
+        Args:
+            endpoint: Endpoint being called
+            agent: Which persona/agent is calling
+            cost: Number of call units this call consumes
+            timeout: Maximum seconds to wait (None waits indefinitely)
+
+        Returns:
+            True if the call was recorded, False on timeout or if cost can
+            never fit under the limit
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.store.acquire(endpoint, agent, self.get_limit(endpoint),
+                                      self.window_seconds, cost)
+            if wait == 0:
+                return True
+            if wait == float("inf"):
+                return False
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def seconds_until_available(self, endpoint: str) -> Optional[int]:
+        """
+        Calculate seconds until a call slot becomes available.
+
+        Returns:
+            0 if calls are available, otherwise seconds to wait; None if no
+            slot will ever free up (the endpoint's limit is 0)
+        """
+        wait = self.store.wait_time(endpoint, self.get_limit(endpoint), self.window_seconds)
+        if wait == float("inf"):
+            return None
 
         return max(0, int(wait))
 
@@ -172,11 +220,11 @@ class RateLimiter:
                 "calls_remaining": max(0, limit - calls_used),
                 "limit": limit,
                 "seconds_until_available": self.seconds_until_available(endpoint),
-                "can_call": self.can_call(endpoint)
+                "can_call": calls_used < limit
             }
         else:
             # Return status for all tracked endpoints
-            endpoints = set(self.limits.keys()) | set(c.endpoint for c in self.calls)
+            endpoints = set(self.limits.keys()) | set(self.store.endpoints(self.window_seconds))
             return {ep: self.get_status(ep) for ep in endpoints}
 
     def reset(self, endpoint: str = None) -> None:
@@ -186,11 +234,7 @@ class RateLimiter:
         Args:
             endpoint: Specific endpoint to reset, or None for all
         """
-        if endpoint:
-            self.calls = [c for c in self.calls if c.endpoint != endpoint]
-        else:
-            self.calls = []
-        self._save_state()
+        self.store.reset(endpoint)
 
 
 # Default limits for common tools
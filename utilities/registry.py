@@ -0,0 +1,308 @@
+"""
+Slipstream Registry
+
+Discovers and caches framework definitions: personas, skills, workflows
+and constitutions.
+
+Every file is parsed once and cached keyed by (path, mtime, size). A cached
+entry is only re-validated with a stat() after `revalidate_after` seconds,
+so repeated lookups (e.g. persona switches within a long session) cost a
+dict lookup instead of YAML parsing and disk reads. Directory listings are
+cached the same way and re-scanned only when a directory changes.
+
+Usage:
+    registry = get_registry()
+
+    bundle = registry.persona_bundle("producer")
+    bundle.persona              # parsed personas/producer.yaml
+    bundle.primary_constitution # constitution/AI_Engineer_Constitution.md
+    bundle.role_constitution    # constitution/roles/producer_constitution.md
+
+    registry.skill("deep_researcher")
+    registry.workflow("standard")
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+FRAMEWORK_ROOT = Path(__file__).resolve().parent.parent
+
+SKILL_CATEGORIES = ("core", "quality", "domain")
+
+
+@dataclass(frozen=True)
+class PersonaBundle:
+    """Everything the persona loading protocol needs before activation."""
+    name: str
+    persona: Dict[str, Any]
+    primary_constitution: str
+    role_constitution: str
+
+
+@dataclass
+class _CacheEntry:
+    stamp: Tuple[int, int]
+    value: Any
+    checked_at: float
+
+
+def _parse_yaml(text: str) -> Any:
+    if yaml is None:
+        raise ImportError("PyYAML is required to load Slipstream definitions")
+    return yaml.safe_load(text) or {}
+
+
+class Registry:
+    """
+    Parsed-once cache of Slipstream definition files.
+
+    Directory locations come from the `paths` section of slipstream.yaml,
+    falling back to the standard layout.
+    """
+
+    def __init__(self, root: Path = None, revalidate_after: float = 1.0):
+        """
+        Initialize registry.
+
+        Args:
+            root: Framework root containing slipstream.yaml
+            revalidate_after: Seconds a cached entry is trusted before its
+                file is stat()ed again (0 re-checks on every lookup)
+        """
+        self.root = Path(root) if root else FRAMEWORK_ROOT
+        self.revalidate_after = revalidate_after
+
+        self._lock = threading.RLock()
+        self._files: Dict[Path, _CacheEntry] = {}
+        self._listings: Dict[Tuple[Path, str], _CacheEntry] = {}
+        self._bundles: Dict[str, Tuple[float, PersonaBundle]] = {}
+
+    # ------------------------------------------------------------------
+    # Cache primitives
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _cached(self, cache: Dict, key, path: Path, build: Callable[[], Any]) -> Any:
+        """Return a cached value for path, rebuilding it if the file changed."""
+        now = time.monotonic()
+        with self._lock:
+            entry = cache.get(key)
+            if entry is not None and now - entry.checked_at < self.revalidate_after:
+                return entry.value
+
+            stamp = self._stamp(path)
+            if stamp is None:
+                cache.pop(key, None)
+                raise FileNotFoundError(path)
+
+            if entry is None or entry.stamp != stamp:
+                entry = _CacheEntry(stamp=stamp, value=build(), checked_at=now)
+                cache[key] = entry
+            else:
+                entry.checked_at = now
+            return entry.value
+
+    def load_text(self, path: Path) -> str:
+        """Read a text file through the cache."""
+        path = self._resolve(path)
+        return self._cached(self._files, path, path,
+                            lambda: path.read_text(encoding="utf-8"))
+
+    def load_yaml(self, path: Path) -> Any:
+        """Parse a YAML file through the cache."""
+        path = self._resolve(path)
+        return self._cached(self._files, path, path,
+                            lambda: _parse_yaml(path.read_text(encoding="utf-8")))
+
+    def _listing(self, directory: Path, pattern: str) -> Dict[str, Path]:
+        """Map file stem -> path for a directory, re-scanned when it changes."""
+        def scan() -> Dict[str, Path]:
+            found = {}
+            for path in sorted(directory.glob(pattern)):
+                if path.name.startswith("_"):
+                    continue  # Schemas
+                found[path.stem] = path
+            return found
+
+        try:
+            return self._cached(self._listings, (directory, pattern), directory, scan)
+        except FileNotFoundError:
+            return {}
+
+    def invalidate(self) -> None:
+        """Drop every cached entry."""
+        with self._lock:
+            self._files.clear()
+            self._listings.clear()
+            self._bundles.clear()
+
+    # ------------------------------------------------------------------
+    # Layout
+    # ------------------------------------------------------------------
+
+    def _resolve(self, path: Path) -> Path:
+        path = Path(path)
+        return path if path.is_absolute() else Path(os.path.normpath(self.root / path))
+
+    def config(self) -> Dict[str, Any]:
+        """Parsed slipstream.yaml."""
+        try:
+            return self.load_yaml(self.root / "slipstream.yaml")
+        except FileNotFoundError:
+            return {}
+
+    def _path(self, key: str, default: str) -> Path:
+        paths = self.config().get("paths", {})
+        return self._resolve(paths.get(key, default))
+
+    def _skill_dirs(self) -> List[Path]:
+        configured = self.config().get("paths", {}).get("skills", {})
+        return [self._resolve(configured.get(category, f"./skills/{category}"))
+                for category in SKILL_CATEGORIES]
+
+    # ------------------------------------------------------------------
+    # Discovery
+    # ------------------------------------------------------------------
+
+    def list_personas(self) -> List[str]:
+        return list(self._listing(self._path("personas", "./personas"), "*.yaml"))
+
+    def list_workflows(self) -> List[str]:
+        return list(self._listing(self._path("workflows", "./workflows"), "*.yaml"))
+
+    def list_skills(self) -> List[str]:
+        names: List[str] = []
+        for directory in self._skill_dirs():
+            names.extend(self._listing(directory, "*.yaml"))
+        return names
+
+    def list_roles(self) -> List[str]:
+        roles_dir = self._path("constitution_roles", "./constitution/roles")
+        suffix = "_constitution"
+        return [stem[:-len(suffix)] for stem in self._listing(roles_dir, "*.md")
+                if stem.endswith(suffix)]
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def _lookup(self, listing: Dict[str, Path], kind: str, name: str) -> Dict[str, Any]:
+        path = listing.get(name)
+        if path is None:
+            raise KeyError(f"Unknown {kind}: {name}")
+        return self.load_yaml(path)
+
+    def persona(self, name: str) -> Dict[str, Any]:
+        """Parsed personas/{name}.yaml."""
+        return self._lookup(self._listing(self._path("personas", "./personas"), "*.yaml"),
+                            "persona", name)
+
+    def workflow(self, name: str) -> Dict[str, Any]:
+        """Parsed workflows/{name}.yaml."""
+        return self._lookup(self._listing(self._path("workflows", "./workflows"), "*.yaml"),
+                            "workflow", name)
+
+    def workflow_path(self, name: str) -> Path:
+        """Location of workflows/{name}.yaml."""
+        path = self._listing(self._path("workflows", "./workflows"), "*.yaml").get(name)
+        if path is None:
+            raise KeyError(f"Unknown workflow: {name}")
+        return path
+
+    def workflow_schema_path(self) -> Path:
+        """Location of workflows/_schema.yaml."""
+        return self._path("workflows", "./workflows") / "_schema.yaml"
+
+    def skill(self, name: str) -> Dict[str, Any]:
+        """Parsed skill definition from any skill category."""
+        for directory in self._skill_dirs():
+            path = self._listing(directory, "*.yaml").get(name)
+            if path is not None:
+                return self.load_yaml(path)
+        raise KeyError(f"Unknown skill: {name}")
+
+    def primary_constitution(self) -> str:
+        """Text of the primary (supreme) constitution."""
+        primary = self.config().get("constitution", {}).get("primary", {})
+        return self.load_text(primary.get("path", "./constitution/AI_Engineer_Constitution.md"))
+
+    def role_constitution(self, role: str) -> str:
+        """Text of a role constitution."""
+        roles = self.config().get("constitution", {}).get("roles", {})
+        path = roles.get(role, {}).get("path")
+        if path is None:
+            roles_dir = self._path("constitution_roles", "./constitution/roles")
+            path = roles_dir / f"{role}_constitution.md"
+        try:
+            return self.load_text(path)
+        except FileNotFoundError:
+            raise KeyError(f"Unknown role constitution: {role}") from None
+
+    def persona_bundle(self, name: str) -> PersonaBundle:
+        """
+        Load a persona with its constitutions per the persona_loading protocol.
+
+        Constitution paths declared in the persona file take precedence over
+        slipstream.yaml and the {name}_constitution.md convention. Bundles
+        are memoized and rebuilt only when one of their files changes.
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._bundles.get(name)
+            if cached is not None and now - cached[0] < self.revalidate_after:
+                return cached[1]
+
+            bundle = self._build_bundle(name)
+            if cached is not None and cached[1] == bundle:
+                bundle = cached[1]  # Keep identity stable for downstream caches
+            self._bundles[name] = (now, bundle)
+            return bundle
+
+    def _build_bundle(self, name: str) -> PersonaBundle:
+        persona = self.persona(name)
+        declared = persona.get("constitution", {}) if isinstance(persona, dict) else {}
+
+        if declared.get("primary"):
+            primary = self.load_text(declared["primary"])
+        else:
+            primary = self.primary_constitution()
+
+        if declared.get("role"):
+            role = self.load_text(declared["role"])
+        else:
+            role = self.role_constitution(name)
+
+        return PersonaBundle(
+            name=name,
+            persona=persona,
+            primary_constitution=primary,
+            role_constitution=role,
+        )
+
+
+# Module-level singleton
+_registry: Optional[Registry] = None
+
+
+def get_registry() -> Registry:
+    """Get or create the global registry instance."""
+    global _registry
+    if _registry is None:
+        _registry = Registry()
+    return _registry
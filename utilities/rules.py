@@ -0,0 +1,58 @@
+"""
+Slipstream Rules Loader
+
+Reads utility configuration from rules.yaml.
+
+The parsed document is cached and re-read only when the file changes.
+PyYAML is optional: without it (or without the file) every section is
+empty and utilities fall back to their built-in defaults.
+"""
+
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+RULES_FILE = Path(__file__).parent / "rules.yaml"
+
+_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+
+
+def load_rules(path: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Load the rules document.
+
+    Args:
+        path: Rules file (defaults to utilities/rules.yaml)
+
+    Returns:
+        Parsed rules, or {} if the file or PyYAML is unavailable
+    """
+    path = Path(path or RULES_FILE)
+    if yaml is None:
+        return {}
+
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return {}
+
+    key = str(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _cache.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    with open(path, 'r', encoding='utf-8') as f:
+        rules = yaml.safe_load(f) or {}
+    _cache[key] = (stamp, rules)
+    return rules
+
+
+def get_rules_section(name: str, path: Optional[Path] = None) -> Dict[str, Any]:
+    """Get one top-level section of the rules (e.g. "rate_limiter")."""
+    section = load_rules(path).get(name)
+    return section if isinstance(section, dict) else {}
@@ -0,0 +1,372 @@
+"""
+Slipstream Session Context
+
+A session's context.json (phase, persona, goals, artifacts_index), kept
+up to date without rewriting it on every change.
+
+Updates are JSON Patch (RFC 6902) operations appended as one line to
+context.patch.jsonl; the snapshot is only rewritten when the log has
+grown past compact_every entries. The snapshot records in "_version"
+which patches it already contains, so a crash between writing the
+snapshot and truncating the log never applies a patch twice.
+
+Readers get a cached view. Each read compares the snapshot's and the
+log's file stamps with the ones the view was built from; if only the log
+grew, just the new lines are applied, so unchanged sessions cost two
+stat() calls per read.
+
+Usage:
+    context = get_session_context(session_dir)
+    context.read()["phase"]
+
+    context.update({"phase": "research", "active_persona": "researcher"})
+    context.append("artifacts_index", {"id": "a-17", "path": "..."})
+    context.patch([{"op": "remove", "path": "/goals/0"}])
+"""
+
+import copy
+import json
+import threading
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from .io import atomic_write_json, file_lock, load_json_gracefully
+from .watch import FileStamp, file_stamp
+
+# Rewrite the snapshot once the patch log holds this many entries
+DEFAULT_COMPACT_EVERY = 200
+
+VERSION_KEY = "_version"
+
+
+class PatchError(ValueError):
+    """A JSON Patch operation could not be applied."""
+
+
+def _parse_pointer(path: str) -> List[str]:
+    """Split a JSON Pointer ("/a/b~1c") into unescaped tokens."""
+    if path == "":
+        return []
+    if not path.startswith("/"):
+        raise PatchError(f"Invalid JSON pointer: {path!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in path[1:].split("/")]
+
+
+def _index(container: List[Any], token: str, path: str, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise PatchError(f"Invalid array index in {path!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise PatchError(f"Array index out of range in {path!r}")
+    return index
+
+
+def _resolve(document: Any, tokens: List[str], path: str) -> Any:
+    """Container addressed by all but the last token."""
+    node = document
+    for token in tokens:
+        if isinstance(node, dict):
+            if token not in node:
+                raise PatchError(f"Path not found: {path!r}")
+            node = node[token]
+        elif isinstance(node, list):
+            node = node[_index(node, token, path)]
+        else:
+            raise PatchError(f"Path not found: {path!r}")
+    return node
+
+
+def _get(document: Any, path: str) -> Any:
+    tokens = _parse_pointer(path)
+    if not tokens:
+        return document
+    parent = _resolve(document, tokens[:-1], path)
+    if isinstance(parent, dict):
+        if tokens[-1] not in parent:
+            raise PatchError(f"Path not found: {path!r}")
+        return parent[tokens[-1]]
+    if isinstance(parent, list):
+        return parent[_index(parent, tokens[-1], path)]
+    raise PatchError(f"Path not found: {path!r}")
+
+
+def _add(document: Any, path: str, value: Any) -> None:
+    tokens = _parse_pointer(path)
+    if not tokens:
+        raise PatchError("Cannot replace the whole document")
+    parent = _resolve(document, tokens[:-1], path)
+    if isinstance(parent, dict):
+        parent[tokens[-1]] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, tokens[-1], path, allow_end=True), value)
+    else:
+        raise PatchError(f"Path not found: {path!r}")
+
+
+def _remove(document: Any, path: str) -> Any:
+    tokens = _parse_pointer(path)
+    if not tokens:
+        raise PatchError("Cannot remove the whole document")
+    parent = _resolve(document, tokens[:-1], path)
+    if isinstance(parent, dict):
+        if tokens[-1] not in parent:
+            raise PatchError(f"Path not found: {path!r}")
+        return parent.pop(tokens[-1])
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, tokens[-1], path))
+    raise PatchError(f"Path not found: {path!r}")
+
+
+def apply_patch(document: Dict[str, Any], operations: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Apply JSON Patch operations to a document in place.
+
+    Supports add, remove, replace, move, copy and test. Values are copied
+    into the document, so later changes to the caller's objects do not
+    leak into it.
+
+    Raises:
+        PatchError: If an operation is malformed or does not apply; the
+            document may then be partially patched
+    """
+    for operation in operations:
+        op, path = operation.get("op"), operation.get("path")
+        if not isinstance(path, str):
+            raise PatchError(f"Operation without a path: {operation!r}")
+
+        if op == "add":
+            _add(document, path, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            _remove(document, path)
+        elif op == "replace":
+            _remove(document, path)
+            _add(document, path, copy.deepcopy(operation["value"]))
+        elif op == "move":
+            _add(document, path, _remove(document, operation["from"]))
+        elif op == "copy":
+            _add(document, path, copy.deepcopy(_get(document, operation["from"])))
+        elif op == "test":
+            if _get(document, path) != operation["value"]:
+                raise PatchError(f"Test failed at {path!r}")
+        else:
+            raise PatchError(f"Unsupported patch operation: {op!r}")
+    return document
+
+
+def _pointer(key: str) -> str:
+    return "/" + key.replace("~", "~0").replace("/", "~1")
+
+
+class SessionContext:
+    """A session's context document backed by a snapshot plus a patch log."""
+
+    def __init__(self, session_dir: Path, compact_every: int = DEFAULT_COMPACT_EVERY):
+        """
+        Initialize session context.
+
+        Args:
+            session_dir: Directory holding the session's context.json
+            compact_every: Patch log entries that trigger a snapshot rewrite
+        """
+        self.session_dir = Path(session_dir)
+        self.snapshot_file = self.session_dir / "context.json"
+        self.log_file = self.session_dir / "context.patch.jsonl"
+        self.lock_file = self.session_dir / "context.lock"
+        self.compact_every = compact_every
+
+        self._lock = threading.RLock()
+        self._document: Optional[Dict[str, Any]] = None
+        self._version = 0
+        self._snapshot_stamp: FileStamp = None
+        self._log_stamp: FileStamp = None
+        self._log_offset = 0
+        self._log_entries = 0
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def exists(self) -> bool:
+        return self.snapshot_file.exists()
+
+    @property
+    def version(self) -> int:
+        """Number of patches applied to the document so far."""
+        with self._lock:
+            self._refresh()
+            return self._version
+
+    def read(self) -> Optional[Dict[str, Any]]:
+        """
+        Current document (None if the session is not initialized).
+
+        The returned dict is the shared cached view: treat it as read-only
+        and change the context through update()/patch().
+        """
+        with self._lock:
+            self._refresh()
+            return self._document
+
+    def get(self, key: str, default: Any = None) -> Any:
+        document = self.read()
+        return document.get(key, default) if document is not None else default
+
+    def _stamps(self) -> Tuple[FileStamp, FileStamp]:
+        return file_stamp(self.snapshot_file), file_stamp(self.log_file)
+
+    def _refresh(self, locked: bool = False) -> None:
+        """Bring the cached view up to date with the files. Caller holds _lock."""
+        snapshot_stamp, log_stamp = self._stamps()
+        if (self._document is not None and snapshot_stamp == self._snapshot_stamp
+                and log_stamp == self._log_stamp):
+            return
+
+        if not locked:
+            # Another process may be compacting; read a consistent pair
+            with file_lock(self.lock_file) if self.session_dir.exists() else nullcontext():
+                self._refresh(locked=True)
+            return
+
+        if snapshot_stamp != self._snapshot_stamp or self._document is None or \
+                (log_stamp or (0, 0, 0))[1] < self._log_offset:
+            self._load_snapshot()
+        self._replay_log()
+        self._snapshot_stamp, self._log_stamp = self._stamps()
+
+    def _load_snapshot(self) -> None:
+        data = load_json_gracefully(self.snapshot_file)
+        if not isinstance(data, dict) or data.get("_corrupt"):
+            data = None
+        self._document = data
+        self._version = int(data.pop(VERSION_KEY, 0)) if data is not None else 0
+        self._log_offset = 0
+        self._log_entries = 0
+
+    def _replay_log(self) -> None:
+        """Apply log entries newer than the view, from where it left off."""
+        if not self.log_file.exists():
+            self._log_offset = 0
+            self._log_entries = 0
+            return
+        with open(self.log_file, "rb") as f:
+            f.seek(self._log_offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # Entry still being written
+                self._log_offset += len(raw)
+                self._log_entries += 1
+                try:
+                    entry = json.loads(raw)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                if self._document is None or entry.get("v", 0) <= self._version:
+                    continue  # Already in the snapshot
+                apply_patch(self._document, entry.get("ops", []))
+                self._version = entry["v"]
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def initialize(self, document: Dict[str, Any]) -> bool:
+        """
+        Create the context if it does not exist yet.
+
+        Returns:
+            True if it was created
+        """
+        self.session_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock, file_lock(self.lock_file):
+            if self.snapshot_file.exists():
+                return False
+            if self.log_file.exists():
+                self.log_file.unlink()  # Left over from a deleted snapshot
+            atomic_write_json(self.snapshot_file, {**document, VERSION_KEY: 0})
+            self._document = None
+            self._refresh(locked=True)
+            return True
+
+    def patch(self, operations: List[Dict[str, Any]]) -> int:
+        """
+        Apply JSON Patch operations and append them to the log.
+
+        If any operation fails nothing is written, and the cached view is
+        reloaded from disk on the next read.
+
+        Returns:
+            The new version
+
+        Raises:
+            PatchError: If an operation does not apply
+            FileNotFoundError: If the session is not initialized
+        """
+        operations = list(operations)
+        with self._lock, file_lock(self.lock_file):
+            self._refresh(locked=True)
+            if self._document is None:
+                raise FileNotFoundError(f"Session context not initialized: {self.snapshot_file}")
+            if not operations:
+                return self._version
+
+            version = self._version + 1
+            line = (json.dumps({"v": version, "ops": operations}, ensure_ascii=False) + "\n").encode("utf-8")
+            try:
+                apply_patch(self._document, operations)
+                with open(self.log_file, "ab") as f:
+                    f.write(line)
+            except BaseException:
+                self._document = None  # Possibly half-applied; reload from disk
+                raise
+
+            self._version = version
+            self._log_offset += len(line)
+            self._log_entries += 1
+            self._snapshot_stamp, self._log_stamp = self._stamps()
+
+            if self._log_entries >= self.compact_every:
+                self._compact()
+            return version
+
+    def update(self, fields: Dict[str, Any]) -> int:
+        """Set top-level fields (e.g. phase, active_persona)."""
+        return self.patch([{"op": "add", "path": _pointer(key), "value": value}
+                           for key, value in fields.items()])
+
+    def append(self, key: str, *items: Any) -> int:
+        """Append items to a top-level list (e.g. goals, artifacts_index)."""
+        path = _pointer(key) + "/-"
+        return self.patch([{"op": "add", "path": path, "value": item} for item in items])
+
+    def compact(self) -> None:
+        """Fold the patch log into the snapshot now."""
+        with self._lock, file_lock(self.lock_file):
+            self._refresh(locked=True)
+            if self._document is not None:
+                self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite the snapshot, then truncate the log. Caller holds both locks."""
+        atomic_write_json(self.snapshot_file, {**self._document, VERSION_KEY: self._version}, compact=True)
+        with open(self.log_file, "wb"):
+            pass
+        self._log_offset = 0
+        self._log_entries = 0
+        self._snapshot_stamp, self._log_stamp = self._stamps()
+
+
+_contexts: Dict[str, SessionContext] = {}
+_contexts_lock = threading.Lock()
+
+
+def get_session_context(session_dir: Path) -> SessionContext:
+    """Shared SessionContext for a session directory (one cached view per process)."""
+    key = str(Path(session_dir).resolve())
+    with _contexts_lock:
+        context = _contexts.get(key)
+        if context is None:
+            context = SessionContext(Path(session_dir))
+            _contexts[key] = context
+        return context
@@ -0,0 +1,582 @@
+"""
+Slipstream Session Store
+
+Optional SQLite backend holding the session state of every utility.
+
+By default each utility keeps its own JSON files under get_data_dir(...):
+audit/<sid>/events.jsonl, rate_limiter/<sid>/calls.json,
+circuit_breaker/<sid>/state.json and hitl/gates.db. With the sqlite
+backend, AuditTrail, RateLimiter, CircuitBreaker(Pool) and HITLManager
+share one WAL database, {data root}/slipstream.db, instead: an operation
+is one statement on an open connection rather than several small file
+opens and rewrites, and questions that span utilities ("sessions with an
+OPEN circuit and pending gates") are single indexed queries.
+
+    Backend   Selected by
+    json      default
+    sqlite    SLIPSTREAM_STORAGE=sqlite, or rules.yaml storage.backend
+
+Statements use fixed SQL with bound parameters, so sqlite3's statement
+cache prepares each once per connection. Audit lines are stored exactly
+as they would be written to events.jsonl, signatures and hash chain
+included, and HITL gate files remain the signed source of truth; only
+their index moves into the database.
+
+Migrate existing data between the backends (the source is left in place):
+
+    python -m utilities migrate --to sqlite
+    python -m utilities migrate --to json
+
+Summary checkpoints record which backend their audit log position belongs
+to, and re-derive it from their event count after a migration.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .gate_index import GateIndex, get_gate_index
+from .io import atomic_write_json, get_data_root
+from .rate_limit_store import FileCallStore, SQLiteCallStore
+from .rules import get_rules_section
+
+BACKEND_JSON = "json"
+BACKEND_SQLITE = "sqlite"
+BACKENDS = (BACKEND_JSON, BACKEND_SQLITE)
+
+STORE_FILE = "slipstream.db"
+
+# Rate limiter window migrated between backends (RateLimiter.window_seconds)
+RATE_WINDOW_SECONDS = 3600
+
+# Rows fetched per round trip when streaming audit lines
+AUDIT_PAGE_SIZE = 1000
+
+
+def storage_backend() -> str:
+    """Configured storage backend: SLIPSTREAM_STORAGE, then rules.yaml storage.backend."""
+    backend = os.environ.get("SLIPSTREAM_STORAGE") or get_rules_section("storage").get("backend")
+    backend = str(backend or BACKEND_JSON).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown storage backend: {backend} (expected one of {', '.join(BACKENDS)})")
+    return backend
+
+
+class SessionStore:
+    """One SQLite database in WAL mode holding every utility's session state."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._gate_index: Optional[GateIndex] = None
+
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30,
+                                     isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS audit_events ("
+            " session_id TEXT NOT NULL,"
+            " seq INTEGER NOT NULL,"
+            " timestamp REAL,"
+            " event_type TEXT,"
+            " agent TEXT,"
+            " phase TEXT,"
+            " signature TEXT NOT NULL,"
+            " line BLOB NOT NULL,"
+            " PRIMARY KEY (session_id, seq));"
+            "CREATE INDEX IF NOT EXISTS audit_events_type ON audit_events (session_id, event_type, seq);"
+            "CREATE INDEX IF NOT EXISTS audit_events_time ON audit_events (session_id, timestamp);"
+
+            "CREATE TABLE IF NOT EXISTS breaker_state ("
+            " session_id TEXT PRIMARY KEY,"
+            " state TEXT NOT NULL,"
+            " data TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS breaker_state_state ON breaker_state (state);"
+
+            "CREATE TABLE IF NOT EXISTS breaker_history ("
+            " id INTEGER PRIMARY KEY,"
+            " session_id TEXT NOT NULL,"
+            " entry TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS breaker_history_session ON breaker_history (session_id, id);"
+
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            " session_id TEXT NOT NULL,"
+            " endpoint TEXT NOT NULL,"
+            " calls_per_hour INTEGER NOT NULL,"
+            " PRIMARY KEY (session_id, endpoint));"
+        )
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Run a block in one BEGIN IMMEDIATE transaction.
+
+        An exception rolls everything back. Nested use joins the outer
+        transaction.
+        """
+        with self._lock:
+            if self._conn.in_transaction:
+                yield
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def close(self) -> None:
+        """Close the database connections."""
+        with self._lock:
+            self._conn.close()
+            if self._gate_index is not None:
+                self._gate_index.close()
+
+    # ------------------------------------------------------------------
+    # Audit trail
+    # ------------------------------------------------------------------
+
+    def audit_head(self, session_id: str) -> Tuple[int, str]:
+        """(next sequence number, signature of the last event or "")."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT seq, signature FROM audit_events WHERE session_id = ?"
+                " ORDER BY seq DESC LIMIT 1", (session_id,)).fetchone()
+        return (row[0] + 1, row[1]) if row else (0, "")
+
+    def audit_append(self, session_id: str, rows: Sequence[Tuple]) -> None:
+        """
+        Insert event rows.
+
+        Args:
+            rows: (seq, timestamp, event_type, agent, phase, signature, line)
+        """
+        with self.transaction():
+            self._conn.executemany(
+                "INSERT INTO audit_events"
+                " (session_id, seq, timestamp, event_type, agent, phase, signature, line)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(session_id,) + tuple(row) for row in rows])
+
+    def audit_lines(self, session_id: str, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+        """Stream (seq, line) for seq in [start, stop), oldest first, a page at a time."""
+        seq = start
+        while stop is None or seq < stop:
+            limit = AUDIT_PAGE_SIZE if stop is None else min(AUDIT_PAGE_SIZE, stop - seq)
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT seq, line FROM audit_events WHERE session_id = ? AND seq >= ?"
+                    " ORDER BY seq LIMIT ?", (session_id, seq, limit)).fetchall()
+            if not rows:
+                return
+            for row_seq, line in rows:
+                yield row_seq, bytes(line)
+            seq = rows[-1][0] + 1
+
+    def audit_tail(self, session_id: str, limit: int) -> List[bytes]:
+        """The last `limit` event lines, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT line FROM audit_events WHERE session_id = ? ORDER BY seq DESC LIMIT ?",
+                (session_id, limit)).fetchall()
+        return [bytes(row[0]) for row in reversed(rows)]
+
+    def audit_query(self,
+                    session_id: str,
+                    event_type: Optional[str] = None,
+                    agent: Optional[str] = None,
+                    phase: Optional[str] = None,
+                    since: Optional[float] = None,
+                    until: Optional[float] = None,
+                    limit: Optional[int] = None) -> List[bytes]:
+        """Lines of matching events, oldest first (the most recent `limit` if given)."""
+        clauses, params = ["session_id = ?"], [session_id]
+        for column, value in (("event_type", event_type), ("agent", agent), ("phase", phase)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp <= ?")
+            params.append(until)
+        sql = f"SELECT line FROM audit_events WHERE {' AND '.join(clauses)} ORDER BY seq DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(max(0, limit))
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [bytes(row[0]) for row in reversed(rows)]
+
+    def audit_count(self, session_id: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM audit_events WHERE session_id = ?",
+                                      (session_id,)).fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # Circuit breakers
+    # ------------------------------------------------------------------
+
+    def load_breaker(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """A session's breaker state (None if it has none yet)."""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM breaker_state WHERE session_id = ?",
+                                     (session_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_breakers(self, items: Iterable[Tuple[str, Dict[str, Any], Optional[List[Dict[str, Any]]]]]) -> None:
+        """
+        Write breaker states and their new history entries in one transaction.
+
+        Args:
+            items: (session_id, state, transitions or None)
+        """
+        with self.transaction():
+            for session_id, state, transitions in items:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO breaker_state (session_id, state, data) VALUES (?, ?, ?)",
+                    (session_id, state["state"], json.dumps(state)))
+                if transitions:
+                    self.append_breaker_history(session_id, transitions)
+
+    def save_breaker(self, session_id: str, state: Dict[str, Any]) -> None:
+        self.save_breakers([(session_id, state, None)])
+
+    def append_breaker_history(self, session_id: str, entries: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO breaker_history (session_id, entry) VALUES (?, ?)",
+                [(session_id, json.dumps(entry)) for entry in entries])
+
+    def breaker_history(self, session_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """The last `limit` transitions (<= 0 for all), oldest first."""
+        sql = "SELECT entry FROM breaker_history WHERE session_id = ? ORDER BY id DESC"
+        params: List[Any] = [session_id]
+        if limit > 0:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    # ------------------------------------------------------------------
+    # Rate limiter
+    # ------------------------------------------------------------------
+
+    def call_store(self, session_id: str) -> SQLiteCallStore:
+        """A rate-limit call store for one session in this database."""
+        return SQLiteCallStore(self.db_path, session_id=session_id)
+
+    def load_limits(self, session_id: str) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT endpoint, calls_per_hour FROM rate_limits WHERE session_id = ?",
+                (session_id,)).fetchall()
+        return dict(rows)
+
+    def save_limits(self, session_id: str, limits: Dict[str, int]) -> None:
+        with self.transaction():
+            self._conn.execute("DELETE FROM rate_limits WHERE session_id = ?", (session_id,))
+            self._conn.executemany(
+                "INSERT INTO rate_limits (session_id, endpoint, calls_per_hour) VALUES (?, ?, ?)",
+                [(session_id, endpoint, limit) for endpoint, limit in limits.items()])
+
+    # ------------------------------------------------------------------
+    # HITL gates
+    # ------------------------------------------------------------------
+
+    def gate_index(self) -> GateIndex:
+        """The gate index, kept in this database."""
+        with self._lock:
+            if self._gate_index is None:
+                self._gate_index = GateIndex(self.db_path)
+            return self._gate_index
+
+    # ------------------------------------------------------------------
+    # Cross-cutting queries
+    # ------------------------------------------------------------------
+
+    def find_sessions(self,
+                      breaker_states: Optional[Iterable[str]] = None,
+                      gate_status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Sessions by circuit state and/or gate status, in one indexed query.
+
+        Args:
+            breaker_states: Only sessions whose circuit is in one of these
+                states (e.g. ["OPEN"])
+            gate_status: Only sessions with at least one gate in this
+                status (e.g. "PENDING_APPROVAL")
+
+        Returns:
+            [{"session_id", "breaker_state", "gates"}], where gates counts
+            the session's gates in gate_status (0 if not filtered)
+        """
+        self.gate_index()  # Creates the gates table on first use
+        states = [str(getattr(s, "value", s)) for s in breaker_states or ()]
+        params: List[Any] = []
+
+        if gate_status is None:
+            sql = "SELECT b.session_id, b.state, 0 FROM breaker_state b"
+        elif states:
+            sql = ("SELECT b.session_id, b.state, COUNT(*) FROM breaker_state b"
+                   " JOIN gates g ON g.session_id = b.session_id AND g.status = ?")
+            params.append(gate_status)
+        else:
+            sql = ("SELECT g.session_id, b.state, COUNT(*) FROM gates g"
+                   " LEFT JOIN breaker_state b ON b.session_id = g.session_id"
+                   " WHERE g.status = ?")
+            params.append(gate_status)
+
+        if states:
+            sql += f" WHERE b.state IN ({', '.join('?' * len(states))})"
+            params.extend(states)
+        sql += " GROUP BY 1 ORDER BY 1"
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [{"session_id": session_id, "breaker_state": state, "gates": gates}
+                for session_id, state, gates in rows]
+
+    # ------------------------------------------------------------------
+    # Migration
+    # ------------------------------------------------------------------
+
+    def import_json(self, data_root: Path) -> Dict[str, int]:
+        """
+        Copy the JSON backend's files under data_root into this store.
+
+        Sessions already in the store are replaced, so re-running is safe.
+
+        Returns:
+            Number of sessions imported per utility
+        """
+        data_root = Path(data_root)
+        counts = {"audit": 0, "circuit_breaker": 0, "rate_limiter": 0, "hitl": 0}
+
+        for session_dir in _session_dirs(data_root / "audit"):
+            log_file = session_dir / "events.jsonl"
+            if not log_file.exists():
+                continue
+            rows = []
+            with open(log_file, "rb") as f:
+                for raw in f:
+                    row = _audit_row(len(rows), raw)
+                    if row is not None:
+                        rows.append(row)
+            with self.transaction():
+                self._conn.execute("DELETE FROM audit_events WHERE session_id = ?", (session_dir.name,))
+                self.audit_append(session_dir.name, rows)
+            counts["audit"] += 1
+
+        for session_dir in _session_dirs(data_root / "circuit_breaker"):
+            state_file = session_dir / "state.json"
+            if not state_file.exists():
+                continue
+            try:
+                state = json.loads(state_file.read_text(encoding="utf-8"))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            history = _read_breaker_history(session_dir)
+            with self.transaction():
+                self._conn.execute("DELETE FROM breaker_history WHERE session_id = ?", (session_dir.name,))
+                self.save_breakers([(session_dir.name, state, history)])
+            counts["circuit_breaker"] += 1
+
+        for session_dir in _session_dirs(data_root / "rate_limiter"):
+            calls = FileCallStore(session_dir, RATE_WINDOW_SECONDS).calls(RATE_WINDOW_SECONDS)
+            limits_file = session_dir / "limits.json"
+            limits = {}
+            if limits_file.exists():
+                try:
+                    limits = json.loads(limits_file.read_text(encoding="utf-8"))
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    limits = {}
+            store = self.call_store(session_dir.name)
+            store.replace_calls(calls)
+            store.close()
+            self.save_limits(session_dir.name, limits)
+            counts["rate_limiter"] += 1
+
+        index = self.gate_index()
+        for session_dir in _session_dirs(data_root / "hitl"):
+            gates_dir = session_dir / "gates"
+            if gates_dir.is_dir():
+                index.ensure_session(session_dir.name, gates_dir)
+                index.rebuild(session_dir.name, gates_dir)
+                counts["hitl"] += 1
+
+        return counts
+
+    def export_json(self, data_root: Path) -> Dict[str, int]:
+        """
+        Write this store's sessions out as the JSON backend's files under data_root.
+
+        Existing files of exported sessions are replaced.
+
+        Returns:
+            Number of sessions exported per utility
+        """
+        data_root = Path(data_root)
+        counts = {"audit": 0, "circuit_breaker": 0, "rate_limiter": 0, "hitl": 0}
+
+        for session_id in self._sessions("audit_events"):
+            log_file = data_root / "audit" / session_id / "events.jsonl"
+            log_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = log_file.with_name(log_file.name + ".migrating")
+            with open(tmp_file, "wb") as f:
+                for _, line in self.audit_lines(session_id):
+                    f.write(line if line.endswith(b"\n") else line + b"\n")
+            os.replace(tmp_file, log_file)
+            for sidecar in (log_file.with_suffix(".idx"), log_file.with_suffix(".idx.names")):
+                if sidecar.exists():
+                    sidecar.unlink()  # Rebuilt from the log on next use
+            counts["audit"] += 1
+
+        for session_id in self._sessions("breaker_state"):
+            session_dir = data_root / "circuit_breaker" / session_id
+            session_dir.mkdir(parents=True, exist_ok=True)
+            atomic_write_json(session_dir / "state.json", self.load_breaker(session_id), compact=True)
+            history = self.breaker_history(session_id, limit=0)
+            with open(session_dir / "history.jsonl", "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(entry) + "\n" for entry in history)
+            counts["circuit_breaker"] += 1
+
+        rate_sessions = set(self._sessions("rate_limits"))
+        if _has_table(self._conn, "calls"):
+            rate_sessions.update(self._sessions("calls"))
+        for session_id in sorted(rate_sessions - {""}):
+            session_dir = data_root / "rate_limiter" / session_id
+            session_dir.mkdir(parents=True, exist_ok=True)
+            store = self.call_store(session_id)
+            calls = store.calls(RATE_WINDOW_SECONDS)
+            store.close()
+            # Drop the old journal first: its sequence numbers are not
+            # covered by the new snapshot and would be replayed on top of it
+            with open(session_dir / "calls.jsonl", "w"):
+                pass
+            atomic_write_json(session_dir / "calls.json", {
+                "calls": [asdict(c) for c in calls],
+                "window_seconds": RATE_WINDOW_SECONDS
+            }, compact=True)
+            atomic_write_json(session_dir / "limits.json", self.load_limits(session_id))
+            counts["rate_limiter"] += 1
+
+        # Gate files never left the hitl directory; re-index them there
+        json_index = get_gate_index(data_root / "hitl")
+        for session_id in self._sessions("gates"):
+            gates_dir = data_root / "hitl" / session_id / "gates"
+            if gates_dir.is_dir():
+                json_index.ensure_session(session_id, gates_dir)
+                json_index.rebuild(session_id, gates_dir)
+                counts["hitl"] += 1
+
+        return counts
+
+    def _sessions(self, table: str) -> List[str]:
+        with self._lock:
+            if not _has_table(self._conn, table):
+                return []
+            return [row[0] for row in self._conn.execute(
+                f"SELECT DISTINCT session_id FROM {table} ORDER BY session_id")]
+
+
+def _has_table(conn: sqlite3.Connection, table: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                        (table,)).fetchone() is not None
+
+
+def _session_dirs(component_dir: Path) -> List[Path]:
+    if not component_dir.is_dir():
+        return []
+    return sorted(p for p in component_dir.iterdir() if p.is_dir())
+
+
+def _audit_row(seq: int, raw: bytes) -> Optional[Tuple]:
+    """Index columns for one events.jsonl line (None if malformed)."""
+    if not raw.strip():
+        return None
+    try:
+        event = json.loads(raw)
+        artifact, audit = event.get("artifact") or {}, event["_audit"]
+    except (json.JSONDecodeError, UnicodeDecodeError, KeyError, TypeError, AttributeError):
+        return None
+    return (seq, artifact.get("timestamp"), artifact.get("event_type"), artifact.get("agent"),
+            artifact.get("phase"), str(audit.get("signature", "")), raw)
+
+
+def _read_breaker_history(session_dir: Path) -> List[Dict[str, Any]]:
+    """Transitions from history.jsonl, or a legacy history.json array."""
+    history: List[Dict[str, Any]] = []
+    journal = session_dir / "history.jsonl"
+    legacy = session_dir / "history.json"
+    if journal.exists():
+        with open(journal, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    history.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    elif legacy.exists():
+        try:
+            history = json.loads(legacy.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            history = []
+    return history
+
+
+_stores: Dict[str, SessionStore] = {}
+_stores_lock = threading.Lock()
+
+
+def open_session_store(data_root: Path = None) -> SessionStore:
+    """Shared SessionStore for a data root (one connection per process)."""
+    root = Path(data_root) if data_root else get_data_root()
+    key = str((root / STORE_FILE).resolve())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = SessionStore(Path(key))
+            _stores[key] = store
+        return store
+
+
+def get_session_store(data_dir: Path = None) -> Optional[SessionStore]:
+    """
+    Store a utility should use by default.
+
+    None means the JSON backend: either it is configured, or the caller
+    passed an explicit data_dir, which always selects JSON files there.
+    """
+    if data_dir is not None or storage_backend() != BACKEND_SQLITE:
+        return None
+    return open_session_store()
+
+
+def migrate(to: str, data_root: Path = None) -> Dict[str, int]:
+    """
+    Copy session state from one backend to the other.
+
+    Args:
+        to: Target backend, "sqlite" or "json"
+        data_root: Data root (defaults to SLIPSTREAM_DATA_DIR / ./slipstream_data)
+
+    Returns:
+        Number of sessions migrated per utility
+    """
+    root = Path(data_root) if data_root else get_data_root()
+    store = open_session_store(root)
+    if to == BACKEND_SQLITE:
+        return store.import_json(root)
+    if to == BACKEND_JSON:
+        return store.export_json(root)
+    raise ValueError(f"Unknown storage backend: {to} (expected one of {', '.join(BACKENDS)})")
@@ -0,0 +1,314 @@
+"""
+Slipstream Session Summaries
+
+Incremental rolling summary checkpoints for long sessions.
+
+Checkpoints are appended to summaries.jsonl next to the session's
+context.json. Each one records how many audit events it covers and the
+position in the audit log it covers up to, so building context reads
+only the latest checkpoint plus the events logged after it. Older events
+are never re-read.
+
+Positions are backend-specific (a byte offset in events.jsonl, a sequence
+number with the sqlite session store), so checkpoints also record the
+backend. After a migration the position is found again by event count,
+once, until the next checkpoint is written.
+
+The summarizer is pluggable. The default ExtractiveSummarizer is
+deterministic and works offline; an LLM-backed summarizer can be dropped
+in by implementing Summarizer.summarize().
+
+Usage:
+    summaries = SummaryManager(session_id, session_dir)
+    checkpoint, recent = summaries.context(max_events=1000)
+    summaries.maybe_checkpoint()   # background once N new events built up
+"""
+
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from .audit import AuditTrail, get_audit_trail
+from .context_pruner import DEFAULT_EVENT_WEIGHTS, DEFAULT_WEIGHT
+from .io import file_lock, read_tail_lines
+from .session_store import BACKEND_JSON, BACKEND_SQLITE
+
+# Create a checkpoint once this many events are not yet summarized
+DEFAULT_CHECKPOINT_EVERY = 50
+
+
+@dataclass
+class SummaryCheckpoint:
+    """A summary of every audit event up to a point in the log."""
+    seq: int                    # Number of events covered
+    offset: int                 # Audit log position covered up to
+    created_at: float
+    summary: str
+    state: Dict[str, Any] = field(default_factory=dict)
+    backend: str = ""           # Audit backend the offset belongs to ("" if unknown)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SummaryCheckpoint":
+        return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__})
+
+
+class Summarizer(ABC):
+    """Interface for folding new events into a running summary."""
+
+    @abstractmethod
+    def summarize(self,
+                  previous: Optional[SummaryCheckpoint],
+                  events: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Extend the previous summary with new events.
+
+        Args:
+            previous: Latest checkpoint, or None for the first one
+            events: Events logged since that checkpoint, oldest first
+
+        Returns:
+            (summary text, summarizer state to carry into the next call)
+        """
+        raise NotImplementedError
+
+
+class ExtractiveSummarizer(Summarizer):
+    """
+    Deterministic offline summarizer.
+
+    Keeps running counts per event type and agent, the sequence of phases,
+    and verbatim highlights of the most recent high-weight events
+    (decisions, gate resolutions, phase transitions, findings).
+    """
+
+    def __init__(self, max_highlights: int = 20, highlight_weight: int = 3, max_detail_chars: int = 160):
+        self.max_highlights = max_highlights
+        self.highlight_weight = highlight_weight
+        self.max_detail_chars = max_detail_chars
+
+    def summarize(self,
+                  previous: Optional[SummaryCheckpoint],
+                  events: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+        state = dict(previous.state) if previous else {}
+        by_type = Counter(state.get("by_type", {}))
+        by_agent = Counter(state.get("by_agent", {}))
+        phases: List[str] = list(state.get("phases", []))
+        highlights: List[str] = list(state.get("highlights", []))
+        first_ts = state.get("first_ts")
+        last_ts = state.get("last_ts")
+
+        for event in events:
+            artifact = event.get("artifact", {})
+            event_type = artifact.get("event_type", "unknown")
+            agent = artifact.get("agent", "unknown")
+            phase = artifact.get("phase")
+            timestamp = artifact.get("timestamp")
+
+            by_type[event_type] += 1
+            by_agent[agent] += 1
+            if phase and (not phases or phases[-1] != phase):
+                phases.append(phase)
+            if timestamp is not None:
+                first_ts = timestamp if first_ts is None else first_ts
+                last_ts = timestamp
+
+            if DEFAULT_EVENT_WEIGHTS.get(event_type, DEFAULT_WEIGHT) >= self.highlight_weight:
+                details = str(artifact.get("details", ""))
+                if len(details) > self.max_detail_chars:
+                    details = details[:self.max_detail_chars] + "..."
+                highlights.append(f"[{phase}] {agent} ({event_type}): {details}")
+
+        highlights = highlights[-self.max_highlights:]
+        state = {
+            "by_type": dict(by_type),
+            "by_agent": dict(by_agent),
+            "phases": phases,
+            "highlights": highlights,
+            "first_ts": first_ts,
+            "last_ts": last_ts,
+        }
+
+        total = sum(by_type.values())
+        lines = [f"Covers {total} events from {first_ts} to {last_ts}."]
+        if phases:
+            lines.append("Phases: " + " -> ".join(phases))
+        lines.append("Activity: " + ", ".join(f"{n} {t}" for t, n in by_type.most_common()))
+        lines.append("Agents: " + ", ".join(f"{a} ({n})" for a, n in by_agent.most_common()))
+        if highlights:
+            lines.append("Key events:")
+            lines.extend(f"- {h}" for h in highlights)
+        return "\n".join(lines), state
+
+
+class SummaryManager:
+    """Reads and extends a session's summary checkpoints."""
+
+    def __init__(self,
+                 session_id: str,
+                 session_dir: Path,
+                 summarizer: Optional[Summarizer] = None,
+                 checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+                 auditor: Optional[AuditTrail] = None):
+        """
+        Initialize summary manager.
+
+        Args:
+            session_id: Session identifier
+            session_dir: Directory holding the session's context.json
+            summarizer: Summarizer (defaults to ExtractiveSummarizer)
+            checkpoint_every: Unsummarized events that trigger a checkpoint
+            auditor: Audit trail to read events from
+        """
+        self.session_id = session_id
+        self.session_dir = Path(session_dir)
+        self.summaries_file = self.session_dir / "summaries.jsonl"
+        self.lock_file = self.session_dir / "summaries.lock"
+        self.summarizer = summarizer or ExtractiveSummarizer()
+        self.checkpoint_every = checkpoint_every
+        self.auditor = auditor or get_audit_trail()
+
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        # (seq, offset, backend) of a foreign checkpoint -> offset in this backend
+        self._converted: Dict[Tuple[int, int, str], int] = {}
+
+    def latest(self) -> Optional[SummaryCheckpoint]:
+        """Most recent checkpoint, read from the tail of summaries.jsonl."""
+        if not self.summaries_file.exists():
+            return None
+        for line in read_tail_lines(self.summaries_file):
+            try:
+                return SummaryCheckpoint.from_dict(json.loads(line))
+            except (json.JSONDecodeError, UnicodeDecodeError, TypeError):
+                continue
+        return None
+
+    def _backend(self) -> str:
+        return BACKEND_SQLITE if self.auditor.store is not None else BACKEND_JSON
+
+    def _resume_offset(self, checkpoint: Optional[SummaryCheckpoint]) -> int:
+        """Audit log position just past the events a checkpoint covers."""
+        if checkpoint is None:
+            return 0
+        if checkpoint.backend == self._backend():
+            return checkpoint.offset
+
+        # Written against another backend: skip the covered events by count
+        key = (checkpoint.seq, checkpoint.offset, checkpoint.backend)
+        if key not in self._converted:
+            offset, remaining = 0, checkpoint.seq
+            if remaining > 0:
+                for offset, _ in self.auditor.iter_events_after(self.session_id, 0):
+                    remaining -= 1
+                    if remaining == 0:
+                        break
+            self._converted = {key: offset}
+        return self._converted[key]
+
+    def pending_count(self, checkpoint: Optional[SummaryCheckpoint] = None) -> int:
+        """Number of events logged after the latest checkpoint."""
+        checkpoint = checkpoint or self.latest()
+        covered = checkpoint.seq if checkpoint else 0
+        return max(0, self.auditor.count_events(self.session_id) - covered)
+
+    def context(self, max_events: int) -> Tuple[Optional[SummaryCheckpoint], List[Dict[str, Any]]]:
+        """
+        Latest checkpoint plus the events after it, for building a prompt.
+
+        Args:
+            max_events: Cap on events returned; if more are unsummarized,
+                only the newest are returned
+
+        Returns:
+            (checkpoint or None, events after it, oldest first)
+        """
+        checkpoint = self.latest()
+        if self.pending_count(checkpoint) > max_events:
+            return checkpoint, self.auditor.get_session_events(self.session_id, limit=max_events)
+
+        offset = self._resume_offset(checkpoint)
+        events = [event for _, event in self.auditor.iter_events_after(self.session_id, offset)]
+        return checkpoint, events[-max_events:] if max_events > 0 else events
+
+    def checkpoint(self) -> Optional[SummaryCheckpoint]:
+        """
+        Fold every event since the latest checkpoint into a new one.
+
+        Returns:
+            The new checkpoint, or None if there was nothing to summarize
+        """
+        self.session_dir.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.lock_file):
+            previous = self.latest()
+            offset = self._resume_offset(previous)
+
+            events = []
+            for end_offset, event in self.auditor.iter_events_after(self.session_id, offset):
+                events.append(event)
+                offset = end_offset
+            if not events:
+                return None
+
+            summary, state = self.summarizer.summarize(previous, events)
+            checkpoint = SummaryCheckpoint(
+                seq=(previous.seq if previous else 0) + len(events),
+                offset=offset,
+                created_at=time.time(),
+                summary=summary,
+                state=state,
+                backend=self._backend(),
+            )
+            with open(self.summaries_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(checkpoint)) + "\n")
+            return checkpoint
+
+    def maybe_checkpoint(self, background: bool = True) -> bool:
+        """
+        Checkpoint if at least checkpoint_every events are unsummarized.
+
+        Args:
+            background: Run the summarizer on a worker thread. The thread is
+                not a daemon, so a short-lived CLI still finishes it.
+
+        Returns:
+            True if a checkpoint was started (or completed)
+        """
+        if self.pending_count() < self.checkpoint_every:
+            return False
+
+        if not background:
+            return self.checkpoint() is not None
+
+        with self._worker_lock:
+            if self._worker is not None and self._worker.is_alive():
+                return False
+            self._worker = threading.Thread(target=self.checkpoint,
+                                            name=f"slipstream-summary-{self.session_id}")
+            self._worker.start()
+            return True
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Wait for a background checkpoint to finish."""
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+
+
+_managers: Dict[str, SummaryManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_session_summaries(session_id: str, session_dir: Path) -> SummaryManager:
+    """Shared SummaryManager for a session (one background checkpoint at a time per process)."""
+    key = str(Path(session_dir).resolve())
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = SummaryManager(session_id, Path(session_dir))
+            _managers[key] = manager
+        return manager
@@ -0,0 +1,39 @@
+"""
+Slipstream Token Counting
+
+Fast local token estimate with a pluggable exact tokenizer.
+
+The default estimate (~4 characters per token) is O(1) and close enough
+for budgeting. Install an exact tokenizer for the target model with
+set_tokenizer() when precision matters.
+"""
+
+from typing import Callable, Optional
+
+CHARS_PER_TOKEN = 4
+
+_tokenizer: Optional[Callable[[str], int]] = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count from character length."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def set_tokenizer(tokenizer: Optional[Callable[[str], int]]) -> None:
+    """
+    Install an exact tokenizer used by count_tokens().
+
+    Args:
+        tokenizer: Callable returning the token count of a string, or None
+            to go back to the estimate
+    """
+    global _tokenizer
+    _tokenizer = tokenizer
+
+
+def count_tokens(text: str) -> int:
+    """Token count using the installed tokenizer, else the estimate."""
+    if _tokenizer is not None:
+        return _tokenizer(text)
+    return estimate_tokens(text)
@@ -0,0 +1,376 @@
+"""
+Slipstream Tool Cache
+
+Caches results of read-only tools (deepsearch, web_fetch, codebase_grep,
+...) keyed on the tool name and its normalized arguments, so personas in
+parallel research tracks asking the same question pay for it once.
+
+- Per-tool TTLs come from rules.yaml tool_cache.ttl_seconds. Tools not
+  listed there (e.g. codebase_edit) are never cached.
+- A size-bounded LRU memory tier sits in front of a disk tier under the
+  "tool_cache" data directory, which is shared by every process and
+  session.
+- Concurrent identical calls are collapsed: one caller runs the tool,
+  the others wait for its result (single-flight, per process).
+- Keys carry no session or caller identity, so results must depend only
+  on the tool and its arguments: put anything that selects a different
+  tool or result (e.g. which implementation backs an endpoint) into the
+  arguments.
+- The tool only runs on a miss, so a RateLimiter slot taken inside the
+  fetch function is never spent on a hit.
+- Every hit and miss is logged to the audit trail as a tool_cache event
+  when a session_id is given.
+
+Usage:
+    cache = get_tool_cache()
+
+    def fetch():
+        if not limiter.acquire("deepsearch", agent="researcher", timeout=60):
+            raise TimeoutError("No deepsearch slot")
+        return deepsearch(query)
+
+    results = cache.call("deepsearch", {"query": query}, fetch,
+                         session_id="my-session", agent="researcher", phase="research")
+"""
+
+import hashlib
+import json
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Callable, Mapping, Optional, Tuple
+
+from .audit import AuditTrail, get_audit_trail
+from .io import atomic_write_json, encode_json, get_data_dir
+from .rules import get_rules_section
+
+# Seconds a result stays fresh; tools not listed are not cached
+DEFAULT_TTL_SECONDS = {
+    "deepsearch": 86400,
+    "web_search": 3600,
+    "web_fetch": 3600,
+    "codebase_grep": 300,
+    "codebase_read": 60,
+}
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Tool names become a directory of the disk tier: never a path
+_TOOL_NAME = re.compile(r"[A-Za-z0-9_][A-Za-z0-9_.-]*")
+
+
+def _check_tool(tool: str) -> str:
+    if not isinstance(tool, str) or not _TOOL_NAME.fullmatch(tool):
+        raise ValueError(f"Invalid tool name: {tool!r}")
+    return tool
+
+
+def normalize_args(args: Any) -> Any:
+    """
+    Canonical form of tool arguments.
+
+    Mapping keys are sorted, None values dropped and surrounding
+    whitespace stripped from strings; anything else is kept as is, so
+    arguments that could change the result never collide.
+    """
+    if isinstance(args, Mapping):
+        return {str(k): normalize_args(v) for k, v in sorted(args.items(), key=lambda kv: str(kv[0]))
+                if v is not None}
+    if isinstance(args, (list, tuple)):
+        return [normalize_args(v) for v in args]
+    if isinstance(args, str):
+        return args.strip()
+    return args
+
+
+def cache_key(tool: str, args: Any) -> str:
+    """SHA-256 of the tool name and its normalized arguments."""
+    canonical = json.dumps([tool, normalize_args(args)], sort_keys=True,
+                           separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    """A tool call in progress that identical callers wait on."""
+    __slots__ = ("done", "payload", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.payload: Optional[bytes] = None
+        self.error: Optional[BaseException] = None
+
+
+class ToolCache:
+    """Two-tier TTL cache for tool results with single-flight misses."""
+
+    def __init__(self,
+                 data_dir: Path = None,
+                 ttl_seconds: Optional[Dict[str, float]] = None,
+                 max_entries: Optional[int] = None,
+                 max_bytes: Optional[int] = None,
+                 disk: Optional[bool] = None,
+                 auditor: Optional[AuditTrail] = None):
+        """
+        Initialize tool cache.
+
+        Args:
+            data_dir: Directory for the disk tier
+            ttl_seconds: Per-tool TTLs, merged over rules.yaml and the
+                defaults (0 disables caching for a tool)
+            max_entries: Memory tier entry bound
+            max_bytes: Memory tier size bound (encoded results)
+            disk: Keep a disk tier (default True)
+            auditor: Audit trail for hit/miss events (defaults to the
+                global trail)
+        """
+        config = get_rules_section("tool_cache")
+        memory = config.get("memory") or {}
+        self.data_dir = Path(data_dir) if data_dir else get_data_dir("tool_cache")
+        self.ttl_seconds = dict(DEFAULT_TTL_SECONDS)
+        self.ttl_seconds.update(config.get("ttl_seconds") or {})
+        self.ttl_seconds.update(ttl_seconds or {})
+        self.max_entries = int(max_entries or memory.get("max_entries", DEFAULT_MAX_ENTRIES))
+        self.max_bytes = int(max_bytes or memory.get("max_bytes", DEFAULT_MAX_BYTES))
+        self.disk = bool(config.get("disk", True) if disk is None else disk)
+        self.auditor = auditor
+
+        self._init_state()
+
+    def _init_state(self) -> None:
+        self._lock = threading.Lock()
+        # key -> (tool, expires, payload)
+        self._memory: "OrderedDict[str, Tuple[str, float, bytes]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._flights: Dict[str, _Flight] = {}
+        self._stats = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0,
+                       "shared": 0, "evictions": 0}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Process pool workers get the configuration and share the disk tier
+        state = {k: v for k, v in self.__dict__.items() if not k.startswith("_")}
+        state["auditor"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._init_state()
+
+    def ttl_for(self, tool: str) -> float:
+        return float(self.ttl_seconds.get(tool) or 0)
+
+    # ------------------------------------------------------------------
+    # Tiers
+    # ------------------------------------------------------------------
+
+    def _memory_get(self, key: str, now: float) -> Optional[bytes]:
+        """Caller holds _lock."""
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            self._memory_drop(key)
+            return None
+        self._memory.move_to_end(key)
+        return entry[2]
+
+    def _memory_drop(self, key: str) -> None:
+        _, _, payload = self._memory.pop(key)
+        self._memory_bytes -= len(payload)
+
+    def _memory_put(self, key: str, tool: str, expires: float, payload: bytes) -> None:
+        """Caller holds _lock."""
+        if len(payload) > self.max_bytes:
+            return
+        if key in self._memory:
+            self._memory_drop(key)
+        self._memory[key] = (tool, expires, payload)
+        self._memory_bytes += len(payload)
+        while len(self._memory) > self.max_entries or self._memory_bytes > self.max_bytes:
+            self._memory_drop(next(iter(self._memory)))
+            self._stats["evictions"] += 1
+
+    def _disk_path(self, tool: str, key: str) -> Path:
+        return self.data_dir / _check_tool(tool) / key[:2] / f"{key[2:]}.json"
+
+    def _disk_get(self, tool: str, key: str, now: float) -> Optional[Tuple[float, bytes]]:
+        if not self.disk:
+            return None
+        path = self._disk_path(tool, key)
+        try:
+            with open(path, "rb") as f:
+                entry = json.loads(f.read())
+        except (FileNotFoundError, json.JSONDecodeError, UnicodeDecodeError):
+            return None
+        if not isinstance(entry, dict) or "value" not in entry or entry.get("expires", 0) <= now:
+            path.unlink(missing_ok=True)
+            return None
+        return entry["expires"], encode_json(entry["value"], compact=True)
+
+    def _disk_put(self, tool: str, key: str, stored: float, expires: float, value: Any) -> None:
+        if self.disk:
+            atomic_write_json(self._disk_path(tool, key),
+                              {"tool": tool, "stored": stored, "expires": expires, "value": value},
+                              compact=True, durable=False)
+
+    # ------------------------------------------------------------------
+    # Calls
+    # ------------------------------------------------------------------
+
+    def call(self,
+             tool: str,
+             args: Any,
+             fetch: Callable[[], Any],
+             session_id: Optional[str] = None,
+             agent: str = "unknown",
+             phase: str = "",
+             cache_if: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Get a tool result from the cache, or run `fetch` and cache its result.
+
+        Args:
+            tool: Tool name (selects the TTL)
+            args: Tool arguments (JSON-serializable)
+            fetch: Runs the tool; only called on a miss, so rate limiting
+                belongs in here
+            session_id: Session to log the hit/miss to (None logs nothing)
+            agent: Agent recorded on the audit event
+            phase: Phase recorded on the audit event
+            cache_if: Predicate deciding whether a result is cached
+                (e.g. not for error responses)
+
+        Returns:
+            The result, a fresh copy on every call
+
+        Raises:
+            ValueError: If the tool name is not a plain name (letters,
+                digits, "_", "-" and "." not leading)
+            Whatever fetch raises; callers sharing the flight get the same error
+        """
+        ttl = self.ttl_for(_check_tool(tool))
+        if ttl <= 0:
+            return fetch()
+
+        key = cache_key(tool, args)
+        now = time.time()
+        with self._lock:
+            payload = self._memory_get(key, now)
+            if payload is not None:
+                self._stats["hits"] += 1
+                self._stats["memory_hits"] += 1
+            else:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight()
+
+        if payload is not None:
+            self._log(session_id, agent, phase, tool, key, "hit", "memory")
+            return json.loads(payload)
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            with self._lock:
+                self._stats["hits"] += 1
+                self._stats["shared"] += 1
+            self._log(session_id, agent, phase, tool, key, "hit", "in_flight")
+            return json.loads(flight.payload)
+
+        try:
+            cached = self._disk_get(tool, key, now)
+            if cached is not None:
+                expires, payload = cached
+                tier = "disk"
+            else:
+                value = fetch()
+                payload = encode_json(value, compact=True)
+                stored = time.time()
+                expires = stored + ttl
+                tier = None
+                if cache_if is None or cache_if(value):
+                    self._disk_put(tool, key, stored, expires, value)
+                else:
+                    expires = 0.0
+            flight.payload = payload
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.error is None:
+                    if expires > 0:
+                        self._memory_put(key, tool, expires, payload)
+                    self._stats["hits" if tier else "misses"] += 1
+                    if tier:
+                        self._stats["disk_hits"] += 1
+            flight.done.set()
+
+        self._log(session_id, agent, phase, tool, key, "hit" if tier else "miss", tier or "")
+        return json.loads(payload)
+
+    def _log(self, session_id: Optional[str], agent: str, phase: str,
+             tool: str, key: str, result: str, tier: str) -> None:
+        if session_id is None:
+            return
+        auditor = self.auditor or get_audit_trail()
+        details = {"tool": tool, "key": key[:16], "result": result}
+        if tier:
+            details["tier"] = tier
+        auditor.log_event(session_id, "tool_cache", agent, phase, details, tools_used=[tool])
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def invalidate(self, tool: Optional[str] = None) -> None:
+        """Drop cached results of one tool, or of every tool."""
+        if tool is not None:
+            _check_tool(tool)
+        with self._lock:
+            for key in [k for k, entry in self._memory.items() if tool is None or entry[0] == tool]:
+                self._memory_drop(key)
+        target = self.data_dir / tool if tool else self.data_dir
+        if target.exists():
+            shutil.rmtree(target, ignore_errors=True)
+            if tool is None:
+                target.mkdir(parents=True, exist_ok=True)
+
+    def prune(self) -> int:
+        """
+        Delete expired disk entries.
+
+        Returns:
+            Number of entries deleted
+        """
+        now, removed = time.time(), 0
+        for path in self.data_dir.glob("*/*/*.json"):
+            try:
+                with open(path, "rb") as f:
+                    expired = json.loads(f.read()).get("expires", 0) <= now
+            except (OSError, json.JSONDecodeError, UnicodeDecodeError):
+                expired = True
+            if expired:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and memory tier usage for this process."""
+        with self._lock:
+            return {**self._stats, "entries": len(self._memory), "bytes": self._memory_bytes}
+
+
+_tool_cache: Optional[ToolCache] = None
+
+
+def get_tool_cache() -> ToolCache:
+    """Get or create the global tool cache instance."""
+    global _tool_cache
+    if _tool_cache is None:
+        _tool_cache = ToolCache()
+    return _tool_cache
@@ -0,0 +1,210 @@
+"""
+Slipstream File Watching
+
+Blocks until a file in a directory changes, without busy polling.
+
+On Linux the directory is watched with inotify (through ctypes, no extra
+dependency): the waiting thread sleeps in select() and wakes as soon as
+the file is written, replaced or removed. Elsewhere, or if inotify is
+unavailable, a portable watcher stat()s the file with exponential backoff,
+so an idle wait costs a handful of syscalls per second at most.
+
+Usage:
+    with DirectoryWatcher(gates_dir) as watcher:
+        stamp = file_stamp(gate_path)      # Before reading the file
+        ...read and check the file...
+        watcher.wait(gate_path.name, timeout=30, stamp=stamp)
+
+Taking the stamp before reading closes the race where the file changes
+between the check and the wait.
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+# Polling fallback: first re-check after MIN, doubling up to MAX
+POLL_MIN_INTERVAL = 0.01
+POLL_MAX_INTERVAL = 1.0
+
+# inotify(7) constants
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT = struct.Struct("iIII")
+
+FileStamp = Optional[Tuple[int, int, int]]
+
+
+def file_stamp(path: Path) -> FileStamp:
+    """Identify a file's current version (None if it does not exist)."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def _load_libc():
+    if not hasattr(select, "select") or os.name != "posix":
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+    except OSError:
+        return None
+    return libc if hasattr(libc, "inotify_init1") else None
+
+
+_libc = _load_libc()
+
+
+class DirectoryWatcher:
+    """
+    Waits for changes to named files in one directory.
+
+    Uses inotify where available and falls back to stat polling with
+    exponential backoff. Create the watcher before first reading the
+    files it guards so no change is missed.
+    """
+
+    def __init__(self,
+                 directory: Path,
+                 use_inotify: Optional[bool] = None,
+                 poll_min: float = POLL_MIN_INTERVAL,
+                 poll_max: float = POLL_MAX_INTERVAL):
+        """
+        Initialize watcher.
+
+        Args:
+            directory: Directory holding the watched files
+            use_inotify: Force (True) or disable (False) inotify; None picks
+                it when available
+            poll_min: First polling interval of the fallback
+            poll_max: Polling interval cap of the fallback
+        """
+        self.directory = Path(directory)
+        self.poll_min = poll_min
+        self.poll_max = poll_max
+        self._fd: Optional[int] = None
+
+        if use_inotify is not False and _libc is not None:
+            self._fd = self._open_inotify()
+        if use_inotify and self._fd is None:
+            raise OSError("inotify is not available")
+
+    def _open_inotify(self) -> Optional[int]:
+        fd = _libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            return None
+        if _libc.inotify_add_watch(fd, os.fsencode(self.directory), _WATCH_MASK) < 0:
+            os.close(fd)
+            return None
+        return fd
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._fd is not None
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "DirectoryWatcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _drain(self, name: str) -> bool:
+        """Consume queued inotify events; True if any concerned `name`."""
+        matched = False
+        while True:
+            try:
+                buf = os.read(self._fd, 65536)
+            except BlockingIOError:
+                return matched
+            offset = 0
+            while offset + _EVENT.size <= len(buf):
+                _, mask, _, length = _EVENT.unpack_from(buf, offset)
+                offset += _EVENT.size
+                event_name = buf[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+                offset += length
+                if mask & _IN_Q_OVERFLOW or event_name == name:
+                    matched = True
+
+    def wait(self, name: str, timeout: Optional[float] = None, stamp: FileStamp = None) -> bool:
+        """
+        Block until `name` changes.
+
+        Args:
+            name: File name within the directory
+            timeout: Maximum seconds to wait (None waits indefinitely)
+            stamp: file_stamp() taken when the file was last read; the
+                polling fallback returns at once if it no longer matches
+
+        Returns:
+            True if the file changed, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        if self._fd is not None:
+            while True:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                ready, _, _ = select.select([self._fd], [], [], remaining)
+                if ready and self._drain(name):
+                    return True
+                if deadline is not None and time.monotonic() >= deadline:
+                    return False
+
+        path = self.directory / name
+        delay = self.poll_min
+        while True:
+            if file_stamp(path) != stamp:
+                return True
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            time.sleep(delay if remaining is None else min(delay, remaining))
+            delay = min(delay * 2, self.poll_max)
+
+    async def wait_async(self, name: str, timeout: Optional[float] = None, stamp: FileStamp = None) -> bool:
+        """asyncio form of wait(); the event loop stays free while waiting."""
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+
+        if self._fd is not None:
+            while True:
+                ready = loop.create_future()
+                loop.add_reader(self._fd, lambda: ready.done() or ready.set_result(None))
+                try:
+                    remaining = None if deadline is None else max(0.0, deadline - loop.time())
+                    await asyncio.wait_for(ready, remaining)
+                except asyncio.TimeoutError:
+                    return False
+                finally:
+                    loop.remove_reader(self._fd)
+                if self._drain(name):
+                    return True
+
+        path = self.directory / name
+        delay = self.poll_min
+        while True:
+            if file_stamp(path) != stamp:
+                return True
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return False
+            await asyncio.sleep(delay if remaining is None else min(delay, remaining))
+            delay = min(delay * 2, self.poll_max)
@@ -0,0 +1,558 @@
+"""
+Slipstream Workflow Compiler
+
+Compiles a workflow YAML into an immutable phase dependency graph.
+
+The workflow is validated against workflows/_schema.yaml, then its phases
+become nodes of a DAG. Edges come from, in order:
+
+    depends_on      explicit phase dependencies (default: the previous phase)
+    transitions     `{from}_to_{to}` rules
+    requires        `{output}_exist(s)` conditions name the producing phase
+
+The compiled DAG is cached on disk keyed by the SHA-256 of the workflow
+and schema files, so an unchanged workflow is never re-parsed or
+re-validated.
+
+Usage:
+    dag = compile_workflow("standard")
+
+    dag.generations          # (("intake",), ("research",), ...)
+    dag.concurrent_phases()  # groups of phases that may run at the same time
+    dag.critical_path()      # CriticalPath(phases=(...), cost=...)
+    dag.required_gates()     # HITL and moral gates, in phase order
+"""
+
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, NamedTuple, Optional, Set, Tuple, Union
+
+from .io import atomic_write_json, get_data_dir, load_json_gracefully
+from .registry import Registry, _parse_yaml, get_registry
+
+# Bump when the compiled format or compile rules change; invalidates caches
+COMPILER_VERSION = "1"
+
+# Turn budget assumed for phases without circuit_breaker.max_turns
+DEFAULT_MAX_TURNS = 10
+
+# Terminal pseudo-phase used by transitions such as handoff_to_complete
+COMPLETE = "complete"
+
+# Strings an `array` field may hold instead of a list
+ARRAY_KEYWORDS = {"all_assigned"}
+
+_TYPES = {
+    "string": str,
+    "boolean": bool,
+    "array": list,
+    "object": dict,
+    "integer": int,
+    "number": (int, float),
+}
+
+
+class WorkflowValidationError(ValueError):
+    """A workflow does not conform to the schema or has an invalid graph."""
+
+    def __init__(self, workflow: str, errors: List[str]):
+        self.workflow = workflow
+        self.errors = errors
+        super().__init__(f"Invalid workflow {workflow}: " + "; ".join(errors))
+
+
+@dataclass(frozen=True)
+class PhaseNode:
+    """One phase of a compiled workflow."""
+    name: str
+    index: int
+    description: str
+    output: Optional[str]
+    mode: str
+    agents: Tuple[str, ...]
+    hitl_gate: bool
+    gate_id: Optional[str]
+    moral_gate: bool
+    tracks: Tuple[str, ...]
+    max_turns: int
+    definition: Mapping[str, Any] = field(compare=False, hash=False, repr=False)
+
+
+@dataclass(frozen=True)
+class Transition:
+    """A `{source}_to_{target}` transition rule."""
+    source: str
+    target: str
+    requires: Tuple[str, ...] = ()
+    creates: Tuple[str, ...] = ()
+    auto: bool = False
+
+
+@dataclass(frozen=True)
+class Gate:
+    """A gate that must be passed to leave (hitl) or act within (moral) a phase."""
+    phase: str
+    gate_id: str
+    kind: str                   # hitl or moral
+    description: str = ""
+
+
+class CriticalPath(NamedTuple):
+    phases: Tuple[str, ...]
+    cost: float
+
+
+def _freeze(value: Any) -> Any:
+    """Recursively turn dicts into read-only mappings and lists into tuples."""
+    if isinstance(value, Mapping):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """Inverse of _freeze, for JSON serialization."""
+    if isinstance(value, Mapping):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+
+@dataclass(frozen=True)
+class WorkflowDAG:
+    """Immutable phase dependency graph of a workflow."""
+    name: str
+    description: str
+    content_hash: str
+    phases: Tuple[PhaseNode, ...]
+    edges: Tuple[Tuple[str, str], ...]
+    transitions: Tuple[Transition, ...] = ()
+
+    # ------------------------------------------------------------------
+    # Graph structure
+    # ------------------------------------------------------------------
+
+    @cached_property
+    def _by_name(self) -> Mapping[str, PhaseNode]:
+        return MappingProxyType({p.name: p for p in self.phases})
+
+    @cached_property
+    def _parents(self) -> Mapping[str, Tuple[str, ...]]:
+        parents: Dict[str, List[str]] = {p.name: [] for p in self.phases}
+        for source, target in self.edges:
+            parents[target].append(source)
+        return MappingProxyType({k: tuple(v) for k, v in parents.items()})
+
+    @cached_property
+    def _children(self) -> Mapping[str, Tuple[str, ...]]:
+        children: Dict[str, List[str]] = {p.name: [] for p in self.phases}
+        for source, target in self.edges:
+            children[source].append(target)
+        return MappingProxyType({k: tuple(v) for k, v in children.items()})
+
+    def phase(self, name: str) -> PhaseNode:
+        try:
+            return self._by_name[name]
+        except KeyError:
+            raise KeyError(f"Unknown phase '{name}' in workflow {self.name}") from None
+
+    def dependencies(self, name: str) -> Tuple[str, ...]:
+        """Phases that must finish before `name` starts."""
+        self.phase(name)
+        return self._parents[name]
+
+    def dependents(self, name: str) -> Tuple[str, ...]:
+        """Phases that wait on `name`."""
+        self.phase(name)
+        return self._children[name]
+
+    def ancestors(self, name: str) -> Set[str]:
+        """Every phase `name` transitively depends on."""
+        seen: Set[str] = set()
+        stack = list(self.dependencies(name))
+        while stack:
+            current = stack.pop()
+            if current not in seen:
+                seen.add(current)
+                stack.extend(self._parents[current])
+        return seen
+
+    @cached_property
+    def generations(self) -> Tuple[Tuple[str, ...], ...]:
+        """
+        Phases grouped into scheduling waves.
+
+        Every phase's dependencies are in earlier waves, so the phases of
+        one wave may run concurrently. Within a wave, phases keep their
+        declaration order.
+        """
+        level: Dict[str, int] = {}
+        for name in self.topological_order:
+            level[name] = 1 + max((level[p] for p in self._parents[name]), default=-1)
+
+        waves: List[List[str]] = [[] for _ in range(max(level.values(), default=-1) + 1)]
+        for phase in self.phases:
+            waves[level[phase.name]].append(phase.name)
+        return tuple(tuple(w) for w in waves)
+
+    @cached_property
+    def topological_order(self) -> Tuple[str, ...]:
+        """Phases in dependency order, ties broken by declaration order."""
+        return _toposort([p.name for p in self.phases], self.edges)
+
+    def concurrent_phases(self) -> Tuple[Tuple[str, ...], ...]:
+        """Waves holding more than one phase."""
+        return tuple(wave for wave in self.generations if len(wave) > 1)
+
+    def critical_path(self, weights: Optional[Mapping[str, float]] = None) -> CriticalPath:
+        """
+        Longest dependency chain by cost.
+
+        Args:
+            weights: Cost per phase (defaults to each phase's turn budget,
+                circuit_breaker.max_turns)
+
+        Returns:
+            CriticalPath with phases in execution order and total cost
+        """
+        def cost(name: str) -> float:
+            if weights is not None and name in weights:
+                return float(weights[name])
+            return float(self._by_name[name].max_turns)
+
+        best: Dict[str, float] = {}
+        via: Dict[str, Optional[str]] = {}
+        for name in self.topological_order:
+            parent = max(self._parents[name], key=lambda p: best[p], default=None)
+            best[name] = cost(name) + (best[parent] if parent else 0.0)
+            via[name] = parent
+
+        if not best:
+            return CriticalPath(phases=(), cost=0.0)
+
+        end = max(self.topological_order, key=lambda n: best[n])
+        path = []
+        current: Optional[str] = end
+        while current is not None:
+            path.append(current)
+            current = via[current]
+        return CriticalPath(phases=tuple(reversed(path)), cost=best[end])
+
+    def required_gates(self) -> Tuple[Gate, ...]:
+        """HITL and moral gates in phase order."""
+        gates = []
+        for phase in self.phases:
+            if phase.moral_gate:
+                gates.append(Gate(phase=phase.name, gate_id=f"{phase.name}-moral", kind="moral",
+                                  description="Moral gate before any code change"))
+            if phase.hitl_gate:
+                gates.append(Gate(phase=phase.name, gate_id=phase.gate_id, kind="hitl",
+                                  description=phase.definition.get("gate_description", "")))
+        return tuple(gates)
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "compiler_version": COMPILER_VERSION,
+            "name": self.name,
+            "description": self.description,
+            "content_hash": self.content_hash,
+            "phases": [_thaw(p.definition) for p in self.phases],
+            "edges": [list(e) for e in self.edges],
+            "transitions": [{"source": t.source, "target": t.target, "requires": list(t.requires),
+                             "creates": list(t.creates), "auto": t.auto} for t in self.transitions],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "WorkflowDAG":
+        return cls(
+            name=data["name"],
+            description=data["description"],
+            content_hash=data["content_hash"],
+            phases=tuple(_phase_node(i, p) for i, p in enumerate(data["phases"])),
+            edges=tuple((s, t) for s, t in data["edges"]),
+            transitions=tuple(Transition(source=t["source"], target=t["target"],
+                                         requires=tuple(t["requires"]), creates=tuple(t["creates"]),
+                                         auto=t["auto"]) for t in data["transitions"]),
+        )
+
+
+# ----------------------------------------------------------------------
+# Validation
+# ----------------------------------------------------------------------
+
+def _check(value: Any, spec: Mapping[str, Any], where: str, errors: List[str]) -> None:
+    """Check a value against a schema field definition."""
+    expected = spec.get("type")
+    enum = spec.get("enum")
+
+    if expected == "array" and isinstance(value, str) and value in ARRAY_KEYWORDS:
+        return
+    if expected == "string" and enum and isinstance(value, list):
+        # Triggers list several acceptable values, e.g. [moderate, complex]
+        for item in value:
+            if item not in enum:
+                errors.append(f"{where}: {item!r} not one of {list(enum)}")
+        return
+
+    types = _TYPES.get(expected)
+    if types is not None and (not isinstance(value, types) or
+                              (expected in ("integer", "number") and isinstance(value, bool))):
+        errors.append(f"{where}: expected {expected}, got {type(value).__name__}")
+        return
+    if enum and value not in enum:
+        errors.append(f"{where}: {value!r} not one of {list(enum)}")
+
+    if isinstance(value, dict):
+        for key in spec.get("required", []):
+            if key not in value:
+                errors.append(f"{where}: missing required field '{key}'")
+        for key, sub in (spec.get("properties") or {}).items():
+            if key in value:
+                _check(value[key], sub, f"{where}.{key}", errors)
+    elif isinstance(value, list) and spec.get("items"):
+        for i, item in enumerate(value):
+            _check(item, spec["items"], f"{where}[{i}]", errors)
+
+
+def validate_workflow(definition: Any, schema: Mapping[str, Any]) -> List[str]:
+    """
+    Check a parsed workflow against a parsed _schema.yaml.
+
+    Only fields the schema defines are checked; extra fields such as
+    `transitions` or `escalation` are allowed.
+
+    Returns:
+        Error messages (empty if valid)
+    """
+    if not isinstance(definition, dict):
+        return ["workflow must be a mapping"]
+
+    errors: List[str] = []
+    for key in schema.get("required_fields", []):
+        if key not in definition:
+            errors.append(f"missing required field '{key}'")
+    for key, spec in (schema.get("field_definitions") or {}).items():
+        if key in definition:
+            _check(definition[key], spec, key, errors)
+    return errors
+
+
+# ----------------------------------------------------------------------
+# Compilation
+# ----------------------------------------------------------------------
+
+def _phase_node(index: int, phase: Mapping[str, Any]) -> PhaseNode:
+    agents = phase.get("agents") or ()
+    tracks = []
+    for entry in phase.get("research_tracks") or ():
+        tracks.extend(entry.keys() if isinstance(entry, Mapping) else [entry])
+
+    breaker = phase.get("circuit_breaker") or {}
+    return PhaseNode(
+        name=phase["name"],
+        index=index,
+        description=phase.get("description", ""),
+        output=phase.get("output"),
+        mode=phase.get("mode", "sequential"),
+        agents=(agents,) if isinstance(agents, str) else tuple(agents),
+        hitl_gate=bool(phase.get("hitl_gate", False)),
+        gate_id=phase.get("gate_id") or (f"{phase['name']}-gate" if phase.get("hitl_gate") else None),
+        moral_gate=phase.get("moral_gate") == "required",
+        tracks=tuple(str(t) for t in tracks),
+        max_turns=int(breaker.get("max_turns", DEFAULT_MAX_TURNS)),
+        definition=_freeze(phase),
+    )
+
+
+def _toposort(names: List[str], edges: Tuple[Tuple[str, str], ...]) -> Tuple[str, ...]:
+    """Kahn's algorithm, preferring declaration order. Raises ValueError on cycles."""
+    position = {name: i for i, name in enumerate(names)}
+    indegree = {name: 0 for name in names}
+    children: Dict[str, List[str]] = {name: [] for name in names}
+    for source, target in edges:
+        indegree[target] += 1
+        children[source].append(target)
+
+    ready = sorted((n for n in names if indegree[n] == 0), key=position.get)
+    order = []
+    while ready:
+        current = ready.pop(0)
+        order.append(current)
+        for child in children[current]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                ready.append(child)
+                ready.sort(key=position.get)
+
+    if len(order) != len(names):
+        stuck = [n for n in names if n not in order]
+        raise ValueError(f"dependency cycle between phases {stuck}")
+    return tuple(order)
+
+
+def _parse_transition(key: str, names: Set[str]) -> Optional[Tuple[str, str]]:
+    """Split `{source}_to_{target}`, where either name may itself contain `_to_`."""
+    start = 0
+    while True:
+        i = key.find("_to_", start)
+        if i < 0:
+            return None
+        source, target = key[:i], key[i + 4:]
+        if source in names and (target in names or target == COMPLETE):
+            return source, target
+        start = i + 1
+
+
+def build_dag(definition: Dict[str, Any], schema: Mapping[str, Any], content_hash: str = "") -> WorkflowDAG:
+    """
+    Validate a parsed workflow and build its DAG.
+
+    Raises:
+        WorkflowValidationError: If the workflow or its graph is invalid
+    """
+    label = definition.get("name", "<unnamed>") if isinstance(definition, dict) else "<invalid>"
+    errors = validate_workflow(definition, schema)
+    if errors:
+        raise WorkflowValidationError(label, errors)
+
+    phases = [_phase_node(i, p) for i, p in enumerate(definition["phases"])]
+    names = [p.name for p in phases]
+    known = set(names)
+    if len(known) != len(names):
+        duplicates = sorted({n for n in names if names.count(n) > 1})
+        errors.append(f"duplicate phase names {duplicates}")
+
+    edges: List[Tuple[str, str]] = []
+
+    def add(source: str, target: str, why: str) -> None:
+        if source not in known or target not in known:
+            errors.append(f"{why}: unknown phase '{source if source not in known else target}'")
+        elif source == target:
+            errors.append(f"{why}: phase '{source}' depends on itself")
+        elif (source, target) not in edges:
+            edges.append((source, target))
+
+    for i, phase in enumerate(phases):
+        declared = phase.definition.get("depends_on")
+        if declared is None:
+            if i > 0:
+                add(names[i - 1], phase.name, f"phases[{i}]")
+        elif not isinstance(declared, (list, tuple)) or not all(isinstance(dep, str) for dep in declared):
+            errors.append(f"phases[{i}].depends_on: expected a list of phase names")
+        else:
+            for dep in declared:
+                add(dep, phase.name, f"phases[{i}].depends_on")
+
+    producers = {p.output: p.name for p in phases if p.output}
+    gated = {p.name for p in phases if p.hitl_gate}
+    transitions = []
+    for key, rule in (definition.get("transitions") or {}).items():
+        parsed = _parse_transition(key, known)
+        if parsed is None:
+            errors.append(f"transitions.{key}: expected '<phase>_to_<phase|{COMPLETE}>'")
+            continue
+        source, target = parsed
+        rule = rule or {}
+        requires = tuple(rule.get("requires") or ())
+        transitions.append(Transition(source=source, target=target, requires=requires,
+                                      creates=tuple(rule.get("creates") or ()),
+                                      auto=bool(rule.get("auto_transition", False))))
+
+        if "hitl_gate_approved" in requires and source not in gated:
+            errors.append(f"transitions.{key}: requires hitl_gate_approved but phase "
+                          f"'{source}' has no hitl_gate")
+        if target == COMPLETE:
+            continue
+        add(source, target, f"transitions.{key}")
+        for condition in requires:
+            output = condition.rsplit("_exists", 1)[0] if condition.endswith("_exists") \
+                else condition.rsplit("_exist", 1)[0] if condition.endswith("_exist") else None
+            if output in producers:
+                add(producers[output], target, f"transitions.{key}.requires")
+
+    if not errors:
+        try:
+            _toposort(names, tuple(edges))
+        except ValueError as e:
+            errors.append(str(e))
+    if errors:
+        raise WorkflowValidationError(label, errors)
+
+    return WorkflowDAG(
+        name=definition["name"],
+        description=str(definition["description"]).strip(),
+        content_hash=content_hash,
+        phases=tuple(phases),
+        edges=tuple(edges),
+        transitions=tuple(transitions),
+    )
+
+
+_compiled: Dict[str, WorkflowDAG] = {}
+_compiled_lock = threading.Lock()
+
+
+def compile_workflow(workflow: Union[str, Path],
+                     registry: Optional[Registry] = None,
+                     cache_dir: Optional[Path] = None) -> WorkflowDAG:
+    """
+    Compile a workflow, reusing the cached DAG when its files are unchanged.
+
+    Args:
+        workflow: Workflow name (e.g. "standard") or path to a workflow YAML
+        registry: Registry used to locate workflows and the schema
+        cache_dir: Directory for compiled DAGs (defaults to the data dir)
+
+    Returns:
+        The compiled WorkflowDAG
+
+    Raises:
+        KeyError: If the workflow name is unknown
+        WorkflowValidationError: If the workflow is invalid
+    """
+    registry = registry or get_registry()
+    path = Path(workflow) if isinstance(workflow, Path) or str(workflow).endswith((".yaml", ".yml")) \
+        else registry.workflow_path(workflow)
+    source = path.read_bytes()
+    schema_path = registry.workflow_schema_path()
+    schema_source = schema_path.read_bytes() if schema_path.exists() else b""
+
+    digest = hashlib.sha256()
+    for part in (COMPILER_VERSION.encode(), schema_source, source):
+        digest.update(len(part).to_bytes(8, "little"))
+        digest.update(part)
+    content_hash = digest.hexdigest()
+
+    with _compiled_lock:
+        cached = _compiled.get(content_hash)
+    if cached is not None:
+        return cached
+
+    cache_file = Path(cache_dir or get_data_dir("workflows")) / f"{content_hash}.json"
+    data = load_json_gracefully(cache_file)
+    dag = None
+    if data and data.get("compiler_version") == COMPILER_VERSION and data.get("content_hash") == content_hash:
+        try:
+            dag = WorkflowDAG.from_dict(data)
+        except (KeyError, TypeError, ValueError):
+            dag = None
+
+    if dag is None:
+        schema = _parse_yaml(schema_source.decode("utf-8")) if schema_source else {}
+        dag = build_dag(_parse_yaml(source.decode("utf-8")), schema, content_hash)
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_json(cache_file, dag.to_dict(), compact=True, durable=False)  # Rebuildable cache
+
+    with _compiled_lock:
+        _compiled[content_hash] = dag
+    return dag
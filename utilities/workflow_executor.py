@@ -0,0 +1,552 @@
+"""
+Slipstream Workflow Executor
+
+Runs the tracks of a `mode: parallel` workflow phase concurrently.
+
+Each track (e.g. the research_tracks of the standard workflow's research
+phase) runs its own turn loop on a thread or process pool:
+
+    circuit breaker check -> rate limiter slot -> tool call -> record turn
+
+With a ToolCache, turns asking a question the same tool already answered
+(in an earlier phase or session) are answered from the cache without
+taking a rate limiter slot; only misses go on to the limiter and the tool.
+Tracks of one phase asking the same question run once: the first track
+declared with it calls the tool, the others mirror its result. Cached
+responses are shared across tracks and sessions, so a tool used with a
+cache must not put track or session data into its responses.
+
+Every track gets its own CircuitBreaker, configured from the phase's
+circuit_breaker section, while all tracks draw on one RateLimiter budget.
+Results are merged in the order the tracks are declared, never in
+completion order, so the phase output and the audit events logged for it
+are identical from run to run. Wall-clock time approaches that of the
+slowest track rather than the sum of all tracks.
+
+Tool calls go through a pluggable callable, so phases can be run offline
+with a stub:
+
+    executor = WorkflowExecutor("my-session", tool=OfflineTool())
+    result = executor.run_phase("standard", "research")
+    result.output              # merged research_artifacts
+    result.elapsed
+
+Whole workflows compiled with workflow_dag run phase by phase as their
+dependencies finish, so independent phases overlap:
+
+    results = executor.run_dag(compile_workflow("standard"), phases=["research"])
+
+Process pools need the tool to be picklable (a module-level function or
+class instance) and a rate limiter whose store is shared across
+processes (FileCallStore or SQLiteCallStore).
+"""
+
+import copy
+import functools
+import time
+from concurrent.futures import (Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor,
+                                FIRST_COMPLETED, wait)
+from dataclasses import dataclass, field, asdict, replace
+from pathlib import Path
+from typing import Dict, Any, Callable, Iterable, List, Mapping, Optional, Union
+
+from .audit import AuditTrail, get_audit_trail
+from .circuit_breaker import CircuitBreaker, TurnResult
+from .io import get_data_dir
+from .rate_limiter import RateLimiter
+from .rate_limit_store import FileCallStore, SQLiteCallStore
+from .registry import Registry, get_registry
+from .session_store import open_session_store
+from .tool_cache import ToolCache
+from .workflow_dag import DEFAULT_MAX_TURNS, WorkflowDAG
+
+DEFAULT_ENDPOINT = "deepsearch"
+DEFAULT_ACQUIRE_TIMEOUT = 60.0
+
+
+@dataclass
+class Track:
+    """One independent line of work within a parallel phase."""
+    name: str
+    question: str
+
+
+@dataclass
+class ToolRequest:
+    """What a track asks of its tool on one turn."""
+    session_id: str
+    phase: str
+    track: str
+    question: str
+    turn: int
+    endpoint: str
+
+
+@dataclass
+class ToolResponse:
+    """What the tool returned for one turn."""
+    artifacts: List[Dict[str, Any]] = field(default_factory=list)
+    new_information: bool = False
+    done: bool = False
+    error: Optional[str] = None
+    metrics: Dict[str, Any] = field(default_factory=dict)   # Progress metrics, see rules.yaml
+
+    @classmethod
+    def from_value(cls, value: Union["ToolResponse", Dict[str, Any]]) -> "ToolResponse":
+        if isinstance(value, cls):
+            return value
+        return cls(**{k: v for k, v in value.items() if k in cls.__dataclass_fields__})
+
+
+ToolCall = Callable[[ToolRequest], Union[ToolResponse, Dict[str, Any]]]
+
+
+@dataclass
+class TurnRecord:
+    """One executed turn, kept for the merged audit output."""
+    turn: int
+    artifacts: int
+    new_information: bool
+    error: Optional[str] = None
+    cache: Optional[str] = None     # hit or miss when a tool cache is used
+
+
+@dataclass
+class TrackResult:
+    """Outcome of running one track to completion."""
+    track: str
+    question: str
+    status: str                 # completed, max_turns, circuit_open, rate_limited, error
+    artifacts: List[Dict[str, Any]] = field(default_factory=list)
+    turns: List[TurnRecord] = field(default_factory=list)
+    reason: str = ""
+    elapsed: float = 0.0
+
+
+@dataclass
+class PhaseResult:
+    """Merged outcome of a parallel phase."""
+    phase: str
+    output_name: str
+    tracks: List[TrackResult]
+    elapsed: float
+
+    @property
+    def output(self) -> Dict[str, Any]:
+        """The phase output (e.g. research_artifacts), merged in track order."""
+        artifacts = []
+        for result in self.tracks:
+            for artifact in result.artifacts:
+                artifacts.append({"track": result.track, **artifact})
+        return {
+            "phase": self.phase,
+            "tracks": {r.track: {"question": r.question, "status": r.status,
+                                 "turns": len(r.turns), "reason": r.reason}
+                       for r in self.tracks},
+            "artifacts": artifacts,
+        }
+
+    @property
+    def ok(self) -> bool:
+        return all(r.status in ("completed", "max_turns") for r in self.tracks)
+
+
+class OfflineTool:
+    """
+    Deterministic stand-in for research tools.
+
+    Produces one artifact per turn and reports the track done after
+    `turns` turns. `latency` simulates a slow remote call.
+    """
+
+    def __init__(self, turns: int = 1, latency: float = 0.0):
+        self.turns = turns
+        self.latency = latency
+
+    def __call__(self, request: ToolRequest) -> ToolResponse:
+        if self.latency:
+            time.sleep(self.latency)
+        return ToolResponse(
+            artifacts=[{
+                "turn": request.turn,
+                "finding": f"Offline finding {request.turn} for: {request.question}",
+                "source": f"offline://{request.endpoint}/{request.turn}",
+            }],
+            new_information=True,
+            done=request.turn >= self.turns,
+        )
+
+
+@dataclass
+class _TrackJob:
+    """Everything a worker needs to run one track; picklable for process pools."""
+    session_id: str
+    phase: str
+    track: Track
+    tool: ToolCall
+    endpoint: str
+    agent: str
+    max_turns: int
+    stall_threshold: Optional[int]
+    breaker_dir: Path
+    acquire_timeout: Optional[float]
+    limiter: Optional[RateLimiter] = None          # Shared instance (thread pools)
+    limiter_args: Optional[Dict[str, Any]] = None  # Rebuilt per process
+    cache: Optional[ToolCache] = None
+    cache_namespace: str = ""                      # Identifies the tool in cache keys
+
+
+class _RateLimited(Exception):
+    """No rate limiter slot for a tool call that missed the cache."""
+
+
+def _open_limiter(args: Dict[str, Any]) -> RateLimiter:
+    store = None
+    if args.get("sqlite_path"):
+        store = SQLiteCallStore(args["sqlite_path"], session_id=args.get("sqlite_session", ""))
+    session_store = None
+    if args.get("session_store_root"):
+        session_store = open_session_store(args["session_store_root"])
+    return RateLimiter(session_id=args["session_id"], data_dir=args["data_dir"], store=store,
+                       session_store=session_store)
+
+
+def _run_track(job: _TrackJob) -> TrackResult:
+    """Turn loop for one track. Module-level so process pools can run it."""
+    started = time.monotonic()
+    track = job.track
+    result = TrackResult(track=track.name, question=track.question, status="max_turns")
+
+    limiter = job.limiter if job.limiter is not None else _open_limiter(job.limiter_args)
+    breaker = CircuitBreaker(session_id=f"{job.session_id}-{job.phase}-{track.name}",
+                             data_dir=job.breaker_dir,
+                             thresholds={"no_progress_turns": job.stall_threshold})
+
+    for turn in range(1, job.max_turns + 1):
+        if not breaker.can_execute():
+            result.status = "circuit_open"
+            result.reason = breaker.get_status()["reason"]
+            break
+
+        request = ToolRequest(session_id=job.session_id, phase=job.phase, track=track.name,
+                              question=track.question, turn=turn, endpoint=job.endpoint)
+        fetched = []
+
+        def call_tool() -> Dict[str, Any]:
+            if not limiter.acquire(job.endpoint, agent=job.agent, timeout=job.acquire_timeout):
+                raise _RateLimited(f"No '{job.endpoint}' slot within {job.acquire_timeout}s")
+            fetched.append(turn)
+            try:
+                return asdict(ToolResponse.from_value(job.tool(request)))
+            except Exception as e:
+                return asdict(ToolResponse(error=f"{type(e).__name__}: {e}"))
+
+        try:
+            if job.cache is None:
+                value = call_tool()
+            else:
+                args = {"tool": job.cache_namespace, "question": track.question, "turn": turn}
+                value = job.cache.call(job.endpoint, args, call_tool,
+                                       cache_if=lambda v: v.get("error") is None)
+        except _RateLimited as e:
+            result.status = "rate_limited"
+            result.reason = str(e)
+            break
+        response = ToolResponse.from_value(value)
+
+        result.artifacts.extend(response.artifacts)
+        result.turns.append(TurnRecord(turn=turn, artifacts=len(response.artifacts),
+                                       new_information=response.new_information,
+                                       error=response.error,
+                                       cache=None if job.cache is None else
+                                       ("miss" if fetched else "hit")))
+
+        should_continue = breaker.record_turn_result(TurnResult(
+            turn_number=turn,
+            artifacts_produced=len(response.artifacts),
+            has_errors=response.error is not None,
+            error_signature=response.error,
+            new_information=response.new_information,
+            metrics=response.metrics,
+        ))
+        if response.done:
+            result.status = "completed"
+            break
+        if not should_continue:
+            result.status = "circuit_open"
+            result.reason = breaker.get_status()["reason"]
+            break
+
+    result.elapsed = time.monotonic() - started
+    return result
+
+
+def tool_namespace(tool: ToolCall) -> str:
+    """
+    Qualified name identifying a tool in cache keys.
+
+    Raises:
+        ValueError: For tools without a distinguishing name (lambdas,
+            functools.partial, ...); pass cache_namespace for those
+    """
+    named = tool if hasattr(tool, "__qualname__") else type(tool)
+    qualname = getattr(named, "__qualname__", "")
+    if not qualname or "<lambda>" in qualname or isinstance(tool, functools.partial):
+        raise ValueError(f"Cannot derive a cache namespace for tool {tool!r}; pass cache_namespace")
+    return f"{named.__module__}.{qualname}"
+
+
+def _mirror(owner: TrackResult, track: Track) -> TrackResult:
+    """Result of a track that asked the same question as `owner`."""
+    return TrackResult(
+        track=track.name,
+        question=track.question,
+        status=owner.status,
+        artifacts=copy.deepcopy(owner.artifacts),
+        turns=[replace(turn, cache="hit") for turn in owner.turns],
+        reason=owner.reason,
+    )
+
+
+def parse_tracks(phase: Mapping[str, Any]) -> List[Track]:
+    """
+    Tracks declared by a phase, in declaration order.
+
+    research_tracks entries are single-key mappings (name: question) or
+    plain names. A parallel phase without research_tracks runs as a
+    single track named after the phase.
+    """
+    declared = phase.get("research_tracks")
+    if not declared:
+        return [Track(name=phase["name"], question=phase.get("description", phase["name"]))]
+
+    tracks = []
+    for entry in declared:
+        if isinstance(entry, Mapping):
+            for name, question in entry.items():
+                tracks.append(Track(name=str(name), question=str(question)))
+        else:
+            tracks.append(Track(name=str(entry), question=str(entry)))
+
+    names = [t.name for t in tracks]
+    duplicates = sorted({n for n in names if names.count(n) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate research tracks in phase {phase['name']}: {duplicates}")
+    return tracks
+
+
+class WorkflowExecutor:
+    """Runs parallel workflow phases on a thread or process pool."""
+
+    def __init__(self,
+                 session_id: str,
+                 tool: ToolCall,
+                 registry: Optional[Registry] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 auditor: Optional[AuditTrail] = None,
+                 pool: str = "thread",
+                 max_workers: Optional[int] = None,
+                 endpoint: str = DEFAULT_ENDPOINT,
+                 agent: str = "researcher",
+                 breaker_dir: Path = None,
+                 acquire_timeout: Optional[float] = DEFAULT_ACQUIRE_TIMEOUT,
+                 tool_cache: Optional[ToolCache] = None,
+                 cache_namespace: Optional[str] = None):
+        """
+        Initialize executor.
+
+        Args:
+            session_id: Session identifier
+            tool: Callable invoked once per track turn with a ToolRequest
+            registry: Source of workflow definitions
+            rate_limiter: Budget shared by all tracks (defaults to the
+                session's file-backed limiter)
+            auditor: Audit trail for the merged phase events
+            pool: "thread" or "process"
+            max_workers: Pool size (defaults to one worker per track)
+            endpoint: Rate-limited endpoint each tool call is charged to
+            agent: Agent name recorded for calls and events
+            breaker_dir: Data directory for the per-track circuit breakers
+            acquire_timeout: Seconds a track waits for a rate limit slot
+            tool_cache: Cache answering repeated tool calls without a rate
+                limit slot (None calls the tool every turn)
+            cache_namespace: Identifies the tool in cache keys, so different
+                tools on one endpoint never share results (defaults to the
+                tool's qualified name)
+        """
+        if pool not in ("thread", "process"):
+            raise ValueError(f"Unknown pool: {pool}")
+
+        self.session_id = session_id
+        self.tool = tool
+        self.registry = registry or get_registry()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter(session_id)
+        self.auditor = auditor or get_audit_trail()
+        self.pool = pool
+        self.max_workers = max_workers
+        self.endpoint = endpoint
+        self.agent = agent
+        self.breaker_dir = Path(breaker_dir) if breaker_dir else get_data_dir("circuit_breaker")
+        self.acquire_timeout = acquire_timeout
+        self.tool_cache = tool_cache
+        self.cache_namespace = ""
+        if tool_cache is not None:
+            self.cache_namespace = cache_namespace or tool_namespace(tool)
+
+    def _limiter_args(self) -> Dict[str, Any]:
+        """How a worker process reopens the shared rate limiter."""
+        store = self.rate_limiter.store
+        if not isinstance(store, (FileCallStore, SQLiteCallStore)):
+            raise ValueError("Process pools need a FileCallStore or SQLiteCallStore "
+                             "so all workers share one rate limit budget")
+        session_store = self.rate_limiter.session_store
+        return {
+            "session_id": self.rate_limiter.data_dir.name,
+            "data_dir": self.rate_limiter.data_dir.parent if session_store is None else None,
+            "sqlite_path": store.db_path if isinstance(store, SQLiteCallStore) else None,
+            "sqlite_session": store.session_id if isinstance(store, SQLiteCallStore) else "",
+            "session_store_root": session_store.db_path.parent if session_store is not None else None,
+        }
+
+    def _jobs(self, phase: Mapping[str, Any]) -> List[_TrackJob]:
+        breaker = phase.get("circuit_breaker") or {}
+        shared = {"limiter": self.rate_limiter} if self.pool == "thread" \
+            else {"limiter_args": self._limiter_args()}
+        return [_TrackJob(
+            session_id=self.session_id,
+            phase=phase["name"],
+            track=track,
+            tool=self.tool,
+            endpoint=self.endpoint,
+            agent=self.agent,
+            max_turns=int(breaker.get("max_turns", DEFAULT_MAX_TURNS)),
+            stall_threshold=breaker.get("stall_threshold"),
+            breaker_dir=self.breaker_dir,
+            acquire_timeout=self.acquire_timeout,
+            cache=self.tool_cache,
+            cache_namespace=self.cache_namespace,
+            **shared,
+        ) for track in parse_tracks(phase)]
+
+    def _pool(self, workers: int) -> Executor:
+        if self.pool == "process":
+            return ProcessPoolExecutor(max_workers=workers)
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="slipstream-track")
+
+    def run_phase(self, workflow: Union[str, Mapping[str, Any]], phase_name: str) -> PhaseResult:
+        """
+        Run one phase of a workflow.
+
+        Args:
+            workflow: Workflow name (looked up in the registry) or parsed definition
+            phase_name: Phase to run
+
+        Returns:
+            PhaseResult with tracks in declaration order
+        """
+        definition = self.registry.workflow(workflow) if isinstance(workflow, str) else workflow
+        for phase in definition.get("phases", []):
+            if phase.get("name") == phase_name:
+                return self.run(phase)
+        raise KeyError(f"Unknown phase '{phase_name}' in workflow {definition.get('name')}")
+
+    def run(self, phase: Mapping[str, Any]) -> PhaseResult:
+        """
+        Run a phase definition's tracks and merge the results.
+
+        Phases not marked `mode: parallel` run their tracks one at a time.
+        """
+        started = time.monotonic()
+        jobs = self._jobs(phase)
+        owners = list(range(len(jobs)))
+        if self.tool_cache is not None:
+            # With a cache, the first track declared with a question calls the
+            # tool and later ones mirror it, so hits and misses do not depend
+            # on which thread gets there first
+            first: Dict[str, int] = {}
+            owners = [first.setdefault(job.track.question, i) for i, job in enumerate(jobs)]
+        running = [job for i, job in enumerate(jobs) if owners[i] == i]
+
+        workers = len(running) if phase.get("mode") == "parallel" else 1
+        if self.max_workers:
+            workers = min(workers, self.max_workers)
+
+        with self._pool(workers) as pool:
+            # map() yields in submission order, which makes the merge deterministic
+            ran = dict(zip((job.track.name for job in running), pool.map(_run_track, running)))
+
+        tracks = [ran[job.track.name] if owners[i] == i
+                  else _mirror(ran[jobs[owners[i]].track.name], job.track)
+                  for i, job in enumerate(jobs)]
+
+        result = PhaseResult(
+            phase=phase["name"],
+            output_name=phase.get("output", f"{phase['name']}_artifacts"),
+            tracks=tracks,
+            elapsed=time.monotonic() - started,
+        )
+        self._log(result)
+        return result
+
+    def run_dag(self, dag: WorkflowDAG, phases: Optional[Iterable[str]] = None) -> Dict[str, PhaseResult]:
+        """
+        Run phases of a compiled workflow, each as soon as its dependencies finish.
+
+        Gates are not resolved here: pass only the phases whose gates the
+        caller has already cleared.
+
+        Args:
+            dag: Compiled workflow
+            phases: Phases to run (defaults to all). Dependencies on phases
+                left out are treated as already satisfied.
+
+        Returns:
+            PhaseResult per phase, in topological order
+
+        Raises:
+            KeyError: If a requested phase is not in the workflow
+        """
+        wanted = None if phases is None else set(phases)
+        if wanted is not None:
+            unknown = sorted(wanted - set(dag.topological_order))
+            if unknown:
+                raise KeyError(f"Unknown phases {unknown} in workflow {dag.name}")
+        selected = [n for n in dag.topological_order if wanted is None or n in wanted]
+        waiting = {n: dag.ancestors(n) & set(selected) for n in selected}
+        results: Dict[str, PhaseResult] = {}
+
+        with ThreadPoolExecutor(max_workers=max(1, len(selected)),
+                                thread_name_prefix="slipstream-phase") as pool:
+            running: Dict[Future, str] = {}
+            while waiting or running:
+                for name in [n for n, deps in waiting.items() if not deps]:
+                    del waiting[name]
+                    running[pool.submit(self.run, dag.phase(name).definition)] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name] = future.result()
+                    for deps in waiting.values():
+                        deps.discard(name)
+
+        return {n: results[n] for n in selected}
+
+    def _log(self, result: PhaseResult) -> None:
+        """Log the phase to the audit trail, one track after another."""
+        for track in result.tracks:
+            for turn in track.turns:
+                details = asdict(turn)
+                if details["cache"] is None:
+                    del details["cache"]   # No tool cache: every turn called the tool
+                self.auditor.log_event(
+                    self.session_id, "tool_call", self.agent, result.phase,
+                    {"track": track.track, "endpoint": self.endpoint, **details},
+                    tools_used=[self.endpoint],
+                )
+            self.auditor.log_event(
+                self.session_id, "research_finding", self.agent, result.phase,
+                {"track": track.track, "question": track.question, "status": track.status,
+                 "artifacts": len(track.artifacts), "turns": len(track.turns),
+                 "reason": track.reason},
+            )